@@ -0,0 +1,58 @@
+"""
+Who an ADK callback runs for: its session, root session, user and agent.
+
+ADK keeps these on the private `_invocation_context` of callback and tool
+contexts; call_info() is the only place that reads it, so a change in ADK's
+internals is fixed here once. MODELS/hooks.py re-exports it. This module
+imports nothing from MODELS or logs, so every callback module can use it
+without an import cycle through hooks.py.
+
+AgentTool runs a sub-agent in a fresh child session inside the calling task.
+The outermost agent run's session id is kept in a context variable by the
+root_session_* agent callbacks (registered in hooks.py), and
+CallInfo.root_session_id books sub-agent calls to the session the user is
+talking to.
+"""
+import contextvars
+from typing import Any, NamedTuple
+
+# Root-session tokens of runs whose after_agent callback never ran are dropped beyond this.
+_MAX_OPEN = 10000
+
+_root_session = contextvars.ContextVar("root_session", default=None)
+_root_tokens = {}
+
+
+class CallInfo(NamedTuple):
+    session_id: str
+    root_session_id: str
+    user_id: str
+    agent: Any
+
+
+def call_info(context) -> CallInfo:
+    """Session, root session, user and running agent of a callback or tool context."""
+    invocation = context._invocation_context
+    session_id = invocation.session.id
+    return CallInfo(session_id, _root_session.get() or session_id, invocation.user_id, invocation.agent)
+
+
+def root_session_before_agent(callback_context):
+    """before_agent callback: the first agent run in a task marks its session as the root session."""
+    if _root_session.get() is None:
+        if len(_root_tokens) >= _MAX_OPEN:
+            _root_tokens.pop(next(iter(_root_tokens)))
+        token = _root_session.set(call_info(callback_context).session_id)
+        _root_tokens[(callback_context.invocation_id, callback_context.agent_name)] = token
+    return None
+
+
+def root_session_after_agent(callback_context):
+    token = _root_tokens.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if token is not None:
+        try:
+            _root_session.reset(token)
+        except ValueError:
+            # Reset from another context (the run ended elsewhere); clear it for this one.
+            _root_session.set(None)
+    return None
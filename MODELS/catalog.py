@@ -0,0 +1,62 @@
+"""
+Runtime access to MODELS/model_info.csv (written by models_list.py).
+Uses only the csv module so agents do not pay for a pandas import at startup.
+"""
+import csv
+import functools
+import os
+
+MODEL_INFO_CSV = os.path.join(os.path.dirname(__file__), "model_info.csv")
+
+_INT_COLUMNS = {
+    "input_token_limit": "input_token_limit",
+    "output_token_limit": "output_token_limit",
+    "rpm_free_tier": "rpm",
+    "tpm_free_tier": "tpm",
+    "rpd_free_tier": "rpd",
+}
+
+
+def _to_int(value):
+    """Parses values such as "250,000" into ints; "--", "N/A" and blanks become None."""
+    try:
+        return int(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_model_catalog(csv_path: str = MODEL_INFO_CSV) -> dict:
+    """
+    Loads model_info.csv into {pythonic_name: info}.
+    Each info dict keeps the raw CSV columns and adds parsed ints under
+    input_token_limit, output_token_limit, rpm, tpm and rpd (None when unknown),
+    and the supported generation methods as a list under "methods".
+    """
+    catalog = {}
+    if not os.path.exists(csv_path):
+        return catalog
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            info = dict(row)
+            for column, key in _INT_COLUMNS.items():
+                info[key] = _to_int(row.get(column))
+            info["methods"] = [m.strip() for m in (row.get("supported_generation_methods") or "").split(",") if m.strip()]
+            catalog[row["pythonic_name"]] = info
+    return catalog
+
+
+def get_model_info(model: str, csv_path: str = MODEL_INFO_CSV):
+    """
+    Returns the catalog entry for `model`, or None.
+    Accepts API ids ("models/gemini-2.5-pro") and versioned names
+    ("gemini-1.5-flash-8b-001"), which match the longest catalog prefix.
+    """
+    if not model:
+        return None
+    catalog = load_model_catalog(csv_path)
+    name = model[len("models/"):] if model.startswith("models/") else model
+    if name in catalog:
+        return catalog[name]
+    prefixes = [key for key in catalog if name.startswith(key)]
+    return catalog[max(prefixes, key=len)] if prefixes else None
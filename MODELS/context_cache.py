@@ -0,0 +1,235 @@
+"""
+Opt-in Gemini context caching of each agent's static system instruction.
+
+When enabled (GEMINI_CONTEXT_CACHE=on), the system instruction - and the tool
+declarations, which the API requires to live in the same cache - is uploaded
+once as cached content for models that list createCachedContent in
+model_info.csv. Later requests reference the cache handle instead of resending
+thousands of prompt tokens. Handles are reused across turns and their TTL is
+extended shortly before they expire. Uploads and refreshes run outside the
+manager's lock: concurrent requests for the same instruction wait for the one
+upload in flight, and requests for other instructions are not held up.
+
+GEMINI_CONTEXT_CACHE_BACKEND=memory swaps the Gemini API for an in-process
+stand-in, so the behaviour can be exercised without network access.
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from logs.metrics import observe_cache
+
+from .catalog import get_model_info
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "off").lower() in ("1", "on", "true", "yes")
+BACKEND = os.getenv("GEMINI_CONTEXT_CACHE_BACKEND", "genai")
+TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# Extend a cache's TTL once it has less than this many seconds left.
+REFRESH_MARGIN_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS", "300"))
+# Gemini rejects caches below a minimum size; smaller instructions are sent inline.
+MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+# Only cache an instruction once it has been sent this many times, so one-off
+# (e.g. templated) instructions never pay for a cache upload.
+MIN_USES = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_USES", "2"))
+
+
+class GenaiCacheBackend:
+    """Creates and refreshes cached content through the google-genai client."""
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client()
+        return self._client
+
+    def create(self, model, system_instruction, tools, tool_config, ttl_seconds, display_name):
+        from google.genai import types
+
+        cached = self.client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_instruction,
+                tools=tools,
+                tool_config=tool_config,
+                ttl=f"{ttl_seconds}s",
+                display_name=display_name,
+            ),
+        )
+        return cached.name
+
+    def refresh(self, name, ttl_seconds):
+        from google.genai import types
+
+        self.client.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s"))
+
+    def delete(self, name):
+        self.client.caches.delete(name=name)
+
+
+class InMemoryCacheBackend:
+    """Local stand-in for the Gemini caches API; keeps the uploaded content in memory."""
+    def __init__(self):
+        self.caches = {}
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    def create(self, model, system_instruction, tools, tool_config, ttl_seconds, display_name):
+        name = f"cachedContents/local-{next(self._ids)}"
+        self.caches[name] = {
+            "model": model,
+            "system_instruction": system_instruction,
+            "tools": tools,
+            "tool_config": tool_config,
+            "expires_at": time.time() + ttl_seconds,
+            "display_name": display_name,
+        }
+        self.calls.append(("create", name))
+        return name
+
+    def refresh(self, name, ttl_seconds):
+        if name not in self.caches:
+            raise KeyError(f"{name} does not exist")
+        self.caches[name]["expires_at"] = time.time() + ttl_seconds
+        self.calls.append(("refresh", name))
+
+    def delete(self, name):
+        self.caches.pop(name, None)
+        self.calls.append(("delete", name))
+
+
+class ContextCacheManager:
+    """Maps (model, instruction, tools) to a live cache handle, creating and refreshing it as needed."""
+    def __init__(self, backend, ttl_seconds=TTL_SECONDS, refresh_margin_seconds=REFRESH_MARGIN_SECONDS,
+                 min_tokens=MIN_TOKENS, min_uses=MIN_USES):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.min_tokens = min_tokens
+        self.min_uses = min_uses
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._uses = {}
+        self._in_flight = {}
+        self.stats = {"hits": 0, "creates": 0, "refreshes": 0, "failures": 0}
+
+    @staticmethod
+    def _key(model, system_instruction, tools, tool_config):
+        payload = json.dumps([model, str(system_instruction), repr(tools), repr(tool_config)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def handle_for(self, model, system_instruction, tools=None, tool_config=None, display_name=None):
+        """Returns a cache name for this instruction, or None if it should be sent inline."""
+        if estimate_tokens(str(system_instruction), model) < self.min_tokens:
+            return None
+        key = self._key(model, system_instruction, tools, tool_config)
+        with self._lock:
+            self._uses[key] = self._uses.get(key, 0) + 1
+            if self._uses[key] < self.min_uses:
+                return None
+            now = time.time()
+            handle = self._handles.get(key)
+            valid = handle is not None and handle["expires_at"] > now
+            in_flight = self._in_flight.get(key)
+            if valid and (handle["expires_at"] - now >= self.refresh_margin_seconds or in_flight):
+                return self._hit(handle["name"])
+            if in_flight is None:
+                in_flight = self._in_flight[key] = concurrent.futures.Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            # Another request is uploading this instruction; use its result.
+            name = in_flight.result()
+            if name is None:
+                return None
+            with self._lock:
+                return self._hit(name)
+        name = None
+        try:
+            if valid:
+                self.backend.refresh(handle["name"], self.ttl_seconds)
+                name = handle["name"]
+            else:
+                name = self.backend.create(
+                    model, system_instruction, tools, tool_config, self.ttl_seconds, display_name or key[:16]
+                )
+            with self._lock:
+                self._handles[key] = {"name": name, "expires_at": now + self.ttl_seconds}
+                if valid:
+                    self.stats["refreshes"] += 1
+                    self._hit(name)
+                else:
+                    self.stats["creates"] += 1
+                    observe_cache("gemini_context", hit=False)
+            if not valid:
+                logger.info(f"CONTEXT_CACHE: created {name} for {display_name or model}")
+            return name
+        except Exception as e:
+            name = None
+            with self._lock:
+                self._handles.pop(key, None)
+                self.stats["failures"] += 1
+            observe_cache("gemini_context", hit=False)
+            logger.warning(f"CONTEXT_CACHE: falling back to inline instruction for {display_name or model}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.set_result(name)
+
+    def _hit(self, name):
+        """Counts a request served from an existing handle. Called with the lock held."""
+        self.stats["hits"] += 1
+        observe_cache("gemini_context", hit=True)
+        return name
+
+
+_manager = None
+
+
+def get_manager():
+    global _manager
+    if _manager is None:
+        _manager = ContextCacheManager(InMemoryCacheBackend() if BACKEND == "memory" else GenaiCacheBackend())
+    return _manager
+
+
+def supports_caching(model) -> bool:
+    info = get_model_info(model)
+    return bool(info and "createCachedContent" in info["methods"])
+
+
+async def context_cache_before_model(callback_context, llm_request):
+    """before_model callback: replaces the inline instruction and tools with a cached-content handle."""
+    config = llm_request.config
+    if not ENABLED or config is None or not config.system_instruction or config.cached_content:
+        return None
+    if not supports_caching(llm_request.model):
+        return None
+    name = await asyncio.to_thread(
+        get_manager().handle_for,
+        llm_request.model,
+        config.system_instruction,
+        config.tools,
+        config.tool_config,
+        callback_context.agent_name,
+    )
+    if name:
+        config.cached_content = name
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+    return None
@@ -0,0 +1,221 @@
+"""
+Per-call cost ledger and budget enforcement.
+
+Each LLM response is priced with MODELS/model_prices.csv (USD per million
+tokens, with separate rates for cached input and for prompts above a model's
+long-context threshold) and added to running totals per session, user and
+agent. Sub-agents called through AgentTool run in a child session; their calls
+are booked to the root session (MODELS/call_context.py).
+
+Budgets in USD (0 disables) are checked before every call:
+- above COST_SESSION_SOFT_BUDGET_USD or COST_USER_SOFT_BUDGET_USD the call is
+  moved to FLASH_MODEL (calls with Google Search grounding and agents pinned
+  in the routing policy excepted);
+- above COST_SESSION_HARD_BUDGET_USD or COST_USER_HARD_BUDGET_USD no call is
+  made; the agent receives a fixed answer saying the budget is used up.
+
+Totals live in memory for the lifetime of the process. Budget transitions are
+logged as COST: lines; totals are available from ledger.stats().
+"""
+import csv
+import functools
+import logging
+import os
+import threading
+
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from logs.metrics import registry
+
+from . import FLASH_MODEL
+from .call_context import call_info
+from .router import router, uses_google_search
+from .tokens import call_usage, estimate_request_tokens, estimated_usage
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("COST_LEDGER", "on").lower() not in ("0", "off", "false", "no")
+PRICES_CSV = os.getenv("COST_PRICES") or os.path.join(os.path.dirname(__file__), "model_prices.csv")
+BUDGETS = {
+    ("session", "soft"): float(os.getenv("COST_SESSION_SOFT_BUDGET_USD") or 0),
+    ("session", "hard"): float(os.getenv("COST_SESSION_HARD_BUDGET_USD") or 0),
+    ("user", "soft"): float(os.getenv("COST_USER_SOFT_BUDGET_USD") or 0),
+    ("user", "hard"): float(os.getenv("COST_USER_HARD_BUDGET_USD") or 0),
+}
+
+LLM_COST = registry.counter("llm_cost_usd_total", "Priced cost of LLM calls in USD.", ("agent", "model"))
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_prices(csv_path: str = PRICES_CSV) -> dict:
+    """Loads model_prices.csv into {pythonic_name: {column: float or None}}."""
+    prices = {}
+    if not os.path.exists(csv_path):
+        return prices
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            prices[row["pythonic_name"]] = {k: _to_float(v) for k, v in row.items() if k.endswith(("_mtok", "_tokens"))}
+    return prices
+
+
+def get_price(model: str, csv_path: str = PRICES_CSV):
+    """Returns the price entry for `model` (API ids and versioned names match the longest prefix), or None."""
+    if not model:
+        return None
+    prices = load_prices(csv_path)
+    name = model[len("models/"):] if model.startswith("models/") else model
+    if name in prices:
+        return prices[name]
+    prefixes = [key for key in prices if name.startswith(key)]
+    return prices[max(prefixes, key=len)] if prefixes else None
+
+
+def price_call(model, prompt_tokens, output_tokens, cached_tokens=0):
+    """Cost of one call in USD, or None if the model has no price. Cached tokens are part of prompt_tokens."""
+    price = get_price(model)
+    if price is None or price["input_usd_per_mtok"] is None:
+        return None
+    long_context = price["long_context_tokens"] and prompt_tokens > price["long_context_tokens"]
+    prefix = "long_" if long_context else ""
+    input_rate = price[f"{prefix}input_usd_per_mtok"] or price["input_usd_per_mtok"]
+    output_rate = price[f"{prefix}output_usd_per_mtok"] or price["output_usd_per_mtok"] or 0.0
+    cached_rate = price[f"{prefix}cached_input_usd_per_mtok"] or price["cached_input_usd_per_mtok"]
+    if cached_rate is None:
+        cached_tokens = 0
+    return (
+        (prompt_tokens - cached_tokens) * input_rate
+        + cached_tokens * (cached_rate or 0.0)
+        + output_tokens * output_rate
+    ) / 1_000_000
+
+
+class CostLedger:
+    """Running cost totals per session, user and agent, and the budget state derived from them."""
+    def __init__(self, budgets=None):
+        self.budgets = dict(BUDGETS if budgets is None else budgets)
+        self._lock = threading.Lock()
+        self._totals = {"session": {}, "user": {}, "agent": {}}
+        self._unpriced_calls = 0
+        self._reported = set()
+
+    def record(self, session_id, user_id, agent, model, cost):
+        with self._lock:
+            if cost is None:
+                self._unpriced_calls += 1
+                return
+            for scope, key in (("session", session_id), ("user", user_id), ("agent", agent)):
+                entry = self._totals[scope].setdefault(key, {"calls": 0, "cost_usd": 0.0})
+                entry["calls"] += 1
+                entry["cost_usd"] += cost
+
+    def cost(self, scope, key) -> float:
+        with self._lock:
+            return self._totals[scope].get(key, {}).get("cost_usd", 0.0)
+
+    def budget_state(self, session_id, user_id):
+        """Returns (level, scope, spent, limit) for the strictest exceeded budget, or (None, None, 0.0, 0.0)."""
+        for level in ("hard", "soft"):
+            for scope, key in (("session", session_id), ("user", user_id)):
+                limit = self.budgets.get((scope, level))
+                if limit:
+                    spent = self.cost(scope, key)
+                    if spent >= limit:
+                        return level, scope, spent, limit
+        return None, None, 0.0, 0.0
+
+    def first_report(self, *key) -> bool:
+        """True the first time `key` is seen, so each budget transition is logged once."""
+        with self._lock:
+            if key in self._reported:
+                return False
+            self._reported.add(key)
+            return True
+
+    def stats(self) -> dict:
+        """Returns {"session"|"user"|"agent": {key: {"calls", "cost_usd"}}, "unpriced_calls": n}."""
+        with self._lock:
+            stats = {scope: {k: dict(v) for k, v in totals.items()} for scope, totals in self._totals.items()}
+            stats["unpriced_calls"] = self._unpriced_calls
+            return stats
+
+
+ledger = CostLedger()
+
+
+# --- Model callbacks ---
+_MAX_PENDING = 10000
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _call_key(callback_context):
+    return (callback_context.invocation_id, callback_context.agent_name)
+
+
+def _refusal(scope, spent, limit):
+    text = (
+        f"The {scope} cost budget of ${limit:.2f} is used up (${spent:.2f} spent), so no further model "
+        "calls are made. Please start a new session or raise the budget."
+    )
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), turn_complete=True)
+
+
+def cost_budget_before_model(callback_context, llm_request):
+    """
+    before_model callback: refuses the call above a hard budget and moves it to
+    FLASH_MODEL above a soft one. Runs before the router, so a refused call
+    leaves no routing state behind.
+    """
+    if not ENABLED or not llm_request.model:
+        return None
+    info = call_info(callback_context)
+    session_id, user_id, agent = info.root_session_id, info.user_id, callback_context.agent_name
+    level, scope, spent, limit = ledger.budget_state(session_id, user_id)
+    if level == "hard":
+        if ledger.first_report("hard", scope, session_id if scope == "session" else user_id):
+            logger.warning(f"COST: {scope} hard budget ${limit:.2f} reached (${spent:.4f}); refusing calls")
+        return _refusal(scope, spent, limit)
+    if (
+        level == "soft"
+        and llm_request.model != FLASH_MODEL
+        and agent not in router.policy["pinned_agents"]
+        and not uses_google_search(llm_request)
+    ):
+        if ledger.first_report("soft", scope, session_id if scope == "session" else user_id):
+            logger.warning(f"COST: {scope} soft budget ${limit:.2f} reached (${spent:.4f}); using {FLASH_MODEL}")
+        llm_request.model = FLASH_MODEL
+    with _pending_lock:
+        if len(_pending) >= _MAX_PENDING:
+            # Calls whose after-callback never ran (a later callback answered instead).
+            _pending.pop(next(iter(_pending)))
+        # The request object is kept so the model is read after routing.
+        _pending[_call_key(callback_context)] = llm_request
+    return None
+
+
+def cost_after_model(callback_context, llm_response):
+    """after_model callback: prices the call from its reported usage (or estimates) and books it."""
+    if not ENABLED or llm_response.partial:
+        return None
+    with _pending_lock:
+        llm_request = _pending.pop(_call_key(callback_context), None)
+    if llm_request is None:
+        return None
+    model = llm_request.model
+    usage = call_usage(callback_context, llm_response) or estimated_usage(
+        llm_response, model, estimate_request_tokens(llm_request)
+    )
+    cost = price_call(model, usage["prompt_tokens"], usage["output_tokens"], usage["cached_tokens"])
+    info = call_info(callback_context)
+    ledger.record(info.root_session_id, info.user_id, callback_context.agent_name, model, cost)
+    if cost:
+        LLM_COST.inc(cost, agent=callback_context.agent_name, model=model)
+    return None
@@ -0,0 +1,136 @@
+"""
+Shared ADK callback chains.
+
+Every agent is built with `**agent_callbacks()`, so cross-cutting behaviour that
+must sit in front of every LLM or tool call (rate limiting, cost budgets, ...) is registered
+once here instead of being repeated in each agent module. Agent-specific
+callbacks run first (so e.g. a response cache can answer before a call is
+rate limited), then the shared ones in registration order. The first callback
+that returns a value short-circuits the chain, exactly like a single ADK
+callback returning a value.
+"""
+import inspect
+import os
+
+# Session, user and agent of a callback context; the only reader of ADK's private _invocation_context.
+from .call_context import CallInfo, call_info, root_session_after_agent, root_session_before_agent  # noqa: F401
+
+_BEFORE_AGENT = []
+_AFTER_AGENT = []
+_BEFORE_MODEL = []
+_AFTER_MODEL = []
+_BEFORE_TOOL = []
+_AFTER_TOOL = []
+
+
+def _register(chain):
+    def register(callback):
+        chain.append(callback)
+        return callback
+    return register
+
+
+register_before_agent = _register(_BEFORE_AGENT)
+register_after_agent = _register(_AFTER_AGENT)
+register_before_model = _register(_BEFORE_MODEL)
+register_after_model = _register(_AFTER_MODEL)
+register_before_tool = _register(_BEFORE_TOOL)
+register_after_tool = _register(_AFTER_TOOL)
+
+
+def _chain(shared, local, tail=(), answered=None):
+    # ADK invokes callbacks with keyword arguments only (callback_context=, llm_request=, ...).
+    # When a callback ahead of the tail returns a value, ADK skips the call and
+    # its after-callbacks, so `answered(result=..., answered_by=..., **kwargs)` is told instead.
+    async def callback(**kwargs):
+        for cb in (*local, *shared, *tail):
+            result = cb(**kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            if result is not None:
+                if answered is not None and cb not in tail:
+                    answered(result=result, answered_by=getattr(cb, "__name__", repr(cb)), **kwargs)
+                return result
+        return None
+    return callback
+
+
+def agent_callbacks(*, before_agent=(), after_agent=(), before_model=(), after_model=(), before_tool=(), after_tool=(),
+                    log=None):
+    """
+    Returns the callback keyword arguments for an ADK agent: any agent-specific
+    callbacks passed in, followed by the shared chains. With `log`, the
+    agent's LLM calls, tool calls and runs are timed and logged to that logger
+    (logs/instrumentation.py); those callbacks run last, after rate limiting,
+    and LLM calls answered by an earlier callback (a cache hit, a budget
+    refusal) are logged too.
+    """
+    tail = CallInstrumentation(log).callbacks() if log is not None else {}
+    return {
+        "before_agent_callback": _chain(_BEFORE_AGENT, before_agent, tail.get("before_agent", ())),
+        "after_agent_callback": _chain(_AFTER_AGENT, after_agent, tail.get("after_agent", ())),
+        "before_model_callback": _chain(
+            _BEFORE_MODEL, before_model, tail.get("before_model", ()), tail.get("answered_model")
+        ),
+        "after_model_callback": _chain(_AFTER_MODEL, after_model, tail.get("after_model", ())),
+        "before_tool_callback": _chain(_BEFORE_TOOL, before_tool, tail.get("before_tool", ())),
+        "after_tool_callback": _chain(_AFTER_TOOL, after_tool, tail.get("after_tool", ())),
+    }
+
+
+# --- Shared callbacks ---
+from .context_cache import context_cache_before_model  # noqa: E402
+from .cost_ledger import cost_after_model, cost_budget_before_model  # noqa: E402
+from .rate_limiter import rate_limit_before_model  # noqa: E402
+from .router import route_after_model, route_before_model  # noqa: E402
+from .tokens import token_estimate_before_model, token_usage_after_model  # noqa: E402
+from logs.instrumentation import CallInstrumentation  # noqa: E402
+from logs.metrics import (  # noqa: E402
+    metrics_after_model,
+    metrics_after_tool,
+    metrics_before_model,
+    metrics_before_tool,
+)
+from logs.tracing import (  # noqa: E402
+    trace_after_agent,
+    trace_after_model,
+    trace_after_tool,
+    trace_before_agent,
+    trace_before_model,
+    trace_before_tool,
+)
+
+# Cost budgets are checked before routing, so a refused call never reaches the router and a soft-budget
+# downgrade to FLASH_MODEL is what the router sees.
+# The router runs next so that token accounting, rate limiting and caching see the final model.
+# Trace spans open before and close after the other shared callbacks, so they include rate-limit waits;
+# the LLM latency metric starts last, so it does not. Metrics, cost and traces read the tokens booked by
+# token_usage_after_model, so it is the first after_model callback.
+register_before_agent(root_session_before_agent)
+register_before_agent(trace_before_agent)
+register_before_model(cost_budget_before_model)
+register_before_model(route_before_model)
+register_before_model(trace_before_model)
+register_before_model(token_estimate_before_model)
+register_before_model(rate_limit_before_model)
+register_before_model(context_cache_before_model)
+register_before_model(metrics_before_model)
+register_before_tool(trace_before_tool)
+register_before_tool(metrics_before_tool)
+register_after_model(token_usage_after_model)
+register_after_model(metrics_after_model)
+register_after_model(cost_after_model)
+register_after_model(route_after_model)
+register_after_model(trace_after_model)
+register_after_agent(trace_after_agent)
+register_after_agent(root_session_after_agent)
+register_after_tool(metrics_after_tool)
+register_after_tool(trace_after_tool)
+
+# --- LLM backend ---
+# ADK_LLM_BACKEND=record|replay swaps Gemini for the cassette-backed stand-in in MODELS/replay.py.
+# The module is only imported when it is used.
+if os.getenv("ADK_LLM_BACKEND", "gemini").lower() in ("record", "replay"):
+    from .replay import install_from_env  # noqa: E402
+
+    install_from_env()
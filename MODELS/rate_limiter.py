@@ -0,0 +1,141 @@
+"""
+Per-model token-bucket scheduler driven by the free-tier limits in model_info.csv.
+
+Every LLM call reserves one request (RPM and RPD buckets) plus its estimated
+input tokens (TPM bucket). When a bucket is empty the call is queued - it
+sleeps until its reservation matures - instead of being sent and failing
+with a 429.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from logs.metrics import RATE_LIMIT_WAIT
+
+from .catalog import get_model_info
+from .tokens import estimate_request_tokens
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("MODEL_RATE_LIMITS", "on").lower() not in ("0", "off", "false", "no")
+# Multiplies every limit, e.g. 10 for a paid tier with ten times the free quota.
+LIMIT_SCALE = float(os.getenv("MODEL_RATE_LIMIT_SCALE", "1"))
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations instead of rejecting callers.
+    The balance may go negative; the deficit is the time the caller has to wait.
+    Not thread-safe on its own - ModelRateLimiter serializes access.
+    """
+    def __init__(self, capacity: float, period_s: float):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period_s
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` tokens and returns the seconds until they are actually available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class ModelRateLimiter:
+    """
+    Keeps one set of RPM/TPM/RPD buckets per model, created lazily from the catalog.
+    Models without known limits pass straight through.
+    """
+    def __init__(self, scale: float = LIMIT_SCALE):
+        self.scale = scale
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._stats = {}
+
+    def _buckets_for(self, model):
+        if model not in self._buckets:
+            info = get_model_info(model) or {}
+            buckets = []
+            for key, period_s in (("rpm", 60.0), ("tpm", 60.0), ("rpd", 86400.0)):
+                if info.get(key):
+                    buckets.append((key, TokenBucket(info[key] * self.scale, period_s)))
+            self._buckets[model] = buckets
+            self._stats[model] = {
+                "requests": 0,
+                "queued": 0,
+                "max_queue_depth": 0,
+                "total_wait_s": 0.0,
+                "max_wait_s": 0.0,
+                "last_wait_s": 0.0,
+            }
+        return self._buckets[model]
+
+    def _reserve(self, model, tokens):
+        with self._lock:
+            buckets = self._buckets_for(model)
+            now = time.monotonic()
+            wait_s = 0.0
+            for key, bucket in buckets:
+                wait_s = max(wait_s, bucket.reserve(tokens if key == "tpm" else 1, now))
+            stats = self._stats[model]
+            stats["requests"] += 1
+            stats["last_wait_s"] = wait_s
+            stats["total_wait_s"] += wait_s
+            stats["max_wait_s"] = max(stats["max_wait_s"], wait_s)
+            if wait_s > 0:
+                stats["queued"] += 1
+                stats["max_queue_depth"] = max(stats["max_queue_depth"], stats["queued"])
+            return wait_s, stats["queued"]
+
+    def _release(self, model):
+        with self._lock:
+            self._stats[model]["queued"] -= 1
+
+    async def acquire(self, model: str, tokens: int = 0) -> float:
+        """Waits until `model` may be called with `tokens` input tokens. Returns the wait in seconds."""
+        wait_s, depth = self._reserve(model, tokens)
+        RATE_LIMIT_WAIT.observe(wait_s, model=model)
+        if wait_s > 0:
+            logger.info(f"RATE_LIMIT: queued call to {model} for {wait_s:.2f}s (queue depth {depth})")
+            try:
+                await asyncio.sleep(wait_s)
+            finally:
+                self._release(model)
+        return wait_s
+
+    def acquire_sync(self, model: str, tokens: int = 0) -> float:
+        """Blocking variant of acquire() for code that is not running in an event loop."""
+        wait_s, depth = self._reserve(model, tokens)
+        RATE_LIMIT_WAIT.observe(wait_s, model=model)
+        if wait_s > 0:
+            logger.info(f"RATE_LIMIT: queued call to {model} for {wait_s:.2f}s (queue depth {depth})")
+            try:
+                time.sleep(wait_s)
+            finally:
+                self._release(model)
+        return wait_s
+
+    def adjust(self, model: str, delta_tokens: int):
+        """Corrects the TPM bucket once the real input size of a call is known (delta = actual - estimated)."""
+        with self._lock:
+            for key, bucket in self._buckets.get(model, ()):
+                if key == "tpm":
+                    bucket.tokens = min(bucket.capacity, bucket.tokens - delta_tokens)
+
+    def stats(self) -> dict:
+        """Returns {model: {requests, queued, max_queue_depth, total_wait_s, max_wait_s, last_wait_s}}."""
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+
+rate_limiter = ModelRateLimiter()
+
+
+async def rate_limit_before_model(callback_context, llm_request):
+    """before_model callback: queues the call until the model's buckets allow it."""
+    if ENABLED and llm_request.model:
+        await rate_limiter.acquire(llm_request.model, estimate_request_tokens(llm_request))
+    return None
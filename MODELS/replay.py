@@ -0,0 +1,312 @@
+"""
+Record/replay stand-in for the Gemini backend.
+
+With ADK_LLM_BACKEND=record every Gemini call is forwarded to the real API and
+the request/response pair is appended to a JSON cassette. With
+ADK_LLM_BACKEND=replay the same calls are answered from the cassette without
+network access, after a synthetic delay. The backend is registered in ADK's
+LLMRegistry for "gemini-.*", so the existing agents use it without changes.
+
+A request is matched, in order, by
+1. its exact content (system instruction and conversation, ignoring call ids),
+2. the agent name and conversation length,
+3. the agent name alone (its recorded responses are served round-robin),
+so cassettes keep working after small prompt changes. Unmatched requests raise,
+or get a fixed placeholder answer with ADK_REPLAY_ON_MISS=stub.
+
+Cassettes can also be built from existing logs:
+    python -m MODELS.replay import financial_advisor/logs/financial_advisor.log --cassette MODELS/cassettes/replay.json
+    python -m MODELS.replay show --cassette MODELS/cassettes/replay.json
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from logs.blob_store import BlobStore, default_blob_dir, rehydrate_text
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv("ADK_LLM_BACKEND", "gemini").lower()
+CASSETTE_PATH = os.getenv("ADK_REPLAY_CASSETTE") or os.path.join(os.path.dirname(__file__), "cassettes", "replay.json")
+# "recorded" replays each call's recorded latency; a number is a fixed latency in milliseconds.
+LATENCY = os.getenv("ADK_REPLAY_LATENCY", "recorded")
+LATENCY_SCALE = float(os.getenv("ADK_REPLAY_LATENCY_SCALE", "1"))
+ON_MISS = os.getenv("ADK_REPLAY_ON_MISS", "error").lower()
+
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+_LOG_RECORD_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (\w+) - (.+?) - (.*)$")
+_SENDING_RE = re.compile(r"Sending out request, model: ([^,]+)")
+_SECTION_RULE = "-" * 59
+
+
+def _strip_ids(value):
+    """Drops function call ids, which ADK generates afresh on every run."""
+    if isinstance(value, dict):
+        return {k: _strip_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_strip_ids(v) for v in value]
+    return value
+
+
+def request_key(system_instruction, contents) -> str:
+    """Stable key of a request from its system instruction text and its contents as dicts."""
+    payload = json.dumps(
+        {"system": str(system_instruction or "").strip(), "contents": _strip_ids(contents)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def agent_name(system_instruction):
+    match = _AGENT_NAME_RE.search(str(system_instruction or ""))
+    return match.group(1) if match else None
+
+
+class Cassette:
+    """
+    Recorded interactions stored as JSON:
+    {"interactions": [{"key", "agent", "turns", "model", "latency_ms", "first_chunk_ms",
+                       "responses": [LlmResponse dicts]} | {..., "raw": GenerateContentResponse dict}]}
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.interactions = []
+        self._cursors = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.interactions = json.load(f).get("interactions", [])
+
+    def find(self, key, agent, turns):
+        with self._lock:
+            for interaction in self.interactions:
+                if interaction.get("key") == key:
+                    return interaction, "exact"
+            if agent is None:
+                return None, None
+            same_agent = [i for i in self.interactions if i.get("agent") == agent]
+            for interaction in same_agent:
+                if interaction.get("turns") == turns:
+                    return interaction, "agent_turn"
+            if same_agent:
+                cursor = self._cursors.get(agent, 0)
+                self._cursors[agent] = cursor + 1
+                return same_agent[cursor % len(same_agent)], "agent"
+            return None, None
+
+    def add(self, interaction):
+        with self._lock:
+            self.interactions = [i for i in self.interactions if i.get("key") != interaction["key"]]
+            self.interactions.append(interaction)
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"interactions": self.interactions}, f, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path=CASSETTE_PATH) -> Cassette:
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+def _responses(interaction):
+    if "responses" in interaction:
+        return [LlmResponse.model_validate(r) for r in interaction["responses"]]
+    return [LlmResponse.create(types.GenerateContentResponse.model_validate(interaction["raw"]))]
+
+
+def _delays(interaction, count):
+    """Seconds to wait before each of `count` responses."""
+    if LATENCY == "recorded":
+        total_ms = float(interaction.get("latency_ms") or 0) * LATENCY_SCALE
+        first_ms = float(interaction.get("first_chunk_ms") or total_ms) * LATENCY_SCALE
+    else:
+        total_ms = first_ms = float(LATENCY)
+    rest = (total_ms - first_ms) / (count - 1) if count > 1 else 0.0
+    return [first_ms / 1000] + [max(0.0, rest) / 1000] * (count - 1)
+
+
+class ReplayLlm(BaseLlm):
+    """BaseLlm that records calls to Gemini into a cassette, or answers them from it."""
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"gemini-.*"]
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        cassette = get_cassette()
+        system_instruction = llm_request.config.system_instruction if llm_request.config else None
+        contents = [c.model_dump(exclude_none=True, mode="json") for c in llm_request.contents or []]
+        key = request_key(system_instruction, contents)
+        agent = agent_name(system_instruction)
+
+        if BACKEND == "record":
+            async for response in self._record(cassette, llm_request, stream, key, agent, len(contents)):
+                yield response
+            return
+
+        interaction, match = cassette.find(key, agent, len(contents))
+        if interaction is None:
+            if ON_MISS != "stub":
+                raise LookupError(f"No recorded response for {agent or 'unknown agent'} in {cassette.path}")
+            logger.warning(f"REPLAY: no recording for {agent or 'unknown agent'}, answering with a stub")
+            interaction = {"responses": [{"content": {"role": "model", "parts": [{"text": f"[replay] {agent or 'agent'}: no recorded response."}]}}]}
+            match = "stub"
+        responses = _responses(interaction)
+        if not stream:
+            # A streamed recording ends with the aggregated response; the partial chunks are not needed.
+            responses = [r for r in responses if not r.partial] or responses[-1:]
+        logger.debug(f"REPLAY: {agent} answered from cassette ({match} match)")
+        for delay, response in zip(_delays(interaction, len(responses)), responses):
+            if delay:
+                await asyncio.sleep(delay)
+            yield response
+
+    async def _record(self, cassette, llm_request, stream, key, agent, turns):
+        from google.adk.models.google_llm import Gemini
+
+        recorded = []
+        start = time.perf_counter()
+        first_chunk_ms = None
+        async for response in Gemini(model=self.model).generate_content_async(llm_request, stream=stream):
+            if first_chunk_ms is None:
+                first_chunk_ms = (time.perf_counter() - start) * 1000
+            recorded.append(response.model_dump(exclude_none=True, mode="json"))
+            yield response
+        cassette.add({
+            "key": key,
+            "agent": agent,
+            "turns": turns,
+            "model": llm_request.model,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "first_chunk_ms": round(first_chunk_ms or 0, 1),
+            "responses": recorded,
+        })
+        cassette.save()
+
+
+def install_from_env():
+    """Registers ReplayLlm for Gemini models when ADK_LLM_BACKEND is "record" or "replay"."""
+    if BACKEND in ("record", "replay"):
+        LLMRegistry.register(ReplayLlm)
+        logger.info(f"REPLAY: {BACKEND} mode, cassette {CASSETTE_PATH}")
+
+
+# --- Importing request/response pairs from agent logs ---
+def _log_records(path):
+    """Yields (timestamp, logger_name, lines) per log record; continuation lines belong to the previous record."""
+    record = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            match = _LOG_RECORD_RE.match(line)
+            if match:
+                if record:
+                    yield record
+                stamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f").timestamp()
+                record = (stamp, match.group(3), [match.group(4)])
+            elif record:
+                record[2].append(line)
+    if record:
+        yield record
+
+
+def _sections(lines):
+    """Splits an "LLM Request:" / "LLM Response:" record into {title: body lines} at the rule lines."""
+    sections, title = {}, None
+    for line in lines:
+        if line == _SECTION_RULE:
+            title = None
+        elif title is None and line.endswith(":"):
+            title = line[:-1]
+            sections[title] = []
+        elif title is not None:
+            sections[title].append(line)
+    return sections
+
+
+def import_log(path, cassette: Cassette) -> int:
+    """Adds the google_llm request/response pairs logged in `path` to `cassette`. Returns the number added."""
+    pending, added = [], 0
+    # Instructions and conversation turns may be logged as blob references (logs/blob_store.py).
+    store = BlobStore(default_blob_dir(path))
+    for stamp, logger_name, lines in _log_records(path):
+        if not logger_name.endswith("google_llm"):
+            continue
+        lines = [rehydrate_text(line, store) for line in lines]
+        sending = _SENDING_RE.search(lines[0])
+        if sending:
+            pending.append({"ts": stamp, "model": sending.group(1).strip()})
+            continue
+        sections = _sections(lines)
+        if "System Instruction" in sections and pending:
+            system_instruction = "\n".join(sections["System Instruction"]).strip()
+            contents = [json.loads(line) for line in sections.get("Contents", []) if line.strip()]
+            pending[-1].update(
+                key=request_key(system_instruction, contents),
+                agent=agent_name(system_instruction),
+                turns=len(contents),
+            )
+        elif "Raw response" in sections and pending:
+            request = pending.pop(0)
+            raw = next((line for line in sections["Raw response"] if line.strip()), None)
+            if "key" not in request or raw is None:
+                continue
+            cassette.add({
+                "key": request["key"],
+                "agent": request["agent"],
+                "turns": request["turns"],
+                "model": request["model"],
+                "latency_ms": round((stamp - request["ts"]) * 1000, 1),
+                "raw": json.loads(raw),
+            })
+            added += 1
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage record/replay cassettes for the Gemini stand-in backend.")
+    parser.add_argument("--cassette", default=CASSETTE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="Import request/response pairs from agent log files.")
+    import_cmd.add_argument("paths", nargs="+")
+    commands.add_parser("show", help="List the recorded interactions.")
+
+    args = parser.parse_args(argv)
+    cassette = Cassette(args.cassette)
+    if args.command == "import":
+        for path in args.paths:
+            print(f"{path}: {import_log(path, cassette)} interactions")
+        cassette.save()
+        return 0
+    for interaction in cassette.interactions:
+        print(f"{interaction.get('agent') or '-':<28} turns={interaction.get('turns')!s:<3} "
+              f"{interaction.get('model') or '-':<28} {interaction.get('latency_ms')} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
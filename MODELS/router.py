@@ -0,0 +1,199 @@
+"""
+Per-call model routing between REASONING_MODEL and FLASH_MODEL.
+
+Agents keep their configured model; a before_model hook may swap it for a
+single call based on MODELS/routing_policy.json:
+
+- small follow-up turns (a short user message in an ongoing conversation) go
+  to the fast model;
+- once a session has used up its latency or token budget, calls go to the
+  fast model;
+- large inputs never go to the fast model, and a call whose input does not fit
+  the chosen model's input_token_limit (model_info.csv) moves to the model with
+  the largest context;
+- calls with Google Search grounding (the google_search tool) are never
+  rerouted, since the fast model does not support it.
+
+Session budgets are kept per root session (MODELS/call_context.py), so calls
+of sub-agents run through AgentTool count against the coordinator's session.
+
+Every decision that changes the model is logged as a ROUTE: line.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from . import FLASH_MODEL, REASONING_MODEL
+from .call_context import call_info
+from .catalog import get_model_info
+from .tokens import estimate_request_tokens, estimate_tokens, token_accounting
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("MODEL_ROUTER", "on").lower() not in ("0", "off", "false", "no")
+POLICY_PATH = os.getenv("MODEL_ROUTING_POLICY") or os.path.join(os.path.dirname(__file__), "routing_policy.json")
+
+_MODEL_CONSTANTS = {"REASONING_MODEL": REASONING_MODEL, "FLASH_MODEL": FLASH_MODEL}
+
+DEFAULT_POLICY = {
+    "enabled": True,
+    "models": {"reasoning": "REASONING_MODEL", "fast": "FLASH_MODEL"},
+    "pinned_agents": [],
+    "small_followup_max_tokens": 300,
+    "fast_max_input_tokens": 12000,
+    "output_token_reserve": 8192,
+    "session_latency_budget_s": 0,
+    "session_token_budget": 0,
+}
+
+
+def load_policy(path: str = POLICY_PATH) -> dict:
+    """Reads the routing policy; missing keys (or a missing file) fall back to DEFAULT_POLICY."""
+    policy = dict(DEFAULT_POLICY)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            policy.update(json.load(f))
+    # Model entries may name a MODELS constant instead of a model id.
+    policy["models"] = {tier: _MODEL_CONSTANTS.get(model, model) for tier, model in policy["models"].items()}
+    return policy
+
+
+def _input_limit(model):
+    info = get_model_info(model)
+    return info["input_token_limit"] if info and info.get("input_token_limit") else None
+
+
+class ModelRouter:
+    """Chooses the model for each call and tracks per-session LLM latency."""
+    def __init__(self, policy=None):
+        self.policy = policy if policy is not None else load_policy()
+        self._lock = threading.Lock()
+        self._started = {}
+        self._latency_s = {}
+        self._decisions = {}
+
+    def session_latency(self, session_id) -> float:
+        with self._lock:
+            return self._latency_s.get(session_id, 0.0)
+
+    def session_tokens(self, session_id) -> int:
+        return sum(t["prompt_tokens"] + t["output_tokens"] for t in token_accounting.totals(session_id).values())
+
+    def choose(self, agent_name, model, input_tokens, followup_tokens=None, session_id=None):
+        """
+        Returns (model, reason) for one call. `followup_tokens` is the size of the
+        latest user message when the call continues a conversation, else None.
+        """
+        policy = self.policy
+        fast, reasoning = policy["models"]["fast"], policy["models"]["reasoning"]
+        chosen, reason = model, "configured"
+        if agent_name in policy["pinned_agents"]:
+            return model, "pinned"
+        if model != fast and input_tokens <= policy["fast_max_input_tokens"]:
+            latency_budget = policy["session_latency_budget_s"]
+            token_budget = policy["session_token_budget"]
+            if followup_tokens is not None and followup_tokens <= policy["small_followup_max_tokens"]:
+                chosen, reason = fast, "small_followup"
+            elif latency_budget and session_id and self.session_latency(session_id) >= latency_budget:
+                chosen, reason = fast, "latency_budget"
+            elif token_budget and session_id and self.session_tokens(session_id) >= token_budget:
+                chosen, reason = fast, "token_budget"
+        needed = input_tokens + policy["output_token_reserve"]
+        limit = _input_limit(chosen)
+        if limit and needed > limit:
+            candidates = [m for m in dict.fromkeys((chosen, model, reasoning, fast)) if _input_limit(m)]
+            chosen = max(candidates, key=_input_limit)
+            reason = "context_limit"
+        return chosen, reason
+
+    def start(self, key):
+        with self._lock:
+            self._started[key] = time.perf_counter()
+
+    def finish(self, key, session_id):
+        with self._lock:
+            started = self._started.pop(key, None)
+            if started is not None:
+                self._latency_s[session_id] = self._latency_s.get(session_id, 0.0) + time.perf_counter() - started
+
+    def record(self, reason):
+        with self._lock:
+            self._decisions[reason] = self._decisions.get(reason, 0) + 1
+
+    def stats(self) -> dict:
+        """Returns {"decisions": {reason: count}, "session_latency_s": {session_id: seconds}}."""
+        with self._lock:
+            return {"decisions": dict(self._decisions), "session_latency_s": dict(self._latency_s)}
+
+
+router = ModelRouter()
+
+
+def followup_tokens(llm_request):
+    """
+    Size of the latest user message if it continues a conversation (an earlier
+    model turn exists and the message is plain text, not a tool result), else None.
+    """
+    contents = llm_request.contents or []
+    if len(contents) < 2 or contents[-1].role != "user":
+        return None
+    if not any(content.role == "model" for content in contents[:-1]):
+        return None
+    parts = contents[-1].parts or []
+    if not parts or any(part.function_response for part in parts):
+        return None
+    return estimate_tokens("".join(part.text or "" for part in parts), llm_request.model)
+
+
+def _call_key(callback_context):
+    return (callback_context.invocation_id, callback_context.agent_name)
+
+
+def _session_id(callback_context):
+    # Sub-agents called through AgentTool count against the budgets of the session that called them.
+    return call_info(callback_context).root_session_id
+
+
+def uses_google_search(llm_request) -> bool:
+    """
+    True if the request carries Google Search grounding (ADK's google_search tool
+    adds it to config.tools). The fast model cannot serve those requests.
+    """
+    tools = (llm_request.config.tools if llm_request.config else None) or []
+    if any(getattr(tool, "google_search", None) or getattr(tool, "google_search_retrieval", None) for tool in tools):
+        return True
+    return "google_search" in (llm_request.tools_dict or {})
+
+
+def route_before_model(callback_context, llm_request):
+    """before_model callback: picks the model for this call and starts its latency clock."""
+    if not ENABLED or not router.policy["enabled"] or not llm_request.model:
+        return None
+    session_id = _session_id(callback_context)
+    if uses_google_search(llm_request):
+        # Search-grounded calls keep their model; their latency still counts against the session.
+        router.record("google_search")
+        router.start(_call_key(callback_context))
+        return None
+    input_tokens = estimate_request_tokens(llm_request)
+    model, reason = router.choose(
+        callback_context.agent_name, llm_request.model, input_tokens, followup_tokens(llm_request), session_id
+    )
+    router.record(reason)
+    if model != llm_request.model:
+        logger.info(
+            f"ROUTE: {callback_context.agent_name} {llm_request.model} -> {model} "
+            f"({reason}, ~{input_tokens} input tokens, session {session_id})"
+        )
+        llm_request.model = model
+    router.start(_call_key(callback_context))
+    return None
+
+
+def route_after_model(callback_context, llm_response):
+    """after_model callback: adds the call's latency to the session's budget."""
+    if not llm_response.partial:
+        router.finish(_call_key(callback_context), _session_id(callback_context))
+    return None
@@ -0,0 +1,231 @@
+"""
+Token accounting for LLM calls.
+
+Reported usage (LlmResponse.usage_metadata) is the source of truth. Before a
+call, or when a response carries no usage, a local estimator is used instead:
+text is split into word and punctuation pieces (long words count as several
+tokens) and the raw count is scaled by a per-model factor learned from the
+usage Gemini reports. Raw counts are memoized, so the large, static system
+prompts are only scanned once.
+
+token_usage_after_model settles each call's usage once; the metrics, trace and
+instrumentation callbacks read it back with call_usage(), so logs, metrics and
+the token totals count the same tokens.
+"""
+import functools
+import re
+import threading
+
+from .call_context import call_info
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+# Average characters per sub-word token inside a long word.
+_CHARS_PER_SUBWORD = 4
+# Weight of a new observation in the per-model calibration factor.
+_CALIBRATION_ALPHA = 0.2
+# Settled usage of calls whose agent never made another LLM call is dropped beyond this.
+_MAX_SETTLED = 10000
+
+
+@functools.lru_cache(maxsize=2048)
+def _raw_count(text: str) -> int:
+    return sum(1 + (len(piece) - 1) // _CHARS_PER_SUBWORD for piece in _PIECE_RE.findall(text))
+
+
+class TokenEstimator:
+    """Local token estimator calibrated per model against reported usage."""
+    def __init__(self):
+        self._factors = {}
+        self._lock = threading.Lock()
+
+    def factor(self, model=None) -> float:
+        return self._factors.get(model, 1.0)
+
+    def estimate(self, text, model=None) -> int:
+        if not text:
+            return 0
+        return round(_raw_count(str(text)) * self.factor(model))
+
+    def raw(self, text) -> int:
+        return _raw_count(str(text)) if text else 0
+
+    def calibrate(self, model, raw_count, actual_tokens):
+        """Moves the model's factor towards actual/raw after a call with reported usage."""
+        if not model or not raw_count or not actual_tokens:
+            return
+        with self._lock:
+            observed = actual_tokens / raw_count
+            current = self._factors.get(model)
+            self._factors[model] = observed if current is None else current + _CALIBRATION_ALPHA * (observed - current)
+
+
+estimator = TokenEstimator()
+
+
+def estimate_tokens(text, model=None) -> int:
+    """Calibrated estimate of the number of tokens in `text` for `model`."""
+    return estimator.estimate(text, model)
+
+
+def request_text_pieces(llm_request):
+    """Yields the text sent with an LlmRequest: system instruction and every text part."""
+    system_instruction = getattr(llm_request.config, "system_instruction", None) if llm_request.config else None
+    if system_instruction:
+        yield str(system_instruction)
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                yield part.text
+
+
+def raw_request_tokens(llm_request) -> int:
+    return sum(estimator.raw(text) for text in request_text_pieces(llm_request))
+
+
+def estimate_request_tokens(llm_request) -> int:
+    """Calibrated input-token estimate for an LlmRequest."""
+    return round(raw_request_tokens(llm_request) * estimator.factor(llm_request.model))
+
+
+def usage_from_response(llm_response):
+    """
+    Returns the usage Gemini reported for a response as
+    {"prompt_tokens", "output_tokens", "cached_tokens", "total_tokens"}, or None.
+    Thinking tokens are billed as output and counted in output_tokens.
+    """
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is None or usage.prompt_token_count is None:
+        return None
+    output_tokens = (usage.candidates_token_count or 0) + (getattr(usage, "thoughts_token_count", None) or 0)
+    return {
+        "prompt_tokens": usage.prompt_token_count,
+        "output_tokens": output_tokens,
+        "cached_tokens": usage.cached_content_token_count or 0,
+        "total_tokens": usage.total_token_count or usage.prompt_token_count + output_tokens,
+        "estimated": False,
+    }
+
+
+def response_text(llm_response) -> str:
+    content = getattr(llm_response, "content", None)
+    return "".join(part.text or "" for part in (content.parts if content else None) or [])
+
+
+def estimated_usage(llm_response, model, prompt_tokens):
+    """Usage in the shape of usage_from_response for a response that reports none, flagged "estimated"."""
+    output_tokens = estimate_tokens(response_text(llm_response), model)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": 0,
+        "total_tokens": prompt_tokens + output_tokens,
+        "estimated": True,
+    }
+
+
+class TokenAccounting:
+    """
+    Running token totals per (session, agent, model), fed by the model callbacks.
+    Each entry records whether its numbers were reported by the model or estimated.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._settled = {}
+        self._totals = {}
+
+    def start(self, key, model, raw_count, estimate):
+        with self._lock:
+            self._pending[key] = (model, raw_count, estimate)
+            self._settled.pop(key, None)
+
+    def finish(self, key):
+        with self._lock:
+            return self._pending.pop(key, None)
+
+    def settle(self, key, usage):
+        """Keeps the usage booked for the latest call under `key` for the callbacks that run after."""
+        with self._lock:
+            if len(self._settled) >= _MAX_SETTLED:
+                self._settled.pop(next(iter(self._settled)))
+            self._settled[key] = usage
+
+    def settled(self, key):
+        with self._lock:
+            return self._settled.get(key)
+
+    def add(self, session_id, agent, model, prompt_tokens, output_tokens, reported):
+        with self._lock:
+            totals = self._totals.setdefault(
+                (session_id, agent, model),
+                {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "estimated_calls": 0},
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["output_tokens"] += output_tokens
+            if not reported:
+                totals["estimated_calls"] += 1
+
+    def totals(self, session_id=None):
+        """Returns {(session_id, agent, model): totals}, optionally for one session only."""
+        with self._lock:
+            return {
+                key: dict(value) for key, value in self._totals.items()
+                if session_id is None or key[0] == session_id
+            }
+
+
+token_accounting = TokenAccounting()
+
+
+def _call_key(callback_context):
+    return (callback_context.invocation_id, callback_context.agent_name)
+
+
+def _session_id(callback_context):
+    # Totals are kept per root session, so AgentTool sub-agent calls count against the calling session.
+    return call_info(callback_context).root_session_id
+
+
+def token_estimate_before_model(callback_context, llm_request):
+    """before_model callback: remembers the input estimate so it can be checked against reported usage."""
+    raw_count = raw_request_tokens(llm_request)
+    estimate = round(raw_count * estimator.factor(llm_request.model))
+    token_accounting.start(_call_key(callback_context), llm_request.model, raw_count, estimate)
+    return None
+
+
+def token_usage_after_model(callback_context, llm_response):
+    """
+    after_model callback: records reported usage (or the estimate when there is
+    none), recalibrates the estimator and corrects the rate limiter's TPM bucket.
+    """
+    if llm_response.partial:
+        return None
+    pending = token_accounting.finish(_call_key(callback_context))
+    if pending is None:
+        return None
+    model, raw_count, estimate = pending
+    usage = usage_from_response(llm_response)
+    if usage:
+        estimator.calibrate(model, raw_count, usage["prompt_tokens"])
+        from .rate_limiter import rate_limiter
+
+        rate_limiter.adjust(model, usage["prompt_tokens"] - estimate)
+    else:
+        usage = estimated_usage(llm_response, model, estimate)
+    token_accounting.settle(_call_key(callback_context), usage)
+    token_accounting.add(
+        _session_id(callback_context), callback_context.agent_name, model,
+        usage["prompt_tokens"], usage["output_tokens"], reported=not usage["estimated"],
+    )
+    return None
+
+
+def call_usage(callback_context, llm_response):
+    """
+    Usage of the call `llm_response` answers, as booked by token_usage_after_model
+    (reported, or estimated with "estimated": True). Falls back to the reported
+    usage, or None, when token accounting did not see the call.
+    """
+    return token_accounting.settled(_call_key(callback_context)) or usage_from_response(llm_response)
@@ -0,0 +1 @@
+# Benchmarks for the agent workflows; see benchmarks/run.py.
@@ -0,0 +1,82 @@
+"""
+Cold import/startup time of the agent packages.
+
+Every measurement runs in a fresh interpreter (no warm module cache), so it
+reflects what `adk web` and worker processes pay on start. For each target the
+median wall time over --repeat runs is reported, with the slowest modules from
+`python -X importtime` for the last run.
+
+Usage:
+    python -m benchmarks.import_time [--repeat 5] [--top 10] [--limit financial_advisor=50]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> statement timed in a fresh interpreter
+TARGETS = {
+    "financial_advisor": "import financial_advisor",
+    "financial_advisor.root_agent": "import financial_advisor; financial_advisor.root_agent",
+    "news_agent": "import news_agent",
+    "news_agent.root_agent": "import news_agent; news_agent.root_agent",
+    "MODELS.hooks": "import MODELS.hooks",
+}
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+_TIMER = "import time as _t; _s = _t.perf_counter(); {statement}; print((_t.perf_counter() - _s) * 1000)"
+
+
+def measure(statement):
+    """Runs `statement` in a fresh interpreter; returns (wall_ms, {module: cumulative_us})."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _TIMER.format(statement=statement)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the agent packages.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per target.")
+    parser.add_argument("--target", action="append", choices=sorted(TARGETS), help="Measure only these targets.")
+    parser.add_argument("--limit", action="append", default=[], metavar="TARGET=MS",
+                        help="Fail if the median time of TARGET exceeds MS milliseconds.")
+    args = parser.parse_args(argv)
+    limits = {name: float(ms) for name, ms in (limit.split("=", 1) for limit in args.limit)}
+
+    failures = []
+    for name in args.target or TARGETS:
+        try:
+            runs = [measure(TARGETS[name]) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(f"{name}: error: {e}")
+            failures.append(name)
+            continue
+        median_ms = statistics.median(ms for ms, _ in runs)
+        print(f"{name}: {median_ms:.1f} ms (median of {len(runs)})")
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[: args.top]
+        for module, cumulative_us in slowest:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {module}")
+        if name in limits and median_ms > limits[name]:
+            print(f"REGRESSION: {name} took {median_ms:.1f} ms, limit {limits[name]:.1f} ms")
+            failures.append(name)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+End-to-end benchmark of the agent workflows against the local replay backend.
+
+Each scenario in benchmarks/scenarios.json drives an agent's root_agent
+through a scripted conversation. Model calls are answered from
+benchmarks/cassettes/benchmark.json by MODELS/replay.py, using the recorded
+latency times --latency-scale, so runs are deterministic and offline. For
+every step the benchmark reports:
+- latency_ms: wall time of the turn (median over --repeat runs)
+- first_event_ms: time until the first event of the turn
+- llm_calls, prompt_tokens, output_tokens: from MODELS.tokens.token_accounting
+- tool_calls: tool invocations at any depth (sub-agents included)
+- peak_kb: peak Python memory allocated during the turn (tracemalloc)
+
+Results are compared with benchmarks/baseline.json; any metric above its
+tolerance, or a step missing from the baseline, is reported as a REGRESSION
+and the exit code is 1. Without a baseline file the exit code is 2.
+
+Usage:
+    python -m benchmarks.run [--scenario advisory_flow] [--repeat 3] [--json results.json]
+    python -m benchmarks.run --update-baseline
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+SCENARIOS_PATH = os.path.join(BENCHMARK_DIR, "scenarios.json")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+CASSETTE_PATH = os.path.join(BENCHMARK_DIR, "cassettes", "benchmark.json")
+
+# Allowed relative increase per metric before a step counts as a regression,
+# plus an absolute slack for the noisy ones.
+TOLERANCES = {
+    "latency_ms": (0.25, 25.0),
+    "first_event_ms": (0.25, 25.0),
+    "peak_kb": (0.25, 256.0),
+    "prompt_tokens": (0.05, 0),
+    "output_tokens": (0.05, 0),
+    "llm_calls": (0.0, 0),
+    "tool_calls": (0.0, 0),
+}
+
+
+def configure_environment(latency_scale):
+    """Points the agents at the replay backend. Must run before any agent module is imported."""
+    os.environ["ADK_LLM_BACKEND"] = "replay"
+    os.environ["ADK_REPLAY_CASSETTE"] = CASSETTE_PATH
+    os.environ["ADK_REPLAY_LATENCY"] = "recorded"
+    os.environ["ADK_REPLAY_LATENCY_SCALE"] = str(latency_scale)
+    # No quota applies to replayed calls, and cached answers would skip the work being measured.
+    os.environ["MODEL_RATE_LIMITS"] = "off"
+    os.environ["DATA_ANALYST_CACHE"] = "off"
+    os.environ["GEMINI_CONTEXT_CACHE"] = "off"
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+
+
+def load_agent(spec):
+    module_name, attribute = spec.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _token_totals():
+    from MODELS.tokens import token_accounting
+
+    totals = {"llm_calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+    for entry in token_accounting.totals().values():
+        totals["llm_calls"] += entry["calls"]
+        totals["prompt_tokens"] += entry["prompt_tokens"]
+        totals["output_tokens"] += entry["output_tokens"]
+    return totals
+
+
+_tool_calls = [0]
+
+
+def _count_tool_call(tool, args, tool_context):
+    _tool_calls[0] += 1
+    return None
+
+
+async def run_scenario(scenario, repeat):
+    """Runs one scenario `repeat` times; returns {step: metrics} with the median latency per step."""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    agent = load_agent(scenario["agent"])
+    runs = {step["name"]: [] for step in scenario["steps"]}
+    for _ in range(repeat):
+        session_service = InMemorySessionService()
+        runner = Runner(app_name="benchmarks", agent=agent, session_service=session_service)
+        session = await session_service.create_session(app_name="benchmarks", user_id="benchmark")
+        for step in scenario["steps"]:
+            content = types.Content(role="user", parts=[types.Part(text=step["message"])])
+            tokens_before, tool_calls_before = _token_totals(), _tool_calls[0]
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            first_event = None
+            async for _event in runner.run_async(user_id="benchmark", session_id=session.id, new_message=content):
+                if first_event is None:
+                    first_event = time.perf_counter()
+            elapsed = time.perf_counter() - start
+            tokens_after = _token_totals()
+            runs[step["name"]].append({
+                "latency_ms": elapsed * 1000,
+                "first_event_ms": ((first_event or time.perf_counter()) - start) * 1000,
+                "peak_kb": (tracemalloc.get_traced_memory()[1] - memory_before) / 1024,
+                "tool_calls": _tool_calls[0] - tool_calls_before,
+                **{key: tokens_after[key] - tokens_before[key] for key in tokens_after},
+            })
+    return {
+        step: {metric: round(statistics.median(run[metric] for run in step_runs), 1) for metric in step_runs[0]}
+        for step, step_runs in runs.items()
+    }
+
+
+def compare(results, baseline):
+    """Returns a list of regression messages, one per metric above its tolerance."""
+    regressions = []
+    for scenario, steps in results.items():
+        for step, metrics in steps.items():
+            expected = baseline.get(scenario, {}).get(step)
+            if expected is None:
+                regressions.append(f"{scenario}/{step}: no baseline; run with --update-baseline")
+                continue
+            for metric, value in metrics.items():
+                if metric not in expected:
+                    continue
+                relative, absolute = TOLERANCES.get(metric, (0.25, 0))
+                limit = expected[metric] * (1 + relative) + absolute
+                if value > limit:
+                    regressions.append(
+                        f"{scenario}/{step}: {metric} {value} > {round(limit, 1)} (baseline {expected[metric]})"
+                    )
+    return regressions
+
+
+def _format_results(results, baseline):
+    columns = ["scenario", "step", *TOLERANCES]
+    cells = []
+    for scenario, steps in results.items():
+        for step, metrics in steps.items():
+            expected = baseline.get(scenario, {}).get(step, {})
+            row = [scenario, step]
+            for metric in TOLERANCES:
+                value = metrics[metric]
+                if metric in expected and expected[metric]:
+                    row.append(f"{value} ({(value - expected[metric]) / expected[metric]:+.0%})")
+                else:
+                    row.append(str(value))
+            cells.append(row)
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agent workflows against recorded model responses.")
+    parser.add_argument("--scenario", action="append", help="Run only these scenarios (repeatable).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; latencies are medians.")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="Multiplier for the recorded model latency.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    configure_environment(args.latency_scale)
+    from MODELS.hooks import register_before_tool
+
+    register_before_tool(_count_tool_call)
+
+    with open(SCENARIOS_PATH, encoding="utf-8") as f:
+        scenarios = [s for s in json.load(f)["scenarios"] if not args.scenario or s["name"] in args.scenario]
+
+    tracemalloc.start()
+    results = {scenario["name"]: asyncio.run(run_scenario(scenario, max(1, args.repeat))) for scenario in scenarios}
+    tracemalloc.stop()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(_format_results(results, baseline))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create it.")
+        return 2
+
+    regressions = compare(results, baseline)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
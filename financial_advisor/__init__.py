@@ -14,5 +14,18 @@
 
 """Financial coordinator: provide reasonable investment strategies"""
 
-from . import agent
-from . import MODELS
+import importlib
+
+# The agent tree (and the google.adk stack behind it) is only built when
+# `agent` or `root_agent` is first accessed, e.g. by `adk web`, so importing
+# helpers such as financial_advisor.runner, .batch or .backtest stays cheap.
+# Each sub-agent is likewise built on first access of its package attribute.
+__all__ = ["agent", "root_agent"]
+
+
+def __getattr__(name):
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    if name == "root_agent":
+        return importlib.import_module(".agent", __name__).root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
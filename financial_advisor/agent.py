@@ -15,37 +15,26 @@
 """Financial coordinator: provide reasonable investment strategies"""
 
 from google.adk.agents import LlmAgent
+from google.adk.tools import FunctionTool
 from google.adk.tools.agent_tool import AgentTool
 import MODELS
+from MODELS.hooks import agent_callbacks
 from . import prompt
 from .sub_agents.data_analyst import data_analyst_agent
 from .sub_agents.execution_analyst import execution_analyst_agent
 from .sub_agents.risk_analyst import risk_analyst_agent
 from .sub_agents.trading_analyst import trading_analyst_agent
-from logs.logger import setup_logger, log_agent_event
+from .sub_agents import emit_event
+from .watchlist import analyze_watchlist_tool
+from logs.logger import setup_logger
+from logs.metrics import serve_from_env
 
 AGENT_NAME = "financial_advisor"
 logger = setup_logger(AGENT_NAME)
+# AGENT_METRICS_PORT=<port> serves the metrics on /metrics.
+serve_from_env()
 
-import datetime
-import time
-
-def get_time_str():
-    return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-
-def emit_event(event_type, subagent_name, details=None, **kwargs):
-    """
-    Emit a structured ADK-style event.
-    """
-    event = {
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        "event_type": event_type,
-        "subagent": subagent_name,
-        "details": details or {},
-    }
-    if kwargs:
-        event["details"].update(kwargs)
-    logger.info(f"ADK_EVENT: {event}")
+import os
 
 def log_subagent_call(subagent_name, **kwargs):
     emit_event("subagent_call", subagent_name, {"args": kwargs})
@@ -55,14 +44,35 @@ def log_event(event, subagent_name="financial_coordinator", **kwargs):
 
 def log_request(request, subagent_name="financial_coordinator", **kwargs):
     emit_event("request", subagent_name, {"message": request, **kwargs})
-    logger.info(f"REQUEST: {request}")
 
 def log_response(response, subagent_name="financial_coordinator", **kwargs):
     emit_event("response", subagent_name, {"message": response, **kwargs})
-    logger.info(f"RESPONSE: {response}")
 
 MODEL = MODELS.REASONING_MODEL
 
+# "tool": sub-agents are AgentTools; the coordinator receives their output and presents it.
+# "transfer": the coordinator transfers control to each sub-agent, whose answer streams
+# straight to the client and is not regenerated by the coordinator.
+SUB_AGENT_MODE = os.getenv("FINANCIAL_ADVISOR_SUB_AGENT_MODE", "tool").lower()
+
+SUB_AGENTS = [data_analyst_agent, trading_analyst_agent, execution_analyst_agent, risk_analyst_agent]
+
+if SUB_AGENT_MODE == "transfer":
+    for sub_agent in SUB_AGENTS:
+        # Each sub-agent answers one step and hands the next user turn back to the coordinator.
+        sub_agent.disallow_transfer_to_parent = True
+        sub_agent.disallow_transfer_to_peers = True
+    sub_agent_kwargs = {
+        "instruction": prompt.FINANCIAL_COORDINATOR_PROMPT + prompt.TRANSFER_MODE_ADDENDUM,
+        "sub_agents": SUB_AGENTS,
+        "tools": [FunctionTool(analyze_watchlist_tool)],
+    }
+else:
+    sub_agent_kwargs = {
+        "instruction": prompt.FINANCIAL_COORDINATOR_PROMPT,
+        "tools": [AgentTool(agent=sub_agent) for sub_agent in SUB_AGENTS] + [FunctionTool(analyze_watchlist_tool)],
+    }
+
 
 financial_coordinator = LlmAgent(
     name="financial_coordinator",
@@ -73,74 +83,9 @@ financial_coordinator = LlmAgent(
         "analyze a market ticker, develop trading strategies, define "
         "execution plans, and evaluate the overall risk."
     ),
-    instruction=prompt.FINANCIAL_COORDINATOR_PROMPT,
     output_key="financial_coordinator_output",
-    tools=[
-        AgentTool(agent=data_analyst_agent),
-        AgentTool(agent=trading_analyst_agent),
-        AgentTool(agent=execution_analyst_agent),
-        AgentTool(agent=risk_analyst_agent),
-    ],
+    **sub_agent_kwargs,
+    **agent_callbacks(log=logger),
 )
 
 root_agent = financial_coordinator
-
-def agent_call_with_logging(agent, input_prompt, **kwargs):
-    """
-    Wraps an agent call, logs all required fields before and after execution.
-    """
-    model = getattr(agent, "model", "unknown")
-    model_capabilities = getattr(agent, "capabilities", "unknown")
-    agent_name = getattr(agent, "name", "unknown")
-    tool_used = getattr(agent, "tools", None)
-    if tool_used:
-        tool_used = [getattr(t, "name", str(t)) for t in tool_used]
-    else:
-        tool_used = []
-    time_stamp_input = get_time_str()
-    token_input = len(input_prompt.split()) if isinstance(input_prompt, str) else None
-
-    # Log input event
-    log_agent_event(
-        logger,
-        event_type="agent_call_input",
-        agent=agent_name,
-        model=model,
-        model_capabilities=model_capabilities,
-        tool_used=tool_used,
-        input_prompt=input_prompt,
-        output=None,
-        output_type=None,
-        time_stamp_input=time_stamp_input,
-        time_stamp_output=None,
-        token_input=token_input,
-        token_output=None,
-        context_files=kwargs.get("context_files"),
-        extra=None,
-    )
-
-    # Call the agent
-    output = agent(input_prompt, **kwargs) if callable(agent) else None
-    time_stamp_output = get_time_str()
-    output_type = type(output).__name__
-    token_output = len(str(output).split()) if output else None
-
-    # Log output event
-    log_agent_event(
-        logger,
-        event_type="agent_call_output",
-        agent=agent_name,
-        model=model,
-        model_capabilities=model_capabilities,
-        tool_used=tool_used,
-        input_prompt=input_prompt,
-        output=output,
-        output_type=output_type,
-        time_stamp_input=time_stamp_input,
-        time_stamp_output=time_stamp_output,
-        token_input=token_input,
-        token_output=token_output,
-        context_files=kwargs.get("context_files"),
-        extra=None,
-    )
-    return output
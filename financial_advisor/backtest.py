@@ -0,0 +1,326 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Backtests of rule-based strategies over cached OHLCV history, with parallel parameter sweeps"""
+
+import asyncio
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from news_agent.tools.indicators import aligned_frames, bollinger, ema, macd, rsi, sma
+from news_agent.tools.yfinance_tool import _store
+
+# Sweeps with fewer runs than this are computed in-process; larger ones are split across a process pool.
+PARALLEL_MIN_RUNS = int(os.getenv("BACKTEST_PARALLEL_MIN_RUNS", "16"))
+MAX_WORKERS = int(os.getenv("BACKTEST_MAX_WORKERS") or os.cpu_count() or 1)
+MAX_RUNS = int(os.getenv("BACKTEST_MAX_RUNS", "500"))
+DEFAULT_COST_BPS = float(os.getenv("BACKTEST_COST_BPS", "5"))
+
+_pool = None
+
+
+# --- Strategies ---
+# Each strategy maps {field: (bars x symbols) DataFrame} to positions (1 long, 0 flat) decided on a bar's close.
+def buy_and_hold(frames):
+    return frames["Close"].notna().astype(float)
+
+
+def sma_crossover(frames, fast=20, slow=50):
+    if fast >= slow:
+        raise ValueError("fast must be shorter than slow")
+    close = frames["Close"]
+    return (sma(close, int(fast)) > sma(close, int(slow))).astype(float)
+
+
+def ema_crossover(frames, fast=12, slow=26):
+    if fast >= slow:
+        raise ValueError("fast must be shorter than slow")
+    close = frames["Close"]
+    return (ema(close, int(fast)) > ema(close, int(slow))).astype(float)
+
+
+def macd_trend(frames, fast=12, slow=26, signal=9):
+    if fast >= slow:
+        raise ValueError("fast must be shorter than slow")
+    _, _, histogram = macd(frames["Close"], int(fast), int(slow), int(signal))
+    return (histogram > 0).astype(float)
+
+
+def momentum(frames, lookback=126):
+    close = frames["Close"]
+    return (close / close.shift(int(lookback)) > 1).astype(float)
+
+
+def _hold(entries, exits):
+    """Long from an entry bar until the next exit bar."""
+    signal = pd.DataFrame(np.nan, index=entries.index, columns=entries.columns)
+    signal = signal.mask(exits, 0.0).mask(entries, 1.0)
+    return signal.ffill().fillna(0.0)
+
+
+def rsi_reversion(frames, window=14, lower=30, upper=70):
+    if lower >= upper:
+        raise ValueError("lower must be below upper")
+    strength = rsi(frames["Close"], int(window))
+    return _hold(strength < lower, strength > upper)
+
+
+def bollinger_reversion(frames, window=20, num_std=2.0):
+    close = frames["Close"]
+    _, middle, lower = bollinger(close, int(window), float(num_std))
+    return _hold(close < lower, close > middle)
+
+
+def breakout(frames, entry_window=55, exit_window=20):
+    close = frames["Close"]
+    entry_level = frames["High"].rolling(int(entry_window), min_periods=int(entry_window)).max().shift(1)
+    exit_level = frames["Low"].rolling(int(exit_window), min_periods=int(exit_window)).min().shift(1)
+    return _hold(close > entry_level, close < exit_level)
+
+
+STRATEGIES = {
+    "buy_and_hold": buy_and_hold,
+    "sma_crossover": sma_crossover,
+    "ema_crossover": ema_crossover,
+    "macd_trend": macd_trend,
+    "momentum": momentum,
+    "rsi_reversion": rsi_reversion,
+    "bollinger_reversion": bollinger_reversion,
+    "breakout": breakout,
+}
+
+
+# --- Simulation ---
+def simulate(frames, positions, cost_bps=DEFAULT_COST_BPS):
+    """
+    Per-bar strategy returns: a position decided on a bar's close earns the
+    next bar's close-to-close return, less `cost_bps` per unit of turnover.
+    Bars before a symbol's history starts are NaN.
+    """
+    close = frames["Close"]
+    returns = close.pct_change(fill_method=None)
+    held = positions.shift(1).fillna(0.0)
+    turnover = held.diff().abs().fillna(held.abs())
+    return (held * returns - turnover * cost_bps / 10_000).where(returns.notna())
+
+
+def performance(strategy_returns, positions, years):
+    """
+    Stats per symbol (column) of per-bar strategy returns: total return, CAGR,
+    annualized volatility and Sharpe ratio (no risk-free rate), max drawdown,
+    exposure and number of entries. `years` maps symbols to the span of their
+    history; bars per year are derived from it, so 24/7 markets annualize correctly.
+    Exposure and entries count the positions actually held over each bar.
+    """
+    valid = strategy_returns.notna()
+    bars = valid.sum()
+    equity = (1 + strategy_returns.fillna(0.0)).cumprod()
+    drawdown = equity / equity.cummax() - 1
+    years = pd.Series(years).reindex(strategy_returns.columns)
+    bars_per_year = bars / years
+    mean, std = strategy_returns.mean(), strategy_returns.std()
+    final = equity.iloc[-1]
+    held = positions.shift(1).where(valid)
+    stats = pd.DataFrame({
+        "total_return_pct": 100 * (final - 1),
+        "cagr_pct": 100 * (final ** (1 / years) - 1),
+        "volatility_pct": 100 * std * np.sqrt(bars_per_year),
+        "sharpe": mean / std * np.sqrt(bars_per_year),
+        "max_drawdown_pct": 100 * drawdown.min(),
+        "exposure_pct": 100 * held.mean(),
+        "trades": ((held > 0) & ~(held.shift(1) > 0) & valid).sum(),
+    })
+    return {
+        symbol: {key: _number(value, 0 if key == "trades" else 2) for key, value in row.items()}
+        for symbol, row in stats.iterrows()
+    }
+
+
+def _number(value, digits):
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    return int(value) if digits == 0 else round(value, digits)
+
+
+def run_backtests(frames, years, strategy, combos, cost_bps=DEFAULT_COST_BPS):
+    """
+    Runs `strategy` once per parameter dict in `combos` on all symbols at once.
+    Returns [(params, {symbol: stats} or {"error": ...})]. Top-level so it can run in a worker process.
+    """
+    function = STRATEGIES[strategy]
+    results = []
+    for params in combos:
+        try:
+            positions = function(frames, **params)
+        except (TypeError, ValueError) as e:
+            results.append((params, {"error": str(e)}))
+            continue
+        results.append((params, performance(simulate(frames, positions, cost_bps), positions, years)))
+    return results
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        # Spawned workers only import this module and its numeric dependencies, never the agent tree.
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _reset_executor():
+    """Drops a broken pool (a worker died), so the next sweep starts a fresh one."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def sweep(frames, years, strategy, combos, cost_bps=DEFAULT_COST_BPS):
+    """Runs all combos, in chunks across the process pool when there are at least PARALLEL_MIN_RUNS of them."""
+    if len(combos) < PARALLEL_MIN_RUNS or MAX_WORKERS < 2:
+        return await asyncio.to_thread(run_backtests, frames, years, strategy, combos, cost_bps)
+    loop = asyncio.get_running_loop()
+    chunk_size = math.ceil(len(combos) / MAX_WORKERS)
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+    try:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(_executor(), run_backtests, frames, years, strategy, chunk, cost_bps) for chunk in chunks
+        ))
+    except BrokenProcessPool:
+        _reset_executor()
+        raise
+    return [result for chunk in results for result in chunk]
+
+
+# --- Tool ---
+def _parse_value(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError(f"Parameter values must be numbers, got {text!r}") from None
+    return int(value) if value.is_integer() else value
+
+
+def parse_grid(params):
+    """
+    Parses "fast=10,20; slow=50,100" into [{"fast": 10, "slow": 50}, ...] (every
+    combination). An empty string gives one run with the strategy's defaults.
+    """
+    grid = {}
+    for item in filter(None, (part.strip() for part in (params or "").split(";"))):
+        name, sep, values = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Expected name=value[,value...], got {item!r}")
+        grid[name.strip()] = [_parse_value(value.strip()) for value in values.split(",") if value.strip()]
+        if not grid[name.strip()]:
+            raise ValueError(f"No values given for {name.strip()!r}")
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def _years(records):
+    if len(records) < 2:
+        return np.nan
+    time_key = "Datetime" if "Datetime" in records[0] else "Date"
+    start, end = pd.Timestamp(records[0][time_key]), pd.Timestamp(records[-1][time_key])
+    return (end - start).total_seconds() / (365.25 * 86400) or np.nan
+
+
+async def backtest_strategy(
+    tickers: str, strategy: str, params: str = "", period: str = "5y", interval: str = "1d", cost_bps: float = DEFAULT_COST_BPS
+) -> dict:
+    """
+    Backtests a rule-based trading strategy on historical prices, optionally sweeping its parameters.
+    Use it to check proposed strategies against data; buy-and-hold is reported alongside as the benchmark.
+    Args:
+        tickers (str): One symbol or a comma-separated list (e.g. "AAPL" or "AAPL,MSFT").
+        strategy (str): One of sma_crossover (fast, slow), ema_crossover (fast, slow), macd_trend (fast, slow, signal),
+            momentum (lookback), rsi_reversion (window, lower, upper), bollinger_reversion (window, num_std),
+            breakout (entry_window, exit_window) or buy_and_hold.
+        params (str): Parameters as "name=value" separated by ";", with several comma-separated values to sweep
+            every combination (e.g. "fast=10,20,50; slow=100,200"). Empty uses the defaults.
+        period (str): History to test on (e.g. "2y", "5y", "max").
+        interval (str): Bar interval (e.g. "1d", "1wk").
+        cost_bps (float): Trading cost per unit of turnover, in basis points.
+    Returns:
+        dict: {"status": "success", "runs", "results": {symbol: {"benchmark", "best", "top"}}} with CAGR, Sharpe,
+        max drawdown, volatility, exposure and trade count per run, or {"status": "error", "message": ...}.
+    """
+    start = time.perf_counter()
+    symbols = list(dict.fromkeys(s.strip().upper() for s in tickers.split(",") if s.strip()))
+    if not symbols:
+        return {"status": "error", "message": "No ticker provided."}
+    if strategy not in STRATEGIES:
+        return {"status": "error", "message": f"Unknown strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}."}
+    try:
+        combos = parse_grid(params)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    if len(combos) > MAX_RUNS:
+        return {"status": "error", "message": f"{len(combos)} parameter combinations exceed the limit of {MAX_RUNS}."}
+    try:
+        histories = await asyncio.to_thread(_store.history_many, symbols, period=period, interval=interval)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    missing = [symbol for symbol in symbols if len(histories.get(symbol) or []) < 2]
+    histories = {symbol: histories[symbol] for symbol in symbols if symbol not in missing}
+    if not histories:
+        return {"status": "error", "message": f"No price history for {', '.join(missing)}."}
+
+    frames = aligned_frames(histories)
+    years = {symbol: _years(records) for symbol, records in histories.items()}
+    try:
+        runs = await sweep(frames, years, strategy, combos, cost_bps)
+    except BrokenProcessPool:
+        return {"status": "error", "message": "A backtest worker process died; please retry."}
+    except Exception as e:
+        return {"status": "error", "message": f"Backtest failed: {e}"}
+    errors = sorted({stats["error"] for _, stats in runs if "error" in stats})
+    if all("error" in stats for _, stats in runs):
+        return {"status": "error", "message": "; ".join(errors)}
+    benchmark = dict(run_backtests(frames, years, "buy_and_hold", [{}], cost_bps)[0][1])
+
+    results = {symbol: {"error": "No price history."} for symbol in missing}
+    for symbol in histories:
+        ranked = [
+            {"params": run_params, **stats[symbol]}
+            for run_params, stats in runs if "error" not in stats
+        ]
+        ranked.sort(key=lambda run: -math.inf if run["sharpe"] is None else run["sharpe"], reverse=True)
+        results[symbol] = {
+            "bars": len(histories[symbol]),
+            "benchmark": benchmark[symbol],
+            "best": ranked[0] if ranked else None,
+            "top": ranked[1:3] if len(ranked) > 1 else [],
+        }
+    return {
+        "status": "success",
+        "strategy": strategy,
+        "period": period,
+        "interval": interval,
+        "cost_bps": cost_bps,
+        "runs": len(runs),
+        "skipped_runs": sum("error" in stats for _, stats in runs),
+        "errors": errors or None,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "results": {symbol: results[symbol] for symbol in symbols},
+    }
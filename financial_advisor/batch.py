@@ -0,0 +1,281 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Headless batch runner for the data -> trading -> execution -> risk workflow.
+
+Reads a CSV with the columns ticker, risk_attitude, investment_period and
+(optionally) execution_preferences, and runs the four sub-agents for every
+row, at most --concurrency rows at a time. Each finished step is written to a
+SQLite checkpoint store together with the state it produced, so re-running
+the same run id resumes every row after its last completed step.
+
+Usage:
+    python -m financial_advisor.batch run rows.csv [--run-id nightly-2025-06-13] [--output results.jsonl]
+    python -m financial_advisor.batch status --run-id nightly-2025-06-13
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from logs.metrics import serve_from_env
+
+from .runner import run_agent_once
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+CHECKPOINT_PATH = os.getenv(
+    "BATCH_CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "batch_checkpoints.sqlite"),
+)
+
+COLUMNS = ("ticker", "risk_attitude", "investment_period", "execution_preferences")
+
+
+def _profile(row):
+    return (
+        f"user_risk_attitude: {row['risk_attitude']}\n"
+        f"user_investment_period: {row['investment_period']}\n"
+        f"user_execution_preferences: {row['execution_preferences'] or 'none stated'}"
+    )
+
+
+# (step, sub-agent package, output_key, message builder) in workflow order.
+STEPS = (
+    ("data", "data_analyst", "market_data_analysis_output",
+     lambda row: f"provided_ticker: {row['ticker']}"),
+    ("trading", "trading_analyst", "proposed_trading_strategies_output",
+     lambda row: f"Ticker: {row['ticker']}\n{_profile(row)}"),
+    ("execution", "execution_analyst", "execution_plan_output",
+     lambda row: (
+         f"Ticker: {row['ticker']}\n"
+         "provided_trading_strategy: the proposed trading strategy best aligned with the user's risk "
+         f"attitude and investment period.\n{_profile(row)}"
+     )),
+    ("risk", "risk_analyst", "final_risk_assessment_output",
+     lambda row: f"Ticker: {row['ticker']}\n{_profile(row)}"),
+)
+STEP_NAMES = [step for step, *_ in STEPS]
+
+
+def _load_agent(package):
+    """The sub-agent of financial_advisor/sub_agents/<package>, built on first use."""
+    return getattr(importlib.import_module(f".sub_agents.{package}", __package__), f"{package}_agent")
+
+
+def read_rows(path):
+    """Reads the batch CSV into a list of dicts with the COLUMNS keys; rows without a ticker are skipped."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {"ticker", "risk_attitude", "investment_period"} - {c.strip() for c in reader.fieldnames or ()}
+        if missing:
+            raise ValueError(f"{path} is missing the column(s): {', '.join(sorted(missing))}")
+        rows = []
+        for raw in reader:
+            row = {column: (raw.get(column) or "").strip() for column in COLUMNS}
+            if row["ticker"]:
+                row["ticker"] = row["ticker"].upper()
+                rows.append(row)
+    return rows
+
+
+def row_key(row) -> str:
+    return "|".join(row[column] for column in COLUMNS)
+
+
+class CheckpointStore:
+    """
+    SQLite store of completed workflow steps, keyed by (run_id, row_key, step).
+    Each step keeps its output text and the state keys it added, which is all a
+    later step (or a resumed run) needs.
+    """
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS steps ("
+                " run_id TEXT, row_key TEXT, step TEXT, output TEXT, state TEXT, elapsed_s REAL, finished_at REAL,"
+                " PRIMARY KEY (run_id, row_key, step))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                " run_id TEXT, row_key TEXT, row TEXT, status TEXT, error TEXT, updated_at REAL,"
+                " PRIMARY KEY (run_id, row_key))"
+            )
+        return self._conn
+
+    def completed_steps(self, run_id, key) -> dict:
+        """Returns {step: {"output", "state"}} for the steps of a row that already finished."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT step, output, state FROM steps WHERE run_id = ? AND row_key = ?", (run_id, key)
+            ).fetchall()
+        return {step: {"output": output, "state": json.loads(state)} for step, output, state in rows}
+
+    def save_step(self, run_id, key, step, output, state, elapsed_s):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, key, step, output, json.dumps(state, default=str), elapsed_s, time.time()),
+            )
+            conn.commit()
+
+    def set_status(self, run_id, key, row, status, error=None):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (run_id, row_key) DO UPDATE"
+                " SET status = excluded.status, error = excluded.error, updated_at = excluded.updated_at",
+                (run_id, key, json.dumps(row), status, error, time.time()),
+            )
+            conn.commit()
+
+    def results(self, run_id) -> list:
+        """Returns one dict per row of the run: the row, its status and error, and the output of each finished step."""
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT row_key, row, status, error FROM rows WHERE run_id = ? ORDER BY rowid", (run_id,)
+            ).fetchall()
+            steps = conn.execute("SELECT row_key, step, output FROM steps WHERE run_id = ?", (run_id,)).fetchall()
+        outputs = {}
+        for key, step, output in steps:
+            outputs.setdefault(key, {})[step] = output
+        return [
+            {**json.loads(row), "status": status, "error": error, "outputs": outputs.get(key, {})}
+            for key, row, status, error in rows
+        ]
+
+
+async def run_row(row, run_id, store):
+    """Runs the remaining steps of one row, checkpointing after each. Returns the row's final status."""
+    key = row_key(row)
+    done = store.completed_steps(run_id, key)
+    state = {}
+    for step in STEP_NAMES:
+        if step in done:
+            state.update(done[step]["state"])
+    store.set_status(run_id, key, row, "running")
+    for step, package, output_key, message in STEPS:
+        if step in done:
+            continue
+        start = time.perf_counter()
+        try:
+            text, final_state = await run_agent_once(_load_agent(package), message(row), state=state)
+        except Exception as e:
+            logger.warning(f"BATCH: {row['ticker']} failed at step {step}: {e}")
+            store.set_status(run_id, key, row, "error", f"{step}: {e}")
+            return "error"
+        elapsed_s = round(time.perf_counter() - start, 3)
+        # Keep only what this step added or changed (its output key and digest).
+        added = {k: v for k, v in final_state.items() if state.get(k) != v}
+        state.update(added)
+        store.save_step(run_id, key, step, final_state.get(output_key) or text, added, elapsed_s)
+        logger.info(f"BATCH: {row['ticker']} finished step {step} in {elapsed_s}s")
+    store.set_status(run_id, key, row, "done")
+    return "done"
+
+
+async def run_batch(rows, run_id, store=None, max_concurrency=None):
+    """
+    Runs the workflow for every row with a pool of `max_concurrency` workers.
+    Returns {"done": n, "error": n}.
+    """
+    store = store or CheckpointStore()
+    queue = asyncio.Queue()
+    for row in {row_key(row): row for row in rows}.values():
+        queue.put_nowait(row)
+    counts = {"done": 0, "error": 0}
+
+    async def worker():
+        while True:
+            try:
+                row = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            counts[await run_row(row, run_id, store)] += 1
+
+    await asyncio.gather(*(worker() for _ in range(max(1, max_concurrency or DEFAULT_MAX_CONCURRENCY))))
+    return counts
+
+
+def default_run_id(csv_path) -> str:
+    """
+    Rows CSV name plus a hash of its content, so re-running an unchanged file
+    resumes its run on any day, and an edited file starts a new one.
+    """
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    with open(csv_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    return f"{stem}-{digest}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the financial advisor workflow over a CSV of tickers.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Path of the SQLite checkpoint store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run (or resume) a batch.")
+    run.add_argument("csv", help="CSV with ticker, risk_attitude, investment_period[, execution_preferences].")
+    run.add_argument("--run-id", help="Checkpoint namespace; defaults to <csv name>-<hash of its content>.")
+    run.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    run.add_argument("--output", help="Write one JSON line per row with all step outputs.")
+
+    status = commands.add_parser("status", help="Show per-row progress of a run.")
+    status.add_argument("--run-id", required=True)
+
+    args = parser.parse_args(argv)
+    store = CheckpointStore(args.checkpoint)
+
+    if args.command == "run":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        serve_from_env()
+        run_id = args.run_id or default_run_id(args.csv)
+        rows = read_rows(args.csv)
+        print(f"Run {run_id}: {len(rows)} rows, concurrency {args.concurrency}")
+        counts = asyncio.run(run_batch(rows, run_id, store, args.concurrency))
+        print(f"Run {run_id}: {counts['done']} done, {counts['error']} failed")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                for result in store.results(run_id):
+                    f.write(json.dumps(result) + "\n")
+        return 1 if counts["error"] else 0
+
+    for result in store.results(args.run_id):
+        steps = ",".join(step for step in STEP_NAMES if step in result["outputs"]) or "-"
+        error = f"  {result['error']}" if result["error"] else ""
+        print(f"{result['ticker']:<8} {result['risk_attitude']:<14} {result['status']:<8} {steps}{error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""State compaction: bounded digests of sub-agent outputs for downstream agents"""
+
+import logging
+import os
+import re
+
+from google.adk.tools import ToolContext
+from google.genai import types
+
+from MODELS.call_context import call_info
+
+logger = logging.getLogger(__name__)
+
+DIGEST_MAX_CHARS = int(os.getenv("STATE_DIGEST_MAX_CHARS", "1500"))
+DIGEST_SUFFIX = "_digest"
+
+# State keys whose full text downstream agents may load on request.
+FULL_STATE_KEYS = (
+    "market_data_analysis_output",
+    "watchlist_market_data_analysis_output",
+    "proposed_trading_strategies_output",
+    "execution_plan_output",
+)
+
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+.+|\*\*[^*]+\*\*:?|[IVX]+\.\s+.+|\d+\.\s+\*\*.+|[A-Z][^.!?]{0,80}:)\s*$")
+
+
+def digest_key(key: str) -> str:
+    return key + DIGEST_SUFFIX
+
+
+def _clean(line: str) -> str:
+    return re.sub(r"[#*_`>]+", "", line).strip(" -:\t")
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cuts `text` to `limit` chars, at the last sentence end when there is one in the second half."""
+    if len(text) <= limit:
+        return text
+    cut = text[: max(0, limit - 3)]
+    end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    return cut[: end + 1] if end >= limit // 2 else cut.rstrip() + "..."
+
+
+def digest_text(text: str, max_chars: int = DIGEST_MAX_CHARS) -> str:
+    """
+    Reduces a markdown report to one line per section - the heading followed by
+    the leading text of the section - with the budget shared evenly between
+    sections, so every section of the report is represented.
+    """
+    text = str(text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    sections = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if _HEADING_RE.match(line) or not sections:
+            sections.append([_clean(line), []] if _HEADING_RE.match(line) else ["", [_clean(line)]])
+        else:
+            sections[-1][1].append(_clean(line))
+    lines = [": ".join(part for part in (heading, " ".join(body)) if part) for heading, body in sections]
+    lines = [line for line in lines if line]
+    # If even one short line per section does not fit, the trailing sections are dropped.
+    per_line = max(40, max_chars // max(1, len(lines)) - 3)
+    digest, used = [], 0
+    for line in lines:
+        line = "- " + _truncate(line, per_line)
+        if used + len(line) + 1 > max_chars:
+            break
+        digest.append(line)
+        used += len(line) + 1
+    return "\n".join(digest)
+
+
+def make_digest(key: str, value, max_chars: int = DIGEST_MAX_CHARS) -> str:
+    """
+    Bounded digest of a state value. Dicts (e.g. the watchlist analyses keyed by
+    ticker) get an equal share of the budget per entry.
+    """
+    header = f"[{key}: digest of {len(str(value))} chars; call load_full_state(\"{key}\") for the full text]"
+    budget = max(0, max_chars - len(header) - 1)
+    if isinstance(value, dict):
+        share = budget // max(1, len(value))
+        body = "\n".join(f"{name}:\n{digest_text(item, max(0, share - len(str(name)) - 2))}" for name, item in value.items())
+    else:
+        body = digest_text(value, budget)
+    return f"{header}\n{body}"
+
+
+def compact_state(state, key: str, max_chars: int = DIGEST_MAX_CHARS):
+    """Writes the digest of state[key] to state[key + "_digest"]. Returns the digest, or None if the key is empty."""
+    value = state.get(key)
+    if not value:
+        return None
+    digest = make_digest(key, value, max_chars)
+    state[digest_key(key)] = digest
+    logger.info(f"STATE_DIGEST: {key} {len(str(value))} -> {len(digest)} chars")
+    return digest
+
+
+def compact_output_after_agent(callback_context):
+    """after_agent callback: compacts the state key the agent just wrote through its output_key."""
+    output_key = getattr(call_info(callback_context).agent, "output_key", None)
+    if output_key:
+        compact_state(callback_context.state, output_key)
+    return None
+
+
+def inject_digests(*keys):
+    """
+    Returns a before_model callback that puts the digests of `keys` in front of
+    the conversation, so the agent works from the digest by default. The system
+    instruction stays unchanged and therefore cacheable.
+    """
+    def inject_digests_before_model(callback_context, llm_request):
+        digests = [callback_context.state.get(digest_key(key)) for key in keys]
+        digests = [digest for digest in digests if digest]
+        if digests:
+            llm_request.contents.insert(0, types.Content(role="user", parts=[types.Part(text="\n\n".join(digests))]))
+        return None
+
+    return inject_digests_before_model
+
+
+def load_full_state(state_key: str, tool_context: ToolContext) -> dict:
+    """
+    Loads the full text of an earlier step's output when its digest lacks the detail you need.
+    Args:
+        state_key (str): One of market_data_analysis_output, watchlist_market_data_analysis_output,
+            proposed_trading_strategies_output or execution_plan_output.
+    Returns:
+        dict: {"status": "success", "state_key": ..., "value": full text} or {"status": "error", "message": ...}.
+    """
+    state_key = state_key.strip()
+    if state_key.endswith(DIGEST_SUFFIX):
+        state_key = state_key[: -len(DIGEST_SUFFIX)]
+    if state_key not in FULL_STATE_KEYS:
+        return {"status": "error", "message": f"Unknown state key {state_key!r}; expected one of {', '.join(FULL_STATE_KEYS)}."}
+    value = tool_context.state.get(state_key)
+    if not value:
+        return {"status": "error", "message": f"{state_key} is not available yet."}
+    return {"status": "success", "state_key": state_key, "value": value}
@@ -64,13 +64,20 @@ Input: Prompt the user to provide the market ticker symbol they wish to analyze
 Action: Call the data_analyst subagent, passing the user-provided market ticker.
 Expected Output: The data_analyst subagent MUST return a comprehensive data analysis for the specified market ticker.
 
+Watchlist mode: If the user provides more than one ticker (a watchlist), do NOT call data_analyst once per ticker.
+Instead call the analyze_watchlist_tool tool once, passing all tickers as a list. It analyzes the tickers in parallel and
+stores the results in the watchlist_market_data_analysis_output state key, keyed by ticker. It returns the status of
+every ticker and a digest of the analyses; summarize the digest for the user.
+Report any failed tickers to the user and offer to retry them.
+
 * Develop Trading Strategies (Subagent: trading_analyst)
 
 Input:
 Prompt the user to define their risk attitude (e.g., conservative, moderate, aggressive).
 Prompt the user to specify their investment period (e.g., short-term, medium-term, long-term).
 Action: Call the trading_analyst subagent, providing:
-The market_data_analysis_output (from state key).
+The market_data_analysis_output (from state key), or watchlist_market_data_analysis_output in watchlist mode.
+This reaches the subagent automatically as a digest (market_data_analysis_output_digest); do NOT paste the analysis into the request.
 The user-selected risk attitude.
 The user-selected investment period.
 Expected Output: The trading_analyst subagent MUST generate one or more potential trading strategies tailored to the provided market analysis,
@@ -86,7 +93,8 @@ The user's investment period (previously provided).
 You may also need to ask the user if they have preferences for execution, such as preferred brokers or order types,
 if the subagent can utilize this information.
 Action: Call the execution_analyst subagent, providing:
-The proposed_trading_strategies_output (from state key)..
+The proposed_trading_strategies_output (from state key). It reaches the subagent automatically as a digest;
+do NOT paste the strategies into the request, only name the strategy (or strategies) the user selected.
 The user's risk attitude.
 The user's investment period.
 (Optional: User's execution preferences).
@@ -98,14 +106,27 @@ Output the generated extended version by visualizing the results as markdown
 * Evaluate Overall Risk Profile (Subagent: risk_analyst)
 
 Input:
-The market_data_analysis_output (from state key).
+The market_data_analysis_output (from state key), or watchlist_market_data_analysis_output in watchlist mode.
 The proposed_trading_strategies_output (from state key).
 The execution_plan_output (from state key).
 The user's stated risk attitude.
 The user's stated investment period.
 Action: Call the risk_analyst subagent, providing all the listed inputs.
+The state key outputs reach the subagent automatically as digests; do NOT paste them into the request,
+only pass the user's risk attitude, investment period and any execution preferences.
 Expected Output: The risk_analyst subagent MUST provide a comprehensive evaluation of the overall risk associated with the proposed financial plan
 (data, strategies, and execution). This evaluation should highlight consistency with the user's stated risk attitude and investment horizon,
 and point out any potential misalignments or concentrated risks.
 Output the generated extended version by visualizing the results as markdown
 """
+
+TRANSFER_MODE_ADDENDUM = """
+Sub-agent mode: transfer.
+In this mode the subagents are not tools. To "call" a subagent, transfer control to it with the transfer_to_agent function,
+using its agent name: data_analyst_agent, trading_analyst_agent, execution_analyst_agent or risk_analyst_agent.
+Before transferring, tell the user in one short sentence which subagent is next and which inputs it will use
+(ticker, risk attitude, investment period, execution preferences), since the subagent reads them from the conversation.
+The subagent's answer is streamed to the user directly as it is generated and is stored in its state key.
+Do NOT repeat, summarize or re-render a subagent's output as markdown afterwards; when the user returns to you,
+continue with the next step of the process.
+"""
@@ -0,0 +1,89 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers for running an agent headlessly, outside of `adk web`."""
+
+import uuid
+
+APP_NAME = "financial_advisor"
+
+
+async def _start_session(agent, message, state, user_id, session_service):
+    # The runner stack is imported on first use, so importing the agents does not pay for it.
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    session_service = session_service or InMemorySessionService()
+    runner = Runner(app_name=APP_NAME, agent=agent, session_service=session_service)
+    session = await session_service.create_session(
+        app_name=APP_NAME,
+        user_id=user_id,
+        session_id=uuid.uuid4().hex,
+        state=dict(state or {}),
+    )
+    content = types.Content(role="user", parts=[types.Part(text=message)])
+    return session_service, runner, session, content
+
+
+async def run_agent_once(agent, message, *, state=None, user_id="headless", session_service=None):
+    """
+    Runs `agent` for a single user turn in a fresh session.
+    - agent: Any ADK agent (LlmAgent, Agent, ...).
+    - message: The user text sent to the agent.
+    - state: Optional initial session state (e.g. outputs of earlier steps).
+    - session_service: Optional session service; a private in-memory one is used by default.
+    Returns a tuple (final_text, final_state).
+    """
+    session_service, runner, session, content = await _start_session(agent, message, state, user_id, session_service)
+
+    final_text = ""
+    async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=content):
+        if event.content and event.content.parts:
+            text = "".join(part.text for part in event.content.parts if part.text)
+            if text:
+                final_text = text
+
+    session = await session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+    return final_text, dict(session.state)
+
+
+async def stream_agent_once(agent, message, *, state=None, user_id="headless", session_service=None):
+    """
+    Streaming variant of run_agent_once(): runs one user turn with server-sent
+    events and yields (author, text) for every text chunk as it is generated.
+    With FINANCIAL_ADVISOR_SUB_AGENT_MODE=transfer this includes the sub-agents'
+    output, which otherwise only reaches the client once the coordinator responds.
+    """
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+
+    session_service, runner, session, content = await _start_session(agent, message, state, user_id, session_service)
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+    streamed = False
+    async for event in runner.run_async(
+        user_id=user_id, session_id=session.id, new_message=content, run_config=run_config
+    ):
+        if not event.content or not event.content.parts:
+            continue
+        text = "".join(part.text for part in event.content.parts if part.text)
+        # With SSE the final, aggregated event repeats the streamed chunks. It is only
+        # yielded when nothing was streamed, e.g. for a response served from a cache.
+        if event.partial:
+            streamed = True
+        elif streamed:
+            streamed = False
+            continue
+        if text:
+            yield event.author, text
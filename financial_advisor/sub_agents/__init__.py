@@ -5,6 +5,7 @@
 
 # If this file might be the first point of import for logging for sub-agents,
 # consider adding the sys.path modification here too, or ensure it's done by a higher-level entry point.
+import functools
 import sys
 import os
 PROJECT_ROOT_GUESS = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -13,27 +14,36 @@ PROJECT_ROOT_GUESS = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dir
 if PROJECT_ROOT_GUESS not in sys.path:
     sys.path.insert(0, PROJECT_ROOT_GUESS)
 
+from logs.events import EVENT_SINKS, EventBus, build_sinks
 from logs.logger import setup_logger, log_agent_event
 
 AGENT_NAME = "financial_advisor"
 
-subagent_general_logger = setup_logger(AGENT_NAME, include_stream_handler=False)
 
-import datetime
+# The logger and the event bus are set up on first use, not on import.
+@functools.lru_cache(maxsize=None)
+def get_subagent_logger():
+    return setup_logger(AGENT_NAME, include_stream_handler=False)
+
+
+@functools.lru_cache(maxsize=None)
+def get_event_bus():
+    # One bus for the coordinator and all sub-agents (AGENT_EVENT_SINKS: file, queue, metrics).
+    return EventBus(build_sinks(EVENT_SINKS, get_subagent_logger()))
+
+
+def __getattr__(name):
+    if name == "subagent_general_logger":
+        return get_subagent_logger()
+    if name == "event_bus":
+        return get_event_bus()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def emit_event(event_type, subagent_name, details=None, **kwargs):
     """
-    Emit a structured ADK-style event.
+    Emit a structured ADK-style event on the event bus.
     """
-    event = {
-        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
-        "event_type": event_type,
-        "subagent": subagent_name,
-        "details": details or {},
-    }
-    if kwargs:
-        event["details"].update(kwargs)
-    subagent_general_logger.info(f"ADK_EVENT: {event}")
+    get_event_bus().publish(event_type, subagent_name, details, **kwargs)
 
 def log_subagent_activity(subagent_name, message: str, **kwargs):
     emit_event("subagent_activity", subagent_name, {"message": message, **kwargs})
@@ -43,11 +53,9 @@ def log_event(event_message, subagent_name="unknown", **kwargs):
 
 def log_request(request_message, subagent_name="unknown", **kwargs):
     emit_event("request", subagent_name, {"message": request_message, **kwargs})
-    subagent_general_logger.info(f"REQUEST: {request_message}")
 
 def log_response(response_message, subagent_name="unknown", **kwargs):
     emit_event("response", subagent_name, {"message": response_message, **kwargs})
-    subagent_general_logger.info(f"RESPONSE: {response_message}")
 
 def log_agent_call_event(
     event_type,
@@ -69,7 +77,7 @@ def log_agent_call_event(
     Log agent call event for sub-agents.
     """
     log_agent_event(
-        subagent_general_logger,
+        get_subagent_logger(),
         event_type=event_type,
         agent=agent,
         model=model,
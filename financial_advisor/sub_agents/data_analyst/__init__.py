@@ -14,4 +14,13 @@
 
 """data_analyst_agent for finding information using google search"""
 
-from .agent import data_analyst_agent
+import importlib
+
+# Built on first access, so importing e.g. .prompt or .cache does not build the agent.
+__all__ = ["data_analyst_agent"]
+
+
+def __getattr__(name):
+    if name == "data_analyst_agent":
+        return importlib.import_module(".agent", __name__).data_analyst_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -17,10 +17,12 @@
 from google.adk import Agent
 from google.adk.tools import google_search
 import MODELS
+from MODELS.hooks import agent_callbacks
 
 from . import prompt
-from .. import log_agent_call_event
-import datetime
+from .cache import cached_analysis_before_model, store_analysis_after_model
+from ...compaction import compact_output_after_agent
+from .. import subagent_general_logger
 
 MODEL = MODELS.REASONING_MODEL
 
@@ -30,55 +32,10 @@ data_analyst_agent = Agent(
     instruction=prompt.DATA_ANALYST_PROMPT,
     output_key="market_data_analysis_output",
     tools=[google_search],
+    **agent_callbacks(
+        after_agent=[compact_output_after_agent],
+        before_model=[cached_analysis_before_model],
+        after_model=[store_analysis_after_model],
+        log=subagent_general_logger,
+    ),
 )
-
-def get_time_str():
-    return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-
-def call_data_analyst_agent(input_prompt, **kwargs):
-    model = MODEL
-    model_capabilities = "search"
-    agent_name = "data_analyst_agent"
-    tool_used = ["google_search"]
-    time_stamp_input = get_time_str()
-    token_input = len(input_prompt.split()) if isinstance(input_prompt, str) else None
-
-    log_agent_call_event(
-        event_type="agent_call_input",
-        agent=agent_name,
-        model=model,
-        model_capabilities=model_capabilities,
-        tool_used=tool_used,
-        input_prompt=input_prompt,
-        output=None,
-        output_type=None,
-        time_stamp_input=time_stamp_input,
-        time_stamp_output=None,
-        token_input=token_input,
-        token_output=None,
-        context_files=kwargs.get("context_files"),
-        extra=None,
-    )
-
-    output = data_analyst_agent(input_prompt, **kwargs)
-    time_stamp_output = get_time_str()
-    output_type = type(output).__name__
-    token_output = len(str(output).split()) if output else None
-
-    log_agent_call_event(
-        event_type="agent_call_output",
-        agent=agent_name,
-        model=model,
-        model_capabilities=model_capabilities,
-        tool_used=tool_used,
-        input_prompt=input_prompt,
-        output=output,
-        output_type=output_type,
-        time_stamp_input=time_stamp_input,
-        time_stamp_output=time_stamp_output,
-        token_input=token_input,
-        token_output=token_output,
-        context_files=kwargs.get("context_files"),
-        extra=None,
-    )
-    return output
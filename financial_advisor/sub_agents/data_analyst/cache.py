@@ -0,0 +1,210 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent TTL/LRU cache of data_analyst_agent outputs"""
+
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from zoneinfo import ZoneInfo
+
+from google.adk.models import LlmResponse
+from google.genai import types
+from logs.metrics import observe_cache
+
+from . import prompt
+
+CACHE_ENABLED = os.getenv("DATA_ANALYST_CACHE", "on").lower() not in ("0", "off", "false", "no")
+CACHE_TTL_SECONDS = int(os.getenv("DATA_ANALYST_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("DATA_ANALYST_CACHE_MAX_ENTRIES", "500"))
+CACHE_PATH = os.getenv(
+    "DATA_ANALYST_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache", "data_analyst.sqlite"),
+)
+
+# Changing the prompt changes the analysis, so it invalidates every cached entry.
+PROMPT_VERSION = hashlib.sha256(prompt.DATA_ANALYST_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+MARKET_TZ = ZoneInfo("America/New_York")
+
+# Upper-case words that look like tickers in a request but are not.
+_NOT_TICKERS = {
+    "A", "I", "AI", "AN", "AND", "AT", "CEO", "CFO", "ETF", "EPS", "FOR", "GDP", "IPO", "IS",
+    "IT", "OF", "ON", "OR", "PE", "SEC", "THE", "TO", "US", "USA", "USD", "YOY",
+}
+_TICKER_RE = re.compile(r"\$?\b([A-Z]{1,5}(?:[.-][A-Z]{1,4}|=[A-Z])?)\b")
+_PROVIDED_TICKER_RE = re.compile(r"provided_ticker\W+\$?([A-Za-z0-9.=\-^]+)")
+
+
+def normalize_ticker(ticker: str) -> str:
+    return ticker.strip().lstrip("$").upper()
+
+
+def extract_ticker(text: str):
+    """
+    Returns the single ticker a data analyst request is about, or None when
+    there is none or more than one (ambiguous requests are never cached).
+    """
+    if not text:
+        return None
+    match = _PROVIDED_TICKER_RE.search(text)
+    if match:
+        return normalize_ticker(match.group(1))
+    candidates = {m.group(1) for m in _TICKER_RE.finditer(text)} - _NOT_TICKERS
+    return normalize_ticker(candidates.pop()) if len(candidates) == 1 else None
+
+
+def request_hash(text: str) -> str:
+    """
+    Hash of a request with case, whitespace and punctuation normalized, so
+    "Analyze AAPL." and "analyze  aapl" share an entry but a question about
+    AAPL's dividends does not reuse a general AAPL analysis.
+    """
+    words = re.findall(r"[a-z0-9.=^-]+", (text or "").lower().replace("$", ""))
+    normalized = " ".join(word.strip(".") for word in words if word.strip("."))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def market_session(now=None) -> str:
+    """
+    Identifies the US market session an analysis belongs to, e.g. "2025-06-13:regular".
+    Weekends map to the preceding Friday's post-market session.
+    """
+    now = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(MARKET_TZ)
+    day = now.date()
+    if day.weekday() >= 5:
+        day -= datetime.timedelta(days=day.weekday() - 4)
+        return f"{day.isoformat()}:post"
+    minutes = now.hour * 60 + now.minute
+    if minutes < 9 * 60 + 30:
+        session = "pre"
+    elif minutes < 16 * 60:
+        session = "regular"
+    else:
+        session = "post"
+    return f"{day.isoformat()}:{session}"
+
+
+class AnalysisCache:
+    """
+    SQLite-backed cache keyed by (ticker, request hash, prompt version, market session).
+    Entries expire after `ttl_seconds`; beyond `max_entries` the least recently
+    used entries are evicted.
+    """
+    def __init__(self, path=CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                " key TEXT PRIMARY KEY, ticker TEXT, output TEXT,"
+                " created_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_lru ON analysis (last_access)")
+        return self._conn
+
+    @staticmethod
+    def make_key(ticker, request="", now=None):
+        return f"{normalize_ticker(ticker)}|{request_hash(request)}|{PROMPT_VERSION}|{market_session(now)}"
+
+    def get(self, ticker, request="", now=None):
+        """Returns the cached analysis of `request` about `ticker` in the current session, or None."""
+        output = self._lookup(self.make_key(ticker, request, now))
+        observe_cache("data_analyst", hit=output is not None)
+        return output
+
+    def _lookup(self, key):
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT output, created_at FROM analysis WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            output, created_at = row
+            if time.time() - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM analysis WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE analysis SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            return output
+
+    def put(self, ticker, output, request="", now=None):
+        key = self.make_key(ticker, request, now)
+        with self._lock:
+            conn = self._connection()
+            stamp = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis (key, ticker, output, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_ticker(ticker), output, stamp, stamp),
+            )
+            conn.execute("DELETE FROM analysis WHERE created_at < ?", (stamp - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM analysis WHERE key IN ("
+                " SELECT key FROM analysis ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM analysis")
+            self._conn.commit()
+
+
+analysis_cache = AnalysisCache()
+
+
+def _user_text(callback_context):
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text or "" for part in content.parts)
+
+
+def cached_analysis_before_model(callback_context, llm_request):
+    """before_model callback: answers from the cache and skips the LLM round-trip on a hit."""
+    if not CACHE_ENABLED:
+        return None
+    request = _user_text(callback_context)
+    ticker = extract_ticker(request)
+    output = analysis_cache.get(ticker, request) if ticker else None
+    if output is None:
+        return None
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=output)]))
+
+
+def store_analysis_after_model(callback_context, llm_response):
+    """after_model callback: caches the final (non-partial, text-only) analysis."""
+    if not CACHE_ENABLED or llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+    parts = llm_response.content.parts
+    if any(part.function_call for part in parts):
+        return None
+    text = "".join(part.text or "" for part in parts)
+    request = _user_text(callback_context)
+    ticker = extract_ticker(request)
+    if ticker and text.strip():
+        analysis_cache.put(ticker, text, request)
+    return None
@@ -14,4 +14,13 @@
 
 """Execution_analyst_agent for finding the ideal execution strategy"""
 
-from .agent import execution_analyst_agent
+import importlib
+
+# Built on first access, so importing e.g. .prompt does not build the agent.
+__all__ = ["execution_analyst_agent"]
+
+
+def __getattr__(name):
+    if name == "execution_analyst_agent":
+        return importlib.import_module(".agent", __name__).execution_analyst_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
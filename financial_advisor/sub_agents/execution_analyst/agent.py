@@ -15,7 +15,11 @@
 """Execution_analyst_agent for finding the ideal execution strategy"""
 
 from google.adk import Agent
+from google.adk.tools import FunctionTool
 import MODELS
+from MODELS.hooks import agent_callbacks
+from ...compaction import compact_output_after_agent, inject_digests, load_full_state
+from .. import subagent_general_logger
 from . import prompt
 
 MODEL = MODELS.FLASH_MODEL
@@ -25,4 +29,10 @@ execution_analyst_agent = Agent(
     name="execution_analyst_agent",
     instruction=prompt.EXECUTION_ANALYST_PROMPT,
     output_key="execution_plan_output",
+    tools=[FunctionTool(load_full_state)],
+    **agent_callbacks(
+        after_agent=[compact_output_after_agent],
+        before_model=[inject_digests("proposed_trading_strategies_output")],
+        log=subagent_general_logger,
+    ),
 )
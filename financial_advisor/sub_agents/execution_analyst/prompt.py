@@ -36,6 +36,10 @@ and sensitivity to short-term market noise versus longer-term trends.
 user_execution_preferences: (User-defined, e.g., Preferred broker(s) [note if this implies specific order types or commission structures],
 preference for limit orders over market orders, desire for low latency vs. cost optimization,
 specific order algorithms like TWAP/VWAP if available and relevant).
+* Earlier step outputs: The outputs of earlier steps are provided at the start of the conversation as bounded digests
+(state keys ending in _digest), not as full text. Work from the digests by default. If a digest lacks a detail
+you need, call the load_full_state tool with the state key named in the digest header to retrieve the full text.
+
 Requested Output: Detailed Execution Strategy Analysis
 
 Provide a comprehensive analysis structured as follows. For each section, deliver detailed reasoning,
@@ -14,4 +14,13 @@
 
 """Risk Analysis Agent for providing the final risk evaluation"""
 
-from .agent import risk_analyst_agent
+import importlib
+
+# Built on first access, so importing e.g. .prompt does not build the agent.
+__all__ = ["risk_analyst_agent"]
+
+
+def __getattr__(name):
+    if name == "risk_analyst_agent":
+        return importlib.import_module(".agent", __name__).risk_analyst_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
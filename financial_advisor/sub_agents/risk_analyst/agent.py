@@ -15,7 +15,11 @@
 """Risk Analysis Agent for providing the final risk evaluation"""
 
 from google.adk import Agent
+from google.adk.tools import FunctionTool
 import MODELS
+from MODELS.hooks import agent_callbacks
+from ...compaction import inject_digests, load_full_state
+from .. import subagent_general_logger
 
 from . import prompt
 
@@ -26,4 +30,16 @@ risk_analyst_agent = Agent(
     name="risk_analyst_agent",
     instruction=prompt.RISK_ANALYST_PROMPT,
     output_key="final_risk_assessment_output",
+    tools=[FunctionTool(load_full_state)],
+    **agent_callbacks(
+        before_model=[
+            inject_digests(
+                "market_data_analysis_output",
+                "watchlist_market_data_analysis_output",
+                "proposed_trading_strategies_output",
+                "execution_plan_output",
+            )
+        ],
+        log=subagent_general_logger,
+    ),
 )
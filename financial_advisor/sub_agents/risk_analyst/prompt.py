@@ -36,6 +36,10 @@ Long-term (months to years)). This impacts timeframe relevance, review frequency
 user_execution_preferences: User-defined preferences regarding execution (e.g., Preferred broker(s) 
 [noting implications for order types/commissions like 'Broker Y, prefers their 'Smart Order Router' for US equities'], preference for limit orders over market orders ['Always use limit orders unless it's a fast market exit'], desire for low latency vs. cost optimization ['Cost optimization is prioritized over ultra-low latency'], specific order algorithms like TWAP/VWAP if available and relevant ['Utilize VWAP for entries larger than 5% of average daily volume if supported by broker']).
 
+* Earlier step outputs: The outputs of earlier steps are provided at the start of the conversation as bounded digests
+(state keys ending in _digest), not as full text. Work from the digests by default. If a digest lacks a detail
+you need, call the load_full_state tool with the state key named in the digest header to retrieve the full text.
+
 * Requested Output Structure: Comprehensive Risk Analysis Report
 
 The analysis must cover, but is not limited to, the following sections. Ensure each section directly references and integrates 
@@ -14,4 +14,13 @@
 
 """trading_analyst_agent for proposing trading strategies"""
 
-from .agent import trading_analyst_agent
+import importlib
+
+# Built on first access, so importing e.g. .prompt does not build the agent.
+__all__ = ["trading_analyst_agent"]
+
+
+def __getattr__(name):
+    if name == "trading_analyst_agent":
+        return importlib.import_module(".agent", __name__).trading_analyst_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
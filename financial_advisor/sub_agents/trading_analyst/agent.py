@@ -15,7 +15,12 @@
 """Execution_analyst_agent for finding the ideal execution strategy"""
 
 from google.adk import Agent
+from google.adk.tools import FunctionTool
 import MODELS
+from MODELS.hooks import agent_callbacks
+from ...backtest import backtest_strategy
+from ...compaction import compact_output_after_agent, inject_digests, load_full_state
+from .. import subagent_general_logger
 
 from . import prompt
 
@@ -26,4 +31,10 @@ trading_analyst_agent = Agent(
     name="trading_analyst_agent",
     instruction=prompt.TRADING_ANALYST_PROMPT,
     output_key="proposed_trading_strategies_output",
+    tools=[FunctionTool(load_full_state), FunctionTool(backtest_strategy)],
+    **agent_callbacks(
+        after_agent=[compact_output_after_agent],
+        before_model=[inject_digests("market_data_analysis_output", "watchlist_market_data_analysis_output")],
+        log=subagent_general_logger,
+    ),
 )
@@ -39,9 +39,14 @@ Storage: The user's response will be captured and used as user_investment_period
 Market Analysis Data (from state):
 
 * Required State Key: market_data_analysis_output.
+* Digest: The analysis is provided at the start of the conversation as market_data_analysis_output_digest (or
+watchlist_market_data_analysis_output_digest). Work from the digest by default; call the load_full_state tool with
+"market_data_analysis_output" (or "watchlist_market_data_analysis_output") only when the digest lacks a detail you need.
+* Watchlist mode: If the watchlist_market_data_analysis_output state key is present instead, it maps each ticker to its
+market data analysis. Treat it as the market_data_analysis_output and generate the strategies per ticker.
 Action: The trading_analyst subagent MUST attempt to retrieve the analysis data from the market_data_analysis_output state key.
 Critical Prerequisite Check & Error Handling:
-Condition: If the market_data_analysis_output state key is empty, null, or otherwise indicates that the data is not available.
+Condition: If neither the digest nor the market_data_analysis_output state key is available, or it is empty, null, or otherwise indicates that the data is not available.
 Action:
 Halt the current trading strategy generation process immediately.
 Raise an exception or signal an error internally.
@@ -66,6 +71,11 @@ higher potential reward scenarios (with commensurate risk).
 ** Time Horizon Suitability: Matching strategy mechanics to the investment period (e.g., long-term value investing vs. short-term swing trading).
 ** Scenario Diversity: Aim to cover a range of potential market outlooks if supported by the analysis 
 (e.g., strategies for bullish, bearish, or neutral/range-bound conditions).
+** Backtest Check: For every strategy with a rule-based core (moving-average or EMA crossovers, MACD trend, momentum,
+RSI or Bollinger mean reversion, breakouts), call the backtest_strategy tool on the ticker(s) over a period that matches
+the user_investment_period, sweeping the key parameters in one call (e.g. params "fast=10,20,50; slow=100,200").
+Compare the best run with the buy-and-hold benchmark, use the results to choose parameters and to drop or rework
+strategies that do not hold up, and quote CAGR, Sharpe ratio and max drawdown. Past performance does not guarantee future results.
 
 * Expected Output (from trading_analyst):
 
@@ -86,6 +96,8 @@ particularly relevant to this strategy (e.g., "P/E ratio below industry average,
 "Entry upon a pullback to the 50-day moving average if broader market sentiment is positive").
 ** potential_exit_conditions_or_targets: General conditions for taking profits or cutting losses 
 (e.g., "Target a 20% return or re-evaluate if price drops 10% below entry," "Exit if fundamental conditions A or B deteriorate").
+** backtest_summary: For backtested strategies, the tested rule and parameters, period, CAGR, Sharpe ratio and max drawdown
+next to the buy-and-hold benchmark; otherwise "not backtested" with the reason.
 ** primary_risks_specific_to_this_strategy: Key risks specifically associated with this strategy, 
 beyond general market risks (e.g., "High sector concentration risk," "Earnings announcement volatility," 
 "Risk of rapid sentiment shift for momentum stocks").
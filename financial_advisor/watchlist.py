@@ -0,0 +1,110 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Watchlist mode: run the data-analysis step for many tickers concurrently"""
+
+import asyncio
+import os
+import re
+import time
+
+from google.adk.tools import ToolContext
+
+from .compaction import compact_state
+from .runner import run_agent_once
+
+# State key holding {ticker: market_data_analysis_output} for a whole watchlist.
+WATCHLIST_STATE_KEY = "watchlist_market_data_analysis_output"
+ANALYSIS_OUTPUT_KEY = "market_data_analysis_output"
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("WATCHLIST_MAX_CONCURRENCY", "4"))
+
+
+def normalize_tickers(tickers):
+    """
+    Accepts a list of tickers or a comma/space separated string and returns
+    upper-cased, de-duplicated tickers in their original order.
+    """
+    if isinstance(tickers, str):
+        tickers = re.split(r"[,\s]+", tickers)
+    seen = []
+    for ticker in tickers or []:
+        ticker = str(ticker).strip().upper()
+        if ticker and ticker not in seen:
+            seen.append(ticker)
+    return seen
+
+
+async def analyze_watchlist(tickers, max_concurrency=None, agent=None):
+    """
+    Runs `data_analyst_agent` for every ticker, at most `max_concurrency` at a time.
+    Returns {ticker: {"status": ..., "analysis" | "message": ..., "elapsed_s": ...}}
+    in the order the tickers were given.
+    """
+    if agent is None:
+        from .sub_agents.data_analyst import data_analyst_agent as agent
+    tickers = normalize_tickers(tickers)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or DEFAULT_MAX_CONCURRENCY))
+
+    async def _analyze(ticker):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                text, state = await run_agent_once(agent, f"provided_ticker: {ticker}")
+                result = {"status": "success", "analysis": state.get(ANALYSIS_OUTPUT_KEY) or text}
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+            result["elapsed_s"] = round(time.perf_counter() - start, 3)
+            return ticker, result
+
+    results = await asyncio.gather(*(_analyze(ticker) for ticker in tickers))
+    return dict(results)
+
+
+async def analyze_watchlist_tool(tickers: list[str], tool_context: ToolContext) -> dict:
+    """
+    Generates a market data analysis for every ticker in a watchlist in parallel.
+    Use this instead of data_analyst_agent when the user provides more than one ticker.
+    Args:
+        tickers (list[str]): The ticker symbols to analyze (e.g. ["AAPL", "MSFT"]).
+    Returns:
+        dict: Per-ticker status and a digest of the analyses. The full analyses are merged
+        into the watchlist_market_data_analysis_output state key.
+    """
+    tickers = normalize_tickers(tickers)
+    if not tickers:
+        return {"status": "error", "message": "No ticker provided."}
+    results = await analyze_watchlist(tickers)
+
+    merged = dict(tool_context.state.get(WATCHLIST_STATE_KEY) or {})
+    merged.update({ticker: r["analysis"] for ticker, r in results.items() if r["status"] == "success"})
+    tool_context.state[WATCHLIST_STATE_KEY] = merged
+    digest = compact_state(tool_context.state, WATCHLIST_STATE_KEY)
+
+    # The full analyses stay in state; returning them would put every one into the coordinator's context.
+    failed = [ticker for ticker, r in results.items() if r["status"] != "success"]
+    return {
+        "status": "error" if failed and len(failed) == len(results) else "success",
+        "state_key": WATCHLIST_STATE_KEY,
+        "failed_tickers": failed,
+        "results": {
+            ticker: {
+                "status": r["status"],
+                "elapsed_s": r["elapsed_s"],
+                **({"analysis_chars": len(r["analysis"])} if r["status"] == "success" else {"message": r["message"]}),
+            }
+            for ticker, r in results.items()
+        },
+        "digest": digest,
+    }
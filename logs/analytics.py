@@ -0,0 +1,349 @@
+"""
+Streaming log indexer and report CLI for agent performance.
+
+Ingests agent log files (including gzipped rotated segments) incrementally:
+each file's read offset is remembered in a SQLite index, so only new lines
+are parsed and finished segments are never rescanned. Parsed calls are stored
+keyed by agent, model, session and time.
+
+Recognized records:
+- google_adk "Sending out request" / "LLM Response" pairs -> per-LLM-call latency and token usage
+- JSON lines written by log_agent_event -> agent run, LLM call and tool call
+  latency and token counts
+- "ADK_EVENT: {...}" lines (JSON, or a dict repr in older logs) and the older
+  "REQUEST: ...", "RESPONSE: ..." lines -> call counts
+- ERROR lines -> error rates
+
+Usage:
+    python -m logs.analytics ingest [LOG_FILE ...]
+    python -m logs.analytics report --since 7d --by agent [--agent risk_analyst_agent]
+"""
+import argparse
+import ast
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX = os.getenv("AGENT_LOG_INDEX", os.path.join(PROJECT_ROOT, "logs", "log_index.sqlite"))
+# Live logs and their rotated segments (<file>.log.<time>[.gz]).
+DEFAULT_LOG_GLOBS = tuple(os.path.join(PROJECT_ROOT, "*", "logs", pattern) for pattern in ("*.log", "*.log.*"))
+# Files next to the logs that are not logs: rotation open-time sidecars and blob temp files.
+_NOT_LOG_SUFFIXES = (".opened", ".tmp")
+
+_RECORD_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (\w+) - (.+?) - (.*)$")
+_SENDING_RE = re.compile(r"Sending out request, model: ([^,]+)")
+_AGENT_NAME_RE = re.compile(r'Your internal name is "([^"]+)"')
+_SINCE_RE = re.compile(r"^(\d+)([mhdw])$")
+_HEAD_BYTES = 4096
+# log_agent_event types that are indexed as calls (logs/instrumentation.py), and their kind
+_EVENT_KINDS = {"agent_call_output": "agent_call", "llm_call": "llm_call", "tool_call": "tool"}
+
+
+def _parse_time(stamp):
+    return datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S,%f").timestamp()
+
+
+def _parse_iso(stamp):
+    if not stamp:
+        return None
+    try:
+        return datetime.fromisoformat(stamp.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _usage(raw):
+    """Extracts (prompt_tokens, output_tokens) from a raw Gemini response dict."""
+    usage = raw.get("usage_metadata") or raw.get("usageMetadata") or {}
+    return (
+        usage.get("prompt_token_count", usage.get("promptTokenCount")),
+        usage.get("candidates_token_count", usage.get("candidatesTokenCount")),
+    )
+
+
+class LogIndex:
+    """SQLite index of parsed calls plus per-file ingestion state."""
+    def __init__(self, path=DEFAULT_INDEX):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, head_hash TEXT, offset INTEGER, finished INTEGER, pending TEXT);
+            CREATE TABLE IF NOT EXISTS calls (
+                ts REAL, agent TEXT, model TEXT, session TEXT, kind TEXT,
+                latency_ms REAL, tokens_in INTEGER, tokens_out INTEGER, error INTEGER, source TEXT);
+            CREATE INDEX IF NOT EXISTS calls_agent ON calls (agent, ts);
+            CREATE INDEX IF NOT EXISTS calls_model ON calls (model, ts);
+            CREATE INDEX IF NOT EXISTS calls_session ON calls (session, ts);
+            """
+        )
+
+    # --- Ingestion ---
+    @staticmethod
+    def _open(path):
+        return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+    def _resume_state(self, path, head_hash):
+        """
+        Returns (offset, pending) to resume from. A rotated segment whose head
+        matches a file ingested earlier under its live name continues from there.
+        """
+        row = self.conn.execute(
+            "SELECT offset, finished, pending FROM files WHERE path = ? AND head_hash = ?", (path, head_hash)
+        ).fetchone()
+        if row and row[1]:
+            return None
+        if row is None:
+            row = self.conn.execute(
+                "SELECT offset, finished, pending FROM files WHERE head_hash = ? AND path != ? ORDER BY offset DESC",
+                (head_hash, path),
+            ).fetchone()
+        if row is None:
+            return 0, []
+        return row[0], json.loads(row[2] or "[]")
+
+    def ingest_file(self, path):
+        """Parses new records of one log file. Returns the number of calls indexed."""
+        finished = path.endswith(".gz") or not path.endswith(".log")
+        with self._open(path) as f:
+            # A file is identified by its first line, which does not change as it grows or is rotated.
+            head_hash = hashlib.sha1(f.readline(_HEAD_BYTES)).hexdigest()
+            state = self._resume_state(path, head_hash)
+            if state is None:
+                return 0
+            offset, pending = state
+            if not path.endswith(".gz") and os.path.getsize(path) < offset:
+                offset, pending = 0, []  # truncated in place
+            f.seek(offset)
+            rows, offset, pending = self._parse(f, offset, pending, os.path.basename(path), finished)
+        self.conn.executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+            (path, head_hash, offset, int(finished), json.dumps(pending)),
+        )
+        self.conn.commit()
+        return len(rows)
+
+    def _parse(self, f, offset, pending, source, finished):
+        """
+        Groups physical lines into records (continuation lines have no timestamp
+        prefix) and turns each complete record into index rows. The last record
+        of a live file may still be growing, so it is left for the next run.
+        """
+        rows = []
+        record, record_offset = None, offset
+        position = offset
+        for raw_line in f:
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            match = _RECORD_RE.match(line)
+            if match:
+                if record is not None:
+                    rows.extend(self._record_rows(record, pending, source))
+                record = [match.group(1), match.group(2), match.group(3), [match.group(4)]]
+                record_offset = position
+            elif record is not None:
+                record[3].append(line)
+            position += len(raw_line)
+        if record is not None and finished:
+            rows.extend(self._record_rows(record, pending, source))
+            record_offset = position
+        return rows, (record_offset if record is not None else position), pending
+
+    @staticmethod
+    def _record_rows(record, pending, source):
+        stamp, level, logger_name, lines = record
+        ts = _parse_time(stamp)
+        message = "\n".join(lines)
+        first = lines[0]
+
+        if level in ("ERROR", "CRITICAL"):
+            return [(ts, None, None, None, "error", None, None, None, 1, source)]
+
+        if logger_name.endswith("google_llm"):
+            sending = _SENDING_RE.search(first)
+            if sending:
+                pending.append({"ts": ts, "model": sending.group(1).strip(), "agent": None})
+                return []
+            if "LLM Request:" in message and pending:
+                agent = _AGENT_NAME_RE.search(message)
+                if agent:
+                    pending[-1]["agent"] = agent.group(1)
+                return []
+            if "LLM Response:" in message and pending:
+                request = pending.pop(0)
+                tokens_in = tokens_out = None
+                if "Raw response:" in message:
+                    raw_text = message.split("Raw response:", 1)[1].strip().split("\n", 1)[0]
+                    try:
+                        tokens_in, tokens_out = _usage(json.loads(raw_text))
+                    except ValueError:
+                        pass
+                return [(ts, request["agent"], request["model"], None, "llm",
+                         (ts - request["ts"]) * 1000, tokens_in, tokens_out, 0, source)]
+            return []
+
+        if first.startswith("{"):
+            try:
+                event = json.loads(message)
+            except ValueError:
+                return []
+            kind = _EVENT_KINDS.get(event.get("event_type")) if isinstance(event, dict) else None
+            if kind is None:
+                return []
+            latency_ms = event.get("latency_ms")
+            if latency_ms is None:
+                started, ended = _parse_iso(event.get("time_stamp_input")), _parse_iso(event.get("time_stamp_output"))
+                latency_ms = (ended - started) * 1000 if started and ended else None
+            return [(ts, event.get("agent"), event.get("model"), event.get("session_id"), kind,
+                     latency_ms, event.get("token_input"), event.get("token_output"),
+                     int(bool(event.get("error"))), source)]
+
+        if first.startswith("ADK_EVENT: "):
+            body = message[len("ADK_EVENT: "):]
+            try:
+                event = json.loads(body)
+            except ValueError:
+                # Older logs wrote the event dict's repr.
+                try:
+                    event = ast.literal_eval(body)
+                except (ValueError, SyntaxError):
+                    return []
+            details = event.get("details") or {}
+            return [(ts, event.get("subagent"), details.get("model"), details.get("session_id"),
+                     f"event:{event.get('event_type')}", None, None, None, 0, source)]
+
+        for prefix, kind in (("REQUEST: ", "request"), ("RESPONSE: ", "response")):
+            if first.startswith(prefix):
+                return [(ts, None, None, None, kind, None, None, None, 0, source)]
+        return []
+
+    # --- Reporting ---
+    def report(self, since=None, group_by="agent", agent=None, model=None, session=None):
+        """Returns one dict per group with call counts, error rate and latency/token percentiles."""
+        if group_by not in ("agent", "model", "session", "kind"):
+            raise ValueError(f"Cannot group by {group_by}")
+        clauses, params = [], []
+        for column, value in (("agent", agent), ("model", model), ("session", session)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("ts >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        groups = {}
+        query = f"SELECT {group_by}, kind, latency_ms, tokens_in, tokens_out, error FROM calls {where}"
+        for key, kind, latency_ms, tokens_in, tokens_out, error in self.conn.execute(query, params):
+            group = groups.setdefault(key or "-", {"calls": 0, "errors": 0, "latency": [], "tokens_in": [], "tokens_out": []})
+            group["calls"] += 1
+            group["errors"] += error or 0
+            if latency_ms is not None:
+                group["latency"].append(latency_ms)
+            if tokens_in is not None:
+                group["tokens_in"].append(tokens_in)
+            if tokens_out is not None:
+                group["tokens_out"].append(tokens_out)
+
+        report = []
+        for key, group in sorted(groups.items()):
+            report.append({
+                group_by: key,
+                "calls": group["calls"],
+                "error_rate": group["errors"] / group["calls"],
+                "latency_p50_ms": percentile(group["latency"], 50),
+                "latency_p95_ms": percentile(group["latency"], 95),
+                "latency_p99_ms": percentile(group["latency"], 99),
+                "tokens_in_p50": percentile(group["tokens_in"], 50),
+                "tokens_in_p95": percentile(group["tokens_in"], 95),
+                "tokens_out_p50": percentile(group["tokens_out"], 50),
+                "tokens_out_p95": percentile(group["tokens_out"], 95),
+            })
+        return report
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def parse_since(value):
+    """Accepts "30m", "12h", "7d", "2w" or an ISO date and returns an epoch timestamp."""
+    if not value:
+        return None
+    match = _SINCE_RE.match(value)
+    if match:
+        seconds = {"m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        return time.time() - int(match.group(1)) * seconds
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _format_table(rows):
+    if not rows:
+        return "No matching calls."
+    columns = list(rows[0])
+    cells = [[("" if row[c] is None else f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c])) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def default_log_paths():
+    """Every agent's log files and rotated segments under PROJECT_ROOT."""
+    return sorted(
+        path for pattern in DEFAULT_LOG_GLOBS for path in glob.glob(pattern) if not path.endswith(_NOT_LOG_SUFFIXES)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index agent logs and report latency/token percentiles.")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="Path of the SQLite index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Parse new records from log files into the index.")
+    ingest.add_argument("paths", nargs="*", help=f"Log files (default: {' and '.join(DEFAULT_LOG_GLOBS)}).")
+
+    report = commands.add_parser("report", help="Report call counts, error rates and percentiles.")
+    report.add_argument("--since", help='e.g. "7d", "12h" or an ISO date.')
+    report.add_argument("--by", default="agent", choices=["agent", "model", "session", "kind"])
+    report.add_argument("--agent")
+    report.add_argument("--model")
+    report.add_argument("--session")
+    report.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+    report.add_argument("--no-ingest", action="store_true", help="Do not pick up new log lines first.")
+
+    args = parser.parse_args(argv)
+    index = LogIndex(args.index)
+
+    if args.command == "ingest" or not args.no_ingest:
+        paths = getattr(args, "paths", None) or default_log_paths()
+        # Oldest segments first, so a segment is matched to its live file before the new live file is read.
+        for path in sorted(paths, key=lambda p: (p.endswith(".log"), p)):
+            count = index.ingest_file(path)
+            if args.command == "ingest":
+                print(f"{path}: {count} new calls")
+        if args.command == "ingest":
+            return 0
+
+    rows = index.report(
+        since=parse_since(args.since), group_by=args.by, agent=args.agent, model=args.model, session=args.session
+    )
+    print(json.dumps(rows, indent=2) if args.json else _format_table(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Content-addressed side store for large log bodies.
+
+The agent log formatter (logs/logger.py) writes each distinct prompt,
+instruction or conversation turn of at least AGENT_LOG_BLOB_MIN_CHARS
+characters once to <agent>/logs/blobs/<sha256[:2]>/<sha256> and logs
+`<blob sha256:...>` in its place. This applies to the string fields of
+log_agent_event and ADK_EVENT records and to the System Instruction,
+Functions and Contents sections of ADK's "LLM Request" records, which
+otherwise repeat the full instruction and the whole conversation on every call.
+
+Full records are restored on demand:
+    python -m logs.blob_store rehydrate financial_advisor/logs/financial_advisor.log [-o full.log]
+    python -m logs.blob_store show <sha256> --blobs financial_advisor/logs/blobs
+    python -m logs.blob_store prune financial_advisor/logs/financial_advisor.log
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+
+BLOB_MIN_CHARS = int(os.getenv("AGENT_LOG_BLOB_MIN_CHARS", "512"))
+
+_REF_RE = re.compile(r'("?)<blob sha256:([0-9a-f]{64})>("?)')
+_SECTION_RULE = "-" * 59
+# "LLM Request" sections whose bodies are stored whole; Contents is stored per line (one turn each).
+_WHOLE_SECTIONS = ("System Instruction", "Functions")
+
+
+class BlobStore:
+    """Stores UTF-8 text under its sha256; writing the same text again is a no-op."""
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, text) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        # Checked on every call: `prune` may have deleted a blob this process wrote earlier.
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest):
+        """Returns the stored text, or None if the blob is missing."""
+        try:
+            with open(self.path(digest), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def digests(self):
+        return {os.path.basename(p) for p in glob.glob(os.path.join(self.root, "??", "*")) if not p.endswith(".tmp")}
+
+
+def blob_ref(text, store) -> str:
+    """Stores `text` and returns its reference; if the store cannot be written the text is returned as is."""
+    try:
+        return f"<blob sha256:{store.put(text)}>"
+    except OSError:
+        return text
+
+
+def dedupe_payload(payload, store, min_chars=BLOB_MIN_CHARS):
+    """Returns a copy of a logged dict (nested dicts included) with long string values replaced by references."""
+    deduped = {}
+    for key, value in payload.items():
+        if isinstance(value, dict):
+            value = dedupe_payload(value, store, min_chars)
+        elif isinstance(value, str) and len(value) >= min_chars:
+            value = blob_ref(value, store)
+        deduped[key] = value
+    return deduped
+
+
+def _dedupe_section(chunk, store, min_chars):
+    start = len(chunk) - len(chunk.lstrip("\n"))
+    title, sep, body = chunk[start:].partition("\n")
+    title = title.rstrip(":")
+    if title in _WHOLE_SECTIONS:
+        content = body.rstrip("\n")
+        if len(content) >= min_chars:
+            body = blob_ref(content, store) + body[len(content):]
+    elif title == "Contents":
+        body = "\n".join(blob_ref(line, store) if len(line) >= min_chars else line for line in body.split("\n"))
+    else:
+        return chunk
+    return chunk[:start] + title + ":" + sep + body
+
+
+def dedupe_llm_request(message, store, min_chars=BLOB_MIN_CHARS) -> str:
+    """Replaces the large sections of an ADK "LLM Request" log message with references."""
+    return _SECTION_RULE.join(_dedupe_section(chunk, store, min_chars) for chunk in message.split(_SECTION_RULE))
+
+
+def rehydrate_text(text, store) -> str:
+    """
+    Replaces every reference in `text` with the stored body. References inside
+    a JSON string (log_agent_event records) are substituted JSON-escaped;
+    missing blobs are left as references.
+    """
+    def substitute(match):
+        body = store.get(match.group(2))
+        if body is None:
+            return match.group(0)
+        if match.group(1) and match.group(3):
+            return '"' + json.dumps(body, ensure_ascii=False)[1:-1] + '"'
+        return match.group(1) + body + match.group(3)
+    return _REF_RE.sub(substitute, text) if "<blob sha256:" in text else text
+
+
+def default_blob_dir(log_path) -> str:
+    """Blobs live next to the log file they belong to, in a "blobs" directory."""
+    return os.path.join(os.path.dirname(os.path.abspath(log_path)), "blobs")
+
+
+def _open_log(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def _segments(log_path):
+    """The log file and its rotated segments (plain or gzipped)."""
+    return [p for p in glob.glob(glob.escape(log_path) + "*") if p == log_path or p[len(log_path):].startswith(".")]
+
+
+def referenced_digests(paths) -> set:
+    digests = set()
+    for path in paths:
+        with _open_log(path) as f:
+            for line in f:
+                digests.update(match.group(2) for match in _REF_RE.finditer(line))
+    return digests
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rehydrate or prune the content-addressed log blobs.")
+    parser.add_argument("--blobs", help="Blob directory; defaults to the blobs/ directory next to the log.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rehydrate = commands.add_parser("rehydrate", help="Print log files with all references expanded.")
+    rehydrate.add_argument("paths", nargs="+")
+    rehydrate.add_argument("-o", "--output", help="Write to this file instead of stdout.")
+    show = commands.add_parser("show", help="Print one blob.")
+    show.add_argument("digest")
+    prune = commands.add_parser("prune", help="Delete blobs no segment of the log refers to any more.")
+    prune.add_argument("log")
+    prune.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.command == "show":
+        if not args.blobs:
+            parser.error("show needs --blobs")
+        body = BlobStore(args.blobs).get(args.digest)
+        if body is None:
+            print(f"No blob {args.digest} in {args.blobs}", file=sys.stderr)
+            return 1
+        print(body)
+        return 0
+
+    if args.command == "prune":
+        store = BlobStore(args.blobs or default_blob_dir(args.log))
+        unused = store.digests() - referenced_digests(_segments(args.log))
+        for digest in unused:
+            if not args.dry_run:
+                os.remove(store.path(digest))
+        print(f"{'Would delete' if args.dry_run else 'Deleted'} {len(unused)} unreferenced blob(s)")
+        return 0
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for path in args.paths:
+            store = BlobStore(args.blobs or default_blob_dir(path.removesuffix(".gz")))
+            with _open_log(path) as f:
+                for line in f:
+                    out.write(rehydrate_text(line, store))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
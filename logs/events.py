@@ -0,0 +1,171 @@
+"""
+Typed agent events and the bus that delivers them to pluggable sinks.
+
+An event is a small record (AgentEvent or one of its subclasses) holding the
+sub-agent name, a details dict and a time.time() stamp; nothing is formatted
+when it is created. The bus hands it to every enabled sink:
+
+- FileSink: logs "ADK_EVENT: {json}" through an agent logger. The JSON is
+  built by the handler that writes the record (the queue listener thread in
+  async mode), and not at all if the logger is disabled for the level.
+- QueueSink: puts the event itself on a bounded queue.Queue for in-process
+  consumers; full queues drop the event and count it.
+- MetricsSink: counts it in agent_events_total (logs/metrics.py).
+
+When no sink is enabled, EventBus.publish returns before building the event.
+AGENT_EVENT_SINKS selects the sinks of an agent's bus (default "file,metrics").
+"""
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+
+from .logger import _JsonMessage
+from .metrics import observe_event
+
+logger = logging.getLogger(__name__)
+
+EVENT_SINKS = [name.strip() for name in os.getenv("AGENT_EVENT_SINKS", "file,metrics").split(",") if name.strip()]
+EVENT_QUEUE_CAPACITY = int(os.getenv("AGENT_EVENT_QUEUE_CAPACITY", "1000"))
+
+
+class AgentEvent:
+    # Hand-written __slots__ rather than @dataclass(slots=True), which needs Python 3.10.
+    __slots__ = ("subagent", "details", "timestamp")
+    event_type = "event"
+
+    def __init__(self, subagent, details=None, timestamp=None):
+        self.subagent = subagent
+        self.details = {} if details is None else details
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def __repr__(self):
+        return f"{type(self).__name__}(subagent={self.subagent!r}, details={self.details!r}, timestamp={self.timestamp!r})"
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self.subagent, self.details, self.timestamp) == (other.subagent, other.details, other.timestamp)
+
+    def to_dict(self) -> dict:
+        stamp = datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(timespec="milliseconds")
+        return {
+            "timestamp": stamp.replace("+00:00", "Z"),
+            "event_type": self.event_type,
+            "subagent": self.subagent,
+            "details": self.details,
+        }
+
+
+class SubagentCall(AgentEvent):
+    __slots__ = ()
+    event_type = "subagent_call"
+
+
+class SubagentActivity(AgentEvent):
+    __slots__ = ()
+    event_type = "subagent_activity"
+
+
+class Request(AgentEvent):
+    __slots__ = ()
+    event_type = "request"
+
+
+class Response(AgentEvent):
+    __slots__ = ()
+    event_type = "response"
+
+
+EVENT_TYPES = {cls.event_type: cls for cls in (AgentEvent, SubagentCall, SubagentActivity, Request, Response)}
+
+
+def event_class(event_type):
+    try:
+        return EVENT_TYPES[event_type]
+    except KeyError:
+        raise ValueError(f"Unknown event type {event_type!r}; expected one of {sorted(EVENT_TYPES)}") from None
+
+
+class FileSink:
+    name = "file"
+
+    def __init__(self, log, level=logging.INFO):
+        self.log = log
+        self.level = level
+
+    @property
+    def enabled(self):
+        return self.log.isEnabledFor(self.level)
+
+    def handle(self, event):
+        self.log.log(self.level, _JsonMessage(event, prefix="ADK_EVENT: "))
+
+
+class QueueSink:
+    name = "queue"
+    enabled = True
+
+    def __init__(self, capacity=EVENT_QUEUE_CAPACITY):
+        self.queue = queue.Queue(maxsize=capacity)
+        self.dropped = 0
+
+    def handle(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+
+class MetricsSink:
+    name = "metrics"
+    enabled = True
+
+    def handle(self, event):
+        observe_event(event.event_type, event.subagent)
+
+
+def build_sinks(names, log):
+    """Creates the named sinks ("file", "queue", "metrics"); the file sink writes through `log`."""
+    factories = {"file": lambda: FileSink(log), "queue": QueueSink, "metrics": MetricsSink}
+    unknown = [name for name in names if name not in factories]
+    if unknown:
+        raise ValueError(f"Unknown event sink(s) {unknown}; expected {sorted(factories)}")
+    return [factories[name]() for name in names]
+
+
+class EventBus:
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+
+    def sink(self, name):
+        return next((sink for sink in self.sinks if sink.name == name), None)
+
+    @property
+    def enabled(self):
+        return any(sink.enabled for sink in self.sinks)
+
+    def emit(self, event):
+        for sink in self.sinks:
+            if sink.enabled:
+                try:
+                    sink.handle(event)
+                except Exception as e:
+                    # A broken sink must not fail the agent call that emitted the event.
+                    logger.warning(f"Event sink {sink.name} failed: {e}")
+
+    def publish(self, event_type, subagent, details=None, **kwargs):
+        """Builds an event of `event_type` and emits it, unless no sink is enabled."""
+        if not self.enabled:
+            return None
+        event = event_class(event_type)(subagent, {**(details or {}), **kwargs})
+        self.emit(event)
+        return event
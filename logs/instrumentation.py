@@ -0,0 +1,224 @@
+"""
+Structured timing events from the ADK agent, model and tool callbacks.
+
+Agents built with `**agent_callbacks(log=logger)` (MODELS/hooks.py) get these
+callbacks at the end of their chains, so they time what ADK actually runs:
+
+- llm_call: one per LLM response (streamed chunks excluded) with latency_ms
+  measured after rate limiting and context caching, the tokens booked by
+  MODELS/tokens.py (prompt, output including thinking, and cached; estimated,
+  and flagged so, when the response reports no usage), the finish reason and
+  any function calls.
+  A call answered by an earlier before_model callback (a response cache hit, a
+  budget refusal) is logged with answered_by naming that callback;
+- tool_call: one per tool call with its arguments, result, latency_ms and error;
+- agent_call_output: one per agent run with its total latency and the tokens
+  of all LLM calls it made.
+
+Records are written with log_agent_event, so they are deduplicated, counted in
+logs/metrics.py and indexed by logs/analytics.py like the other JSON events.
+Calls are timed with time.perf_counter_ns(); when the logger is disabled for
+INFO nothing is recorded.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from MODELS.call_context import call_info
+from MODELS.tokens import call_usage, estimate_request_tokens, estimated_usage, usage_from_response
+
+from .logger import log_agent_event
+
+# Calls whose after-callback never ran (a later callback answered instead) are dropped beyond this.
+_MAX_OPEN = 10000
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _text(content):
+    if not content or not content.parts:
+        return None
+    return "".join(part.text or "" for part in content.parts) or None
+
+
+class CallInstrumentation:
+    """Times the calls of the agents it is attached to and logs one event per call to `log`."""
+    def __init__(self, log, level=logging.INFO):
+        self.log = log
+        self.level = level
+        self._lock = threading.Lock()
+        self._open = {}
+
+    def callbacks(self) -> dict:
+        """Callback tuples for MODELS.hooks.agent_callbacks, keyed like its arguments."""
+        return {
+            "before_agent": (self.before_agent,),
+            "after_agent": (self.after_agent,),
+            "before_model": (self.before_model,),
+            "after_model": (self.after_model,),
+            "before_tool": (self.before_tool,),
+            "after_tool": (self.after_tool,),
+            "answered_model": self.answered_model,
+        }
+
+    def _start(self, key, **data):
+        with self._lock:
+            if len(self._open) >= _MAX_OPEN:
+                self._open.pop(next(iter(self._open)))
+            self._open[key] = {"start_ns": time.perf_counter_ns(), "started_at": time.time(), **data}
+
+    def _finish(self, key):
+        """Returns the entry of a started call with its latency_ms, or None."""
+        with self._lock:
+            entry = self._open.pop(key, None)
+        if entry is not None:
+            entry["latency_ms"] = round((time.perf_counter_ns() - entry["start_ns"]) / 1e6, 3)
+        return entry
+
+    def _agent_entry(self, context):
+        with self._lock:
+            return self._open.get(("agent", context.invocation_id, context.agent_name))
+
+    def _log(self, event_type, context, entry, **fields):
+        extra = {
+            "latency_ms": entry["latency_ms"],
+            # Sub-agents run through AgentTool are logged under the session the user is in.
+            "session_id": call_info(context).root_session_id,
+            "invocation_id": context.invocation_id,
+            **fields.pop("extra", {}),
+        }
+        output = fields.pop("output", None)
+        log_agent_event(
+            self.log,
+            event_type=event_type,
+            agent=context.agent_name,
+            model_capabilities=None,
+            output=output,
+            output_type=type(output).__name__ if output is not None else None,
+            time_stamp_input=_iso(entry["started_at"]),
+            time_stamp_output=_iso(time.time()),
+            extra=extra,
+            **fields,
+        )
+
+    # --- Agent runs ---
+    def before_agent(self, callback_context):
+        if self.log.isEnabledFor(self.level):
+            self._start(
+                ("agent", callback_context.invocation_id, callback_context.agent_name),
+                tokens_in=0, tokens_out=0, llm_calls=0, tools=[],
+            )
+        return None
+
+    def after_agent(self, callback_context):
+        entry = self._finish(("agent", callback_context.invocation_id, callback_context.agent_name))
+        if entry is None:
+            return None
+        agent = call_info(callback_context).agent
+        output_key = getattr(agent, "output_key", None)
+        self._log(
+            "agent_call_output",
+            callback_context,
+            entry,
+            model=str(getattr(agent, "model", "") or "") or None,
+            tool_used=entry["tools"],
+            input_prompt=_text(callback_context.user_content),
+            output=callback_context.state.get(output_key) if output_key else None,
+            token_input=entry["tokens_in"],
+            token_output=entry["tokens_out"],
+            extra={"llm_calls": entry["llm_calls"]},
+        )
+        return None
+
+    # --- LLM calls ---
+    def before_model(self, callback_context, llm_request):
+        if self.log.isEnabledFor(self.level):
+            contents = llm_request.contents or []
+            self._start(
+                ("llm", callback_context.invocation_id, callback_context.agent_name),
+                model=llm_request.model,
+                input_prompt=_text(contents[-1]) if contents else None,
+            )
+        return None
+
+    def after_model(self, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        entry = self._finish(("llm", callback_context.invocation_id, callback_context.agent_name))
+        if entry is not None:
+            self._log_llm_call(callback_context, entry, llm_response, call_usage(callback_context, llm_response))
+        return None
+
+    def answered_model(self, callback_context, llm_request, result, answered_by):
+        """Logs an LLM call that an earlier before_model callback answered, so after_model never runs."""
+        if not self.log.isEnabledFor(self.level):
+            return
+        contents = llm_request.contents or []
+        entry = {
+            "started_at": time.time(),
+            "latency_ms": 0.0,
+            "model": llm_request.model,
+            "input_prompt": _text(contents[-1]) if contents else None,
+        }
+        usage = usage_from_response(result) or estimated_usage(
+            result, llm_request.model, estimate_request_tokens(llm_request)
+        )
+        self._log_llm_call(callback_context, entry, result, usage, answered_by=answered_by)
+
+    def _log_llm_call(self, callback_context, entry, llm_response, usage, answered_by=None):
+        tokens_in = usage["prompt_tokens"] if usage else None
+        tokens_out = usage["output_tokens"] if usage else None
+        parts = llm_response.content.parts if llm_response.content and llm_response.content.parts else []
+        function_calls = [part.function_call.name for part in parts if part.function_call]
+        agent_entry = self._agent_entry(callback_context)
+        if agent_entry is not None:
+            agent_entry["llm_calls"] += 1
+            agent_entry["tokens_in"] += tokens_in or 0
+            agent_entry["tokens_out"] += tokens_out or 0
+        self._log(
+            "llm_call",
+            callback_context,
+            entry,
+            model=entry["model"],
+            tool_used=function_calls,
+            input_prompt=entry["input_prompt"],
+            output=_text(llm_response.content),
+            token_input=tokens_in,
+            token_output=tokens_out,
+            extra={
+                "cached_tokens": usage["cached_tokens"] if usage else None,
+                "finish_reason": llm_response.finish_reason,
+                "error": llm_response.error_code,
+                **({"estimated": True} if usage and usage["estimated"] else {}),
+                **({"answered_by": answered_by} if answered_by else {}),
+            },
+        )
+
+    # --- Tool calls ---
+    def before_tool(self, tool, args, tool_context):
+        if self.log.isEnabledFor(self.level):
+            self._start(("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name))
+        return None
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        entry = self._finish(("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name))
+        if entry is None:
+            return None
+        agent_entry = self._agent_entry(tool_context)
+        if agent_entry is not None:
+            agent_entry["tools"].append(tool.name)
+        error = tool_response.get("error") if isinstance(tool_response, dict) else None
+        self._log(
+            "tool_call",
+            tool_context,
+            entry,
+            model=None,
+            tool_used=[tool.name],
+            input_prompt=args,
+            output=tool_response,
+            extra={"error": str(error) if error else None},
+        )
+        return None
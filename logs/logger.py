@@ -1,29 +1,323 @@
 # C:\Users\markr\OneDrive\Documents\Mark Rusch\AI\logs\logger.py
+import atexit
+import glob
+import gzip
 import logging
+import logging.handlers
 import os
-import importlib
 import json
+import queue
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from .blob_store import BlobStore, dedupe_llm_request, dedupe_payload, default_blob_dir
+from .metrics import observe_agent_event
+
+# Async logging: records go into a bounded in-memory queue and a background
+# listener thread formats (json.dumps) and writes them.
+LOG_ASYNC = os.getenv("AGENT_LOG_ASYNC", "").lower() in ("1", "on", "true", "yes")
+LOG_QUEUE_CAPACITY = int(os.getenv("AGENT_LOG_QUEUE_CAPACITY", "10000"))
+# What to do when the queue is full: "drop_newest", "drop_oldest" or "block".
+LOG_OVERFLOW_POLICY = os.getenv("AGENT_LOG_OVERFLOW_POLICY", "drop_newest")
+LOG_BLOCK_TIMEOUT = float(os.getenv("AGENT_LOG_BLOCK_TIMEOUT", "1.0"))
+
+_queue_listeners = {}
+# Captured logger name -> the agent logger it writes to; each is captured once per process.
+_captured_loggers = {}
+
+# Rotation: roll the log file over by size and/or age, gzip rotated segments in
+# the background and keep at most LOG_BACKUP_COUNT segments / LOG_RETENTION_DAYS days.
+LOG_MAX_BYTES = int(os.getenv("AGENT_LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_ROTATE_SECONDS = int(os.getenv("AGENT_LOG_ROTATE_SECONDS", "0"))
+LOG_BACKUP_COUNT = int(os.getenv("AGENT_LOG_BACKUP_COUNT", "10"))
+LOG_RETENTION_DAYS = float(os.getenv("AGENT_LOG_RETENTION_DAYS", "14"))
+LOG_COMPRESS = os.getenv("AGENT_LOG_COMPRESS", "on").lower() not in ("0", "off", "false", "no")
+
+# Deduplication: large prompt/instruction bodies go to a content-addressed side
+# store next to the log file (logs/blob_store.py) and only their hash is logged.
+LOG_DEDUP = os.getenv("AGENT_LOG_DEDUP", "on").lower() not in ("0", "off", "false", "no")
+# Other loggers whose records also go to the agent log file, e.g. ADK's "LLM Request" records.
+LOG_CAPTURE = [name.strip() for name in os.getenv("AGENT_LOG_CAPTURE", "google_adk").split(",") if name.strip()]
+
+_rotation_executor = None
+_SEGMENT_RE = re.compile(r"^\.(\d{8}-\d{6})(?:-(\d+))?(?:\.gz)?$")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
 def _get_agent_logs_dir(agent_name: str) -> str:
-    # Place logs inside the agent's own folder: <agent_module>/logs/
-    try:
-        agent_module = importlib.import_module(agent_name)
-        agent_dir = os.path.dirname(agent_module.__file__)
-    except Exception:
+    # Place logs inside the agent's own folder: <project root>/<agent_name>/logs/.
+    # Resolved from the path only: importing the agent package from here would
+    # re-enter it while it is still being imported.
+    agent_dir = os.path.join(PROJECT_ROOT, agent_name)
+    if not os.path.isdir(agent_dir):
         # fallback: use cwd
         agent_dir = os.path.join(os.getcwd(), agent_name)
     agent_logs_dir = os.path.join(agent_dir, "logs")
     os.makedirs(agent_logs_dir, exist_ok=True)
     return agent_logs_dir
 
-def _get_file_logger(logger_name: str, log_file_path: str, level: int = logging.INFO, include_stream_handler: bool = True):
+def _rotation_worker():
+    global _rotation_executor
+    if _rotation_executor is None:
+        _rotation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-rotation")
+    return _rotation_executor
+
+
+def _stop_rotation_worker():
+    if _rotation_executor is not None:
+        _rotation_executor.shutdown(wait=True)
+
+
+# Registered before any queue listener, so it runs after their atexit flushes (atexit is LIFO).
+atexit.register(_stop_rotation_worker)
+
+
+class _RollingFileHandler(logging.FileHandler):
+    """
+    FileHandler that rolls over when the file reaches `max_bytes` or is older
+    than `rotate_seconds`. Rotated segments are renamed to
+    <file>.<YYYYmmdd-HHMMSS>, then gzipped and pruned on a background thread so
+    the caller (or the queue listener) never waits on compression.
+    A limit of 0 disables that trigger. The time the current file was started
+    is kept in <file>.opened, so the age survives restarts (every write moves
+    the file's mtime).
+    """
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, rotate_seconds=LOG_ROTATE_SECONDS,
+                 backup_count=LOG_BACKUP_COUNT, retention_days=LOG_RETENTION_DAYS, compress=LOG_COMPRESS):
+        existed = os.path.exists(filename)
+        super().__init__(filename, encoding="utf-8")
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.compress = compress
+        self._pending_segments = set()
+        self.next_rollover = self._opened_at(existed) + rotate_seconds if rotate_seconds else None
+
+    @property
+    def _opened_path(self):
+        return self.baseFilename + ".opened"
+
+    def _opened_at(self, existed):
+        """When the current file was started: from the sidecar, else now for a new file."""
+        if existed:
+            try:
+                with open(self._opened_path, encoding="utf-8") as f:
+                    return float(f.read().strip())
+            except (OSError, ValueError):
+                # A file from before the sidecar existed: its mtime is the best estimate left.
+                opened_at = os.path.getmtime(self.baseFilename)
+        else:
+            opened_at = time.time()
+        self._mark_opened(opened_at)
+        return opened_at
+
+    def _mark_opened(self, opened_at):
+        try:
+            with open(self._opened_path, "w", encoding="utf-8") as f:
+                f.write(f"{opened_at:.3f}")
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not record log open time in {self._opened_path}: {e}")
+
+    def should_rollover(self):
+        if self.stream is None:
+            self.stream = self._open()
+        if self.max_bytes and self.stream.tell() >= self.max_bytes:
+            return True
+        return bool(self.next_rollover and time.time() >= self.next_rollover)
+
+    def do_rollover(self):
+        self.stream.close()
+        self.stream = None
+        segment = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        suffix = 1
+        while os.path.exists(segment) or os.path.exists(segment + ".gz"):
+            segment = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, segment)
+            self._pending_segments.add(segment)
+            try:
+                _rotation_worker().submit(self._finish_segment, segment)
+            except RuntimeError:
+                # The executor is shut down (interpreter exit, e.g. the listener's final flush).
+                self._finish_segment(segment)
+        self.stream = self._open()
+        if self.rotate_seconds:
+            opened_at = time.time()
+            self._mark_opened(opened_at)
+            self.next_rollover = opened_at + self.rotate_seconds
+
+    def _finish_segment(self, segment):
+        try:
+            if self.compress:
+                with open(segment, "rb") as src, gzip.open(segment + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(segment)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not compress log segment {segment}: {e}")
+        finally:
+            self._pending_segments.discard(segment)
+        self._prune()
+
+    def _prune(self):
+        # Segments are ordered by the rollover time in their name, not by mtime,
+        # which compression resets.
+        segments = []
+        for path in glob.glob(glob.escape(self.baseFilename) + ".*"):
+            match = _SEGMENT_RE.match(path[len(self.baseFilename):])
+            if match:
+                rolled_at = datetime.strptime(match.group(1), "%Y%m%d-%H%M%S").timestamp()
+                segments.append((rolled_at, int(match.group(2) or 0), path))
+        segments.sort(reverse=True)
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        for index, (rolled_at, _, path) in enumerate(segments):
+            if path in self._pending_segments:
+                continue
+            expired = cutoff is not None and rolled_at < cutoff
+            if expired or (self.backup_count and index >= self.backup_count):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def emit(self, record):
+        try:
+            if self.should_rollover():
+                self.do_rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+
+class _DedupFormatter(logging.Formatter):
+    """
+    Formatter that moves long log_agent_event fields and the instruction,
+    function and conversation sections of ADK "LLM Request" records into a
+    BlobStore and writes `<blob sha256:...>` references instead.
+    """
+    def __init__(self, fmt, store):
+        super().__init__(fmt)
+        self.store = store
+
+    def format(self, record):
+        message = None
+        if isinstance(record.msg, _JsonMessage):
+            message = record.msg.prefix + json.dumps(dedupe_payload(record.msg.as_dict(), self.store), default=str)
+        elif isinstance(record.msg, str) and record.msg.lstrip("\n").startswith("LLM Request:"):
+            message = dedupe_llm_request(record.getMessage(), self.store)
+        if message is not None:
+            # A copy, so handlers without deduplication (the console) still see the full record.
+            record = logging.makeLogRecord({**record.__dict__, "msg": message, "args": None})
+        return super().format(record)
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves all formatting to the listener thread and applies
+    an overflow policy instead of growing without bound.
+    """
+    def __init__(self, log_queue, overflow_policy="drop_newest", block_timeout=LOG_BLOCK_TIMEOUT):
+        super().__init__(log_queue)
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock implementation formats the message here, in the caller's thread.
+        # Event payloads are copied instead, so later changes by the caller do not leak into the log.
+        if isinstance(record.msg, _JsonMessage):
+            record.msg = record.msg.snapshot()
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.overflow_policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.overflow_policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+                self.queue.put_nowait(record)
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room instead of failing when stop() is called on a full queue.
+        self.queue.put(self._sentinel)
+
+
+def _start_queue_listener(logger, queue_capacity, overflow_policy):
+    """Moves the logger's handlers behind a bounded queue served by a listener thread."""
+    handlers = tuple(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    log_queue = queue.Queue(maxsize=queue_capacity)
+    queue_handler = _BoundedQueueHandler(log_queue, overflow_policy=overflow_policy)
+    logger.addHandler(queue_handler)
+    listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flushes whatever is still queued
+    _queue_listeners[logger.name] = (queue_handler, listener)
+    return listener
+
+
+def get_log_queue_stats(logger_name: str):
+    """Returns {"queued", "capacity", "dropped"} for an async logger, or None for a synchronous one."""
+    if logger_name not in _queue_listeners:
+        return None
+    queue_handler, _ = _queue_listeners[logger_name]
+    return {
+        "queued": queue_handler.queue.qsize(),
+        "capacity": queue_handler.queue.maxsize,
+        "dropped": queue_handler.dropped,
+    }
+
+
+def _get_file_logger(
+    logger_name: str,
+    log_file_path: str,
+    level: int = logging.INFO,
+    include_stream_handler: bool = True,
+    async_mode: bool = False,
+    queue_capacity: int = LOG_QUEUE_CAPACITY,
+    overflow_policy: str = LOG_OVERFLOW_POLICY,
+    max_bytes: int = LOG_MAX_BYTES,
+    rotate_seconds: int = LOG_ROTATE_SECONDS,
+    backup_count: int = LOG_BACKUP_COUNT,
+    retention_days: float = LOG_RETENTION_DAYS,
+    compress: bool = LOG_COMPRESS,
+    dedup: bool = LOG_DEDUP,
+    capture_loggers=(),
+):
     """
     Helper function to create and configure a logger.
     - logger_name: The name for logging.getLogger()
     - log_file_path: The full path to the log file.
     - level: The logging level.
     - include_stream_handler: Whether to also log to console.
+    - async_mode: Write through a bounded queue and a background listener thread.
+    - queue_capacity: Max records held in the queue (async mode).
+    - overflow_policy: "drop_newest", "drop_oldest" or "block" when the queue is full (async mode).
+    - max_bytes / rotate_seconds: Roll the file over by size / age (0 disables).
+    - backup_count / retention_days: How many rotated segments, and how old, to keep (0 keeps all).
+    - compress: gzip rotated segments in the background.
+    - dedup: Log hashes of long prompt bodies and keep the bodies in <log dir>/blobs.
+    - capture_loggers: Names of other loggers (e.g. "google_adk") that also write to the file.
+      A logger is captured by the first agent log that asks for it.
     """
     logger = logging.getLogger(logger_name)
     logger.setLevel(level)
@@ -31,37 +325,109 @@ def _get_file_logger(logger_name: str, log_file_path: str, level: int = logging.
 
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
 
+    listener = _queue_listeners.get(logger_name, (None, None))[1]
+    if async_mode and listener is None:
+        listener = _start_queue_listener(logger, queue_capacity, overflow_policy)
+    # In async mode the real handlers live on the listener, not on the logger.
+    current_handlers = listener.handlers if listener else tuple(logger.handlers)
+    new_handlers = []
+
     # File Handler
     # Avoid duplicate file handlers for the same logger and file
     has_file_handler = any(
         isinstance(h, logging.FileHandler) and
         getattr(h, "baseFilename", None) == os.path.abspath(log_file_path)
-        for h in logger.handlers
+        for h in current_handlers
     )
     if not has_file_handler:
-        file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler = _RollingFileHandler(
+            log_file_path,
+            max_bytes=max_bytes,
+            rotate_seconds=rotate_seconds,
+            backup_count=backup_count,
+            retention_days=retention_days,
+            compress=compress,
+        )
+        if dedup:
+            file_handler.setFormatter(_DedupFormatter(formatter._fmt, BlobStore(default_blob_dir(log_file_path))))
+        else:
+            file_handler.setFormatter(formatter)
+        new_handlers.append(file_handler)
 
     # Stream Handler (Console)
     if include_stream_handler:
         # Avoid duplicate stream handlers for the same logger
-        has_stream_handler = any(isinstance(h, logging.StreamHandler) for h in logger.handlers)
+        has_stream_handler = any(isinstance(h, logging.StreamHandler) for h in current_handlers)
         if not has_stream_handler:
             stream_handler = logging.StreamHandler()
             stream_handler.setFormatter(formatter)
-            logger.addHandler(stream_handler)
+            new_handlers.append(stream_handler)
+
+    if listener:
+        listener.handlers = tuple(current_handlers) + tuple(new_handlers)
+    else:
+        for handler in new_handlers:
+            logger.addHandler(handler)
+
+    # Captured loggers write to the first agent log set up in the process. In
+    # async mode they go through the agent's queue, so the caller never waits
+    # on the file; otherwise straight to the file handler.
+    if listener:
+        capture_handlers = [_queue_listeners[logger_name][0]]
+    else:
+        capture_handlers = [
+            h for h in (*current_handlers, *new_handlers)
+            if isinstance(h, logging.FileHandler) and h.baseFilename == os.path.abspath(log_file_path)
+        ]
+    for name in capture_loggers:
+        if _captured_loggers.setdefault(name, logger_name) != logger_name:
+            continue
+        captured = logging.getLogger(name)
+        for handler in capture_handlers:
+            if handler not in captured.handlers:
+                captured.addHandler(handler)
 
     return logger
 
-def setup_logger(agent_name: str, level: int = logging.INFO, include_stream_handler: bool = True):
+def setup_logger(
+    agent_name: str,
+    level: int = logging.INFO,
+    include_stream_handler: bool = True,
+    async_mode: bool = None,
+    queue_capacity: int = LOG_QUEUE_CAPACITY,
+    overflow_policy: str = LOG_OVERFLOW_POLICY,
+    max_bytes: int = LOG_MAX_BYTES,
+    rotate_seconds: int = LOG_ROTATE_SECONDS,
+    backup_count: int = LOG_BACKUP_COUNT,
+    retention_days: float = LOG_RETENTION_DAYS,
+    compress: bool = LOG_COMPRESS,
+    dedup: bool = LOG_DEDUP,
+    capture_loggers=None,
+):
     """
     Sets up the main logger for an agent.
     Logs to logs/<agent_name>/<agent_name>.log and optionally to console.
+    async_mode defaults to the AGENT_LOG_ASYNC environment variable; the
+    rotation, dedup and capture settings default to the AGENT_LOG_* variables (see _get_file_logger).
     """
     agent_logs_dir = _get_agent_logs_dir(agent_name)
     log_file = os.path.join(agent_logs_dir, f"{agent_name}.log")
-    return _get_file_logger(logger_name=agent_name, log_file_path=log_file, level=level, include_stream_handler=include_stream_handler)
+    return _get_file_logger(
+        logger_name=agent_name,
+        log_file_path=log_file,
+        level=level,
+        include_stream_handler=include_stream_handler,
+        async_mode=LOG_ASYNC if async_mode is None else async_mode,
+        queue_capacity=queue_capacity,
+        overflow_policy=overflow_policy,
+        max_bytes=max_bytes,
+        rotate_seconds=rotate_seconds,
+        backup_count=backup_count,
+        retention_days=retention_days,
+        compress=compress,
+        dedup=dedup,
+        capture_loggers=LOG_CAPTURE if capture_loggers is None else capture_loggers,
+    )
 
 
 # Only use the main logger for all logging purposes.
@@ -106,8 +472,39 @@ def log_agent_event(
         event["context_files"] = context_files
     if extra:
         event.update(extra)
-    # Log as JSON for traceability
-    logger.info(json.dumps(event, default=str))
+    observe_agent_event(event)
+    # Log as JSON for traceability; serialized only when a handler formats the record
+    logger.info(_JsonMessage(event))
+
+
+def _copy_containers(value):
+    if isinstance(value, dict):
+        return {key: _copy_containers(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return type(value)(_copy_containers(item) for item in value)
+    return value
+
+
+class _JsonMessage:
+    """
+    Log message that defers json.dumps until the record is formatted. The
+    payload is a dict or an object with to_dict() (logs/events.py records).
+    """
+    __slots__ = ("payload", "prefix")
+
+    def __init__(self, payload, prefix=""):
+        self.payload = payload
+        self.prefix = prefix
+
+    def as_dict(self):
+        return self.payload.to_dict() if hasattr(self.payload, "to_dict") else self.payload
+
+    def snapshot(self):
+        """A copy holding the payload as it is now; containers are copied, values are shared."""
+        return _JsonMessage(_copy_containers(self.as_dict()), self.prefix)
+
+    def __str__(self):
+        return self.prefix + json.dumps(self.as_dict(), default=str)
 
 # Request logging
 LOG_FILE = os.path.join(os.path.dirname(__file__), "request.log")
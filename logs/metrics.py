@@ -0,0 +1,306 @@
+"""
+In-process metrics registry with a Prometheus scrape endpoint.
+
+Counters and histograms are updated from the existing logging paths
+(emit_event, log_agent_event), the shared ADK callbacks in MODELS/hooks.py
+(LLM and tool calls), the rate limiter and the response/context caches:
+
+    agent_events_total{agent, event_type}            emit_event calls
+    agent_calls_total{agent, model}                  finished log_agent_event calls
+    agent_call_latency_seconds{agent, model}
+    llm_requests_total{agent, model, status}         one per LLM response (status ok/error)
+    llm_latency_seconds{agent, model}                excludes rate-limit waits
+    llm_tokens_total{agent, model, kind}             kind prompt/output/cached, as booked by MODELS/tokens.py
+    tool_calls_total{agent, tool}
+    tool_errors_total{agent, tool}                   tool results carrying an "error" key
+    tool_latency_seconds{agent, tool}
+    rate_limit_wait_seconds{model}                   every call, 0 when it was not queued
+    cache_requests_total{cache, result}              result hit/miss; hit ratio = hit / (hit + miss)
+
+With AGENT_METRICS_PORT set, GET http://AGENT_METRICS_HOST:AGENT_METRICS_PORT/metrics
+returns them in the Prometheus text exposition format.
+"""
+import os
+import threading
+import time
+
+from MODELS.tokens import call_usage
+
+METRICS_PORT = int(os.getenv("AGENT_METRICS_PORT") or 0)
+METRICS_HOST = os.getenv("AGENT_METRICS_HOST", "127.0.0.1")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += [line for key, value in items for line in self._sample_lines(key, value)]
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _sample_lines(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # per-bucket counts (non-cumulative), then sum and count
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            counts = self._values.get(self._key(labels))
+            return counts[-1] if counts else 0
+
+    def _sample_lines(self, key, counts):
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), (*counts[:-2], None)):
+            cumulative = counts[-1] if bucket_count is None else cumulative + bucket_count
+            le = (("le", _format_value(bound)),)
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(counts[-2])}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self._get(Counter, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+AGENT_EVENTS = registry.counter("agent_events_total", "Structured agent events emitted.", ("agent", "event_type"))
+AGENT_CALLS = registry.counter("agent_calls_total", "Finished agent calls logged by log_agent_event.", ("agent", "model"))
+AGENT_CALL_LATENCY = registry.histogram(
+    "agent_call_latency_seconds", "Latency of agent calls logged by log_agent_event.", ("agent", "model")
+)
+LLM_REQUESTS = registry.counter("llm_requests_total", "LLM responses by outcome.", ("agent", "model", "status"))
+LLM_LATENCY = registry.histogram("llm_latency_seconds", "LLM call latency, without rate-limit waits.", ("agent", "model"))
+LLM_TOKENS = registry.counter("llm_tokens_total", "Tokens reported in LLM usage metadata.", ("agent", "model", "kind"))
+TOOL_CALLS = registry.counter("tool_calls_total", "Tool calls.", ("agent", "tool"))
+TOOL_ERRORS = registry.counter("tool_errors_total", "Tool calls that returned an error.", ("agent", "tool"))
+TOOL_LATENCY = registry.histogram("tool_latency_seconds", "Tool call latency.", ("agent", "tool"))
+RATE_LIMIT_WAIT = registry.histogram(
+    "rate_limit_wait_seconds", "Time LLM calls were queued by the rate limiter.", ("model",),
+    buckets=(0, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+CACHE_REQUESTS = registry.counter("cache_requests_total", "Cache lookups by result (hit/miss).", ("cache", "result"))
+
+
+def observe_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def observe_event(event_type, agent):
+    """Feeds one emit_event call."""
+    AGENT_EVENTS.inc(agent=agent, event_type=event_type)
+
+
+def observe_agent_event(event):
+    """Feeds one log_agent_event record; only finished agent calls (agent_call_output) are counted."""
+    if event.get("event_type") != "agent_call_output":
+        return
+    agent, model = event.get("agent") or "unknown", str(event.get("model") or "unknown")
+    AGENT_CALLS.inc(agent=agent, model=model)
+    if event.get("latency_ms") is not None:
+        AGENT_CALL_LATENCY.observe(event["latency_ms"] / 1000, agent=agent, model=model)
+
+
+# --- ADK callbacks (registered in MODELS/hooks.py) ---
+_MAX_PENDING = 10000
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _start(key, label=None):
+    with _pending_lock:
+        if len(_pending) >= _MAX_PENDING:
+            # Calls whose after-callback never ran (a later callback answered instead).
+            _pending.pop(next(iter(_pending)))
+        _pending[key] = (time.perf_counter(), label)
+
+
+def _finish(key):
+    """Returns (elapsed seconds, label given to _start), or (None, None) for an unknown key."""
+    with _pending_lock:
+        started, label = _pending.pop(key, (None, None))
+    return (None, None) if started is None else (time.perf_counter() - started, label)
+
+
+def metrics_before_model(callback_context, llm_request):
+    _start(("llm", callback_context.invocation_id, callback_context.agent_name), llm_request.model)
+    return None
+
+
+def metrics_after_model(callback_context, llm_response):
+    if llm_response.partial:
+        return None
+    agent = callback_context.agent_name
+    elapsed, model = _finish(("llm", callback_context.invocation_id, agent))
+    model = model or llm_response.model_version or "unknown"
+    if elapsed is not None:
+        LLM_LATENCY.observe(elapsed, agent=agent, model=model)
+    LLM_REQUESTS.inc(agent=agent, model=model, status="error" if llm_response.error_code else "ok")
+    usage = call_usage(callback_context, llm_response)
+    if usage:
+        for kind, count in (("prompt", usage["prompt_tokens"]), ("output", usage["output_tokens"]),
+                            ("cached", usage["cached_tokens"])):
+            if count:
+                LLM_TOKENS.inc(count, agent=agent, model=model, kind=kind)
+    return None
+
+
+def _tool_key(tool, tool_context):
+    return ("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name)
+
+
+def metrics_before_tool(tool, args, tool_context):
+    _start(_tool_key(tool, tool_context))
+    return None
+
+
+def metrics_after_tool(tool, args, tool_context, tool_response):
+    agent = tool_context.agent_name
+    TOOL_CALLS.inc(agent=agent, tool=tool.name)
+    elapsed, _ = _finish(_tool_key(tool, tool_context))
+    if elapsed is not None:
+        TOOL_LATENCY.observe(elapsed, agent=agent, tool=tool.name)
+    if isinstance(tool_response, dict) and (tool_response.get("error") or tool_response.get("status") == "error"):
+        TOOL_ERRORS.inc(agent=agent, tool=tool.name)
+    return None
+
+
+# --- Scrape endpoint ---
+def _handler_class():
+    # http.server is only imported when the endpoint is started; logs.logger imports this module.
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serves /metrics on a daemon thread. Only the first call starts a server; returns it."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            from http.server import ThreadingHTTPServer
+
+            _server = ThreadingHTTPServer((host, port), _handler_class())
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
+
+
+def serve_from_env():
+    """
+    Starts the scrape endpoint when AGENT_METRICS_PORT is set. Called by the
+    entry points (the root agent modules loaded by `adk web`, the batch CLI),
+    not on import, so tools and worker processes never bind the port.
+    """
+    if METRICS_PORT:
+        start_http_server()
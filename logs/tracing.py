@@ -0,0 +1,266 @@
+"""
+Hierarchical tracing with monotonic nanosecond timing.
+
+Spans are timed with time.perf_counter_ns() (monotonic, unaffected by wall
+clock changes) and nest through a context variable, so a span started while
+another one is open becomes its child - across awaits, asyncio tasks and the
+nested runners AgentTool starts for sub-agents. The shared ADK callbacks in
+MODELS/hooks.py open a span for every agent run, LLM call and tool call:
+
+    financial_coordinator
+      llm gemini-2.5-pro
+      tool data_analyst_agent
+        data_analyst_agent
+          llm gemini-2.5-pro
+          tool google_search
+
+Finished spans are kept in memory (at most AGENT_TRACE_MAX_SPANS) and written
+as Chrome trace-event JSON, which chrome://tracing and https://ui.perfetto.dev
+open directly. With AGENT_TRACE=on the trace is written to AGENT_TRACE_DIR at
+exit; tracer.export(path) writes it at any time.
+"""
+import asyncio
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from MODELS.call_context import call_info
+from MODELS.tokens import call_usage
+
+from .logger import PROJECT_ROOT
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENABLED = os.getenv("AGENT_TRACE", "off").lower() in ("1", "on", "true", "yes")
+TRACE_DIR = os.getenv("AGENT_TRACE_DIR") or os.path.join(PROJECT_ROOT, "logs", "traces")
+TRACE_MAX_SPANS = int(os.getenv("AGENT_TRACE_MAX_SPANS", "100000"))
+
+
+def _lane():
+    """Identifies the asyncio task (or thread) a span runs on; each becomes one row in the viewer."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Span:
+    __slots__ = ("span_id", "parent", "parent_id", "trace_id", "name", "category", "start_ns", "end_ns", "lane", "attrs")
+
+    def __init__(self, span_id, parent, name, category, attrs):
+        self.span_id = span_id
+        self.parent = parent
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else span_id
+        self.name = name
+        self.category = category
+        self.lane = _lane()
+        self.attrs = attrs
+        self.end_ns = None
+        self.start_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+
+class Tracer:
+    """
+    Collects spans. `start`/`finish` take an optional key for spans that begin
+    and end in different callbacks; `span()` is the context manager form.
+    """
+    def __init__(self, enabled=TRACE_ENABLED, max_spans=TRACE_MAX_SPANS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._current = contextvars.ContextVar("current_span", default=None)
+        self._open = {}
+        self._finished = deque(maxlen=max_spans)
+        # Maps perf_counter_ns() readings to wall-clock time in the exported trace.
+        self.epoch_ns = time.perf_counter_ns()
+        self.wall_epoch_ns = time.time_ns()
+
+    def current(self):
+        return self._current.get()
+
+    def start(self, name, category="span", key=None, **attrs):
+        """Opens a child of the current span and makes it current. Returns None when tracing is off."""
+        if not self.enabled:
+            return None
+        span = Span(next(self._ids), self._current.get(), name, category, attrs)
+        if key is not None:
+            with self._lock:
+                self._open[key] = span
+        self._current.set(span)
+        return span
+
+    def finish(self, span_or_key, **attrs):
+        """
+        Closes a span (given directly or by its start key) and makes its parent
+        current again. Children still open are closed first and marked unfinished,
+        e.g. an LLM call whose after_model callback never ran.
+        """
+        if not self.enabled or span_or_key is None:
+            return None
+        with self._lock:
+            if isinstance(span_or_key, Span):
+                span = span_or_key
+            else:
+                span = self._open.pop(span_or_key, None)
+            if span is None or span.end_ns is not None:
+                return None
+            orphans = [k for k, s in self._open.items() if s.parent is span]
+        for key in orphans:
+            self.finish(key, unfinished=True)
+        span.end_ns = time.perf_counter_ns()
+        span.attrs.update(attrs)
+        if self._current.get() is span:
+            self._current.set(span.parent)
+        span.parent = None
+        with self._lock:
+            self._finished.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name, category="span", **attrs):
+        span = self.start(name, category, **attrs)
+        try:
+            yield span
+        finally:
+            self.finish(span)
+
+    def spans(self):
+        """Returns the finished spans, oldest first."""
+        with self._lock:
+            return list(self._finished)
+
+    def clear(self):
+        with self._lock:
+            self._finished.clear()
+
+    def to_chrome_trace(self) -> dict:
+        """Returns the finished (and still open) spans as Chrome trace-event JSON ("X" complete events)."""
+        with self._lock:
+            spans = list(self._finished) + [s for s in self._open.values() if s.end_ns is None]
+        pid = os.getpid()
+        lanes = {}
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "agents"}}]
+        for span in sorted(spans, key=lambda s: s.start_ns):
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            args = {"span_id": span.span_id, "parent_id": span.parent_id, "trace_id": span.trace_id, **span.attrs}
+            if span.end_ns is None:
+                args["unfinished"] = True
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                # Microseconds since the tracer started, with nanosecond precision.
+                "ts": (span.start_ns - self.epoch_ns) / 1000,
+                "dur": span.duration_ns / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ns",
+            "otherData": {"started_at": datetime.fromtimestamp(self.wall_epoch_ns / 1e9).isoformat()},
+        }
+
+    def export(self, path=None) -> str:
+        """Writes the trace as JSON to `path` (default: a new file in TRACE_DIR) and returns the path."""
+        if path is None:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(TRACE_DIR, f"trace-{stamp}-{os.getpid()}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+
+tracer = Tracer()
+
+
+def _export_at_exit():
+    if tracer.enabled and tracer.spans():
+        logger.info(f"TRACE: written to {tracer.export()}")
+
+
+atexit.register(_export_at_exit)
+
+
+# --- ADK callbacks (registered in MODELS/hooks.py) ---
+def _agent_key(callback_context):
+    return ("agent", callback_context.invocation_id, callback_context.agent_name)
+
+
+def _llm_key(callback_context):
+    return ("llm", callback_context.invocation_id, callback_context.agent_name)
+
+
+def _tool_key(tool, tool_context):
+    return ("tool", tool_context.invocation_id, tool_context.function_call_id or tool.name)
+
+
+def trace_before_agent(callback_context):
+    if tracer.enabled:
+        tracer.start(
+            callback_context.agent_name,
+            "agent",
+            key=_agent_key(callback_context),
+            invocation_id=callback_context.invocation_id,
+            session_id=call_info(callback_context).session_id,
+        )
+    return None
+
+
+def trace_after_agent(callback_context):
+    tracer.finish(_agent_key(callback_context))
+    return None
+
+
+def trace_before_model(callback_context, llm_request):
+    if tracer.enabled:
+        tracer.start(
+            f"llm {llm_request.model}",
+            "llm",
+            key=_llm_key(callback_context),
+            agent=callback_context.agent_name,
+            model=llm_request.model,
+        )
+    return None
+
+
+def trace_after_model(callback_context, llm_response):
+    if not tracer.enabled or llm_response.partial:
+        return None
+    usage = call_usage(callback_context, llm_response)
+    attrs = {"error": llm_response.error_code} if llm_response.error_code else {}
+    if usage:
+        attrs.update(prompt_tokens=usage["prompt_tokens"], output_tokens=usage["output_tokens"])
+        if usage["estimated"]:
+            attrs["estimated"] = True
+    tracer.finish(_llm_key(callback_context), **attrs)
+    return None
+
+
+def trace_before_tool(tool, args, tool_context):
+    if tracer.enabled:
+        tracer.start(f"tool {tool.name}", "tool", key=_tool_key(tool, tool_context), agent=tool_context.agent_name)
+    return None
+
+
+def trace_after_tool(tool, args, tool_context, tool_response):
+    if tracer.enabled:
+        error = tool_response.get("error") if isinstance(tool_response, dict) else None
+        tracer.finish(_tool_key(tool, tool_context), **({"error": str(error)} if error else {}))
+    return None
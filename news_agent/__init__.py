@@ -1 +1,12 @@
-from . import agent
\ No newline at end of file
+import importlib
+
+# Built on first access of `agent` / `root_agent` (e.g. by `adk web`), not on import.
+__all__ = ["agent", "root_agent"]
+
+
+def __getattr__(name):
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    if name == "root_agent":
+        return importlib.import_module(".agent", __name__).root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,11 +6,15 @@
 from google.adk.agents import LlmAgent
 from google.adk.tools import google_search
 from logs.logger import setup_logger, log_agent_event
+from logs.metrics import serve_from_env
 from .prompt import NEWS_AGENT_PROMPT
 import MODELS
+from MODELS.hooks import agent_callbacks
 
 AGENT_NAME = "news_agent"
 logger = setup_logger(AGENT_NAME)
+# AGENT_METRICS_PORT=<port> serves the metrics on /metrics.
+serve_from_env()
 
 news_agent = LlmAgent(
     name=AGENT_NAME,
@@ -19,6 +23,7 @@ news_agent = LlmAgent(
     instruction=NEWS_AGENT_PROMPT,
     output_key="news_agent_output",
     tools=[google_search],
+    **agent_callbacks(log=logger),
 )
 
 root_agent = news_agent
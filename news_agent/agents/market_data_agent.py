@@ -21,36 +21,37 @@ from google.adk.tools import google_search
 from google.adk.tools import FunctionTool
 from logs.logger import setup_logger, log_agent_event
 import MODELS
+from MODELS.hooks import agent_callbacks
 from tools.yfinance_tool import query_yfinance
+from tools.indicators import technical_indicators
 
 AGENT_NAME = "market_data_agent"
 logger = setup_logger(AGENT_NAME)
 
-# Register yfinance as a tool
-yfinance_tool = FunctionTool(
-    name="yfinance_query",
-    description="Query real-time market data from Yahoo Finance for any ticker (e.g. AAPL, CL=F, BTC-USD)",
-    func=query_yfinance,
-    input_schema={
-        "ticker_or_term": "The asset symbol or keyword (e.g. 'CL=F' for oil futures, 'AAPL' for Apple)",
-        "period": "(Optional) Period of historical data to fetch (e.g., '7d', '1mo')",
-        "interval": "(Optional) Interval between data points (e.g., '1d', '1h')"
-    },
-)
+# Register yfinance and the indicator engine as tools; ADK takes the tool name and schema from the function
+yfinance_tool = FunctionTool(query_yfinance)
+
+# Indicators are computed locally from the same cached history, for many symbols in one call
+indicators_tool = FunctionTool(technical_indicators)
 
-# The market_data_agent can use both yfinance and google_search as tools
+# The market_data_agent can use yfinance, the indicator engine and google_search as tools
 MARKET_AGENT_PROMPT = """
 You are a financial data analysis agent.
 
 You are given a financial topic (e.g., 'OIL', 'APPLE', 'BITCOIN') and your task is to:
 1. Identify the correct Yahoo Finance ticker (e.g. CL=F for oil futures, AAPL for Apple)
-2. Use the `yfinance_query` tool to pull:
+2. Use the `query_yfinance` tool to pull:
     - Current price and volume
     - Last 5 days of historical data
     - Most recent news headlines and links
     - Sentiment score (positive/neutral/negative) for each headline
-3. Use the `google_search` tool to supplement with recent news and market commentary if needed.
-4. Interpret the combined output:
+3. Use the `technical_indicators` tool (one call for all tickers) for trend and momentum readings:
+    - Moving averages and the price's distance from them
+    - RSI, MACD, ATR and Bollinger bands
+    - Volume versus its 20-bar average and the volume profile (point of control, value area)
+   Quote these numbers instead of estimating trends from the raw bars.
+4. Use the `google_search` tool to supplement with recent news and market commentary if needed.
+5. Interpret the combined output:
     - What does the price and volume trend suggest?
     - What is the market sentiment based on the news?
     - Are there actionable insights or risks?
@@ -58,6 +59,7 @@ You are given a financial topic (e.g., 'OIL', 'APPLE', 'BITCOIN') and your task
 Structure your output with:
 - 📈 Market Summary
 - 📊 Historical Trend
+- 📐 Technical Indicators
 - 📰 News Highlights
 - 😐 Sentiment Overview
 - 🔍 Agent Insight
@@ -66,10 +68,11 @@ Structure your output with:
 market_data_agent = LlmAgent(
     name=AGENT_NAME,
     model=MODELS.REASONING_MODEL if hasattr(MODELS, "REASONING_MODEL") else "gpt-4",
-    description="A financial data lookup agent using yfinance and google_search to pull live price, volume, and news data.",
+    description="A financial data lookup agent using yfinance, local technical indicators and google_search to pull live price, volume, trend and news data.",
     instruction=MARKET_AGENT_PROMPT,
     output_key="market_data_output",
-    tools=[yfinance_tool, google_search],
+    tools=[yfinance_tool, indicators_tool, google_search],
+    **agent_callbacks(log=logger),
 )
 
 # Expose root_agent for ADK compatibility
@@ -4,15 +4,36 @@ import yfinance as yf
 import logging
 from adk.agent import Agent
 from configs.settings import RESULTS_DIR
+from tools.ohlcv_store import OhlcvStore
 
 class YFinanceTool:
     """
     Simple tool to fetch price, historical data, and news for a ticker using yfinance.
+    History is served from a local OhlcvStore that only downloads missing bars.
     """
-    def __init__(self):
-        pass
+    def __init__(self, store=None):
+        self.store = store or OhlcvStore()
+
+    def bulk_history(self, symbols, period="5d", interval="1d", as_frame=False):
+        """
+        History for many symbols in one batched download.
+        Returns {symbol: records}, or one time-aligned DataFrame with as_frame=True.
+        """
+        return self.store.history_many(symbols, period=period, interval=interval, as_frame=as_frame)
 
     def execute(self, function_name, api_params):
+        if function_name == "bulk_history":
+            symbols = api_params.get("symbols") or []
+            if not symbols:
+                return {"error": "No symbols provided."}
+            try:
+                return self.bulk_history(
+                    symbols,
+                    period=api_params.get("period", "5d"),
+                    interval=api_params.get("interval", "1d"),
+                )
+            except Exception as e:
+                return {"error": str(e)}
         ticker = api_params.get("symbol") or api_params.get("ticker")
         if not ticker:
             return {"error": "No ticker provided."}
@@ -24,8 +45,7 @@ class YFinanceTool:
             elif function_name == "history":
                 period = api_params.get("period", "5d")
                 interval = api_params.get("interval", "1d")
-                hist = stock.history(period=period, interval=interval)
-                return hist.reset_index().to_dict(orient="records")
+                return self.store.history(ticker, period=period, interval=interval)
             elif function_name == "news":
                 num_articles = api_params.get("num_articles", 5)
                 news = stock.news[:num_articles]
@@ -54,7 +74,8 @@ class YFinanceAgent(Agent):
         super().__init__(name="YFinanceAgent", llm_model=None, tools=[yfinance_tool])
 
     def _extract_parameters(self, query: str):
-        # Simple extraction: expects queries like "price AAPL", "history TSLA 1mo 1d", "news MSFT 10"
+        # Simple extraction: expects queries like "price AAPL", "history TSLA 1mo 1d", "news MSFT 10".
+        # "history AAPL,MSFT,TSLA 1mo 1d" fetches all symbols in one batched download.
         tokens = query.strip().split()
         if not tokens:
             return {"error": "Empty query."}
@@ -64,7 +85,10 @@ class YFinanceAgent(Agent):
         params = {}
         if len(tokens) > 1:
             params["symbol"] = tokens[1].upper()
-        if function == "history":
+        if function == "history" and "," in params.get("symbol", ""):
+            function = "bulk_history"
+            params["symbols"] = [s for s in params.pop("symbol").split(",") if s]
+        if function in ("history", "bulk_history"):
             if len(tokens) > 2:
                 params["period"] = tokens[2]
             if len(tokens) > 3:
@@ -90,7 +114,8 @@ class YFinanceAgent(Agent):
         result = tool.execute(function, params)
         # Optionally save result
         try:
-            filename = f"{function}_{params.get('symbol','unknown')}_{datetime.datetime.now().strftime('%Y%m%d')}.json"
+            symbol = params.get("symbol") or "-".join(params.get("symbols", [])) or "unknown"
+            filename = f"{function}_{symbol}_{datetime.datetime.now().strftime('%Y%m%d')}.json"
             filepath = self.results_dir / filename
             with open(filepath, "w", encoding="utf-8") as f:
                 json.dump(result, f, indent=2)
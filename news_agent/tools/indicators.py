@@ -0,0 +1,265 @@
+# indicators.py
+"""
+Technical indicators over OhlcvStore history, computed locally with NumPy/pandas.
+
+`technical_indicators` is the function behind market_data_agent's
+`technical_indicators` tool: history for all requested symbols comes from the
+store in one batched download (or straight from disk when current), and every
+indicator is computed for all symbols at once on (bars x symbols) frames. Each
+symbol's bars are right-aligned by bar position rather than by date, so
+symbols with different trading calendars (e.g. BTC-USD next to AAPL) do not
+leave gaps in each other's windows.
+
+The indicator functions take a DataFrame (one column per symbol) or a Series
+and return the same shape, so other tools (e.g. the trading analyst's
+backtester) can reuse them.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from .yfinance_tool import _store
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+# --- Indicators ---
+def sma(values, window):
+    return values.rolling(window, min_periods=window).mean()
+
+
+def ema(values, span):
+    return values.ewm(span=span, adjust=False, min_periods=span).mean()
+
+
+def _wilder(values, window):
+    return values.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+
+def rsi(close, window=14):
+    """Wilder's relative strength index (0-100)."""
+    delta = close.diff()
+    gain = _wilder(delta.clip(lower=0), window)
+    loss = _wilder(-delta.clip(upper=0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100 - 100 / (1 + gain / loss)
+    # No losses in the window: RSI is 100 (50 when the price did not move at all).
+    return strength.where(loss != 0, np.where(gain > 0, 100.0, 50.0)).where(gain.notna())
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd line, signal line, histogram)."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False, min_periods=signal).mean()
+    return line, signal_line, line - signal_line
+
+
+def atr(high, low, close, window=14):
+    """Wilder's average true range."""
+    previous_close = close.shift(1)
+    true_range = np.maximum(high - low, np.maximum((high - previous_close).abs(), (low - previous_close).abs()))
+    # The first bar has no previous close; its range is high - low.
+    true_range = true_range.where(previous_close.notna(), high - low)
+    return _wilder(true_range, window)
+
+
+def bollinger(close, window=20, num_std=2.0):
+    """Returns (upper, middle, lower) bands."""
+    middle = sma(close, window)
+    deviation = close.rolling(window, min_periods=window).std(ddof=0)
+    return middle + num_std * deviation, middle, middle - num_std * deviation
+
+
+def volume_profile(high, low, close, volume, bins=20, value_area=0.7):
+    """
+    Volume by price for one symbol (NumPy arrays): the typical price of every
+    bar is binned and the bin volumes summed. Returns the point of control
+    (the busiest price level) and the value area holding `value_area` of the
+    volume around it, or None without volume.
+    """
+    typical = (high + low + close) / 3
+    valid = np.isfinite(typical) & np.isfinite(volume)
+    typical, volume = typical[valid], volume[valid]
+    if typical.size == 0 or volume.sum() <= 0:
+        return None
+    counts, edges = np.histogram(typical, bins=bins, weights=volume)
+    centers = (edges[:-1] + edges[1:]) / 2
+    poc = int(np.argmax(counts))
+    low_bin = high_bin = poc
+    covered, target = counts[poc], value_area * counts.sum()
+    # Grow the value area one bin at a time towards the busier neighbour.
+    while covered < target and (low_bin > 0 or high_bin < len(counts) - 1):
+        below = counts[low_bin - 1] if low_bin > 0 else -1
+        above = counts[high_bin + 1] if high_bin < len(counts) - 1 else -1
+        if above >= below:
+            high_bin += 1
+            covered += above
+        else:
+            low_bin -= 1
+            covered += below
+    return {
+        "poc": centers[poc],
+        "value_area_low": edges[low_bin],
+        "value_area_high": edges[high_bin + 1],
+        "value_area_volume_pct": 100 * covered / counts.sum(),
+    }
+
+
+# --- Batch computation ---
+def aligned_frames(histories):
+    """
+    Turns {symbol: records} into {field: DataFrame} of shape (bars, symbols),
+    each symbol's bars right-aligned so the last row holds every symbol's
+    latest bar. Symbols without bars are left out.
+    """
+    histories = {symbol: bars for symbol, bars in histories.items() if bars}
+    length = max((len(bars) for bars in histories.values()), default=0)
+    frames = {}
+    for field in FIELDS:
+        data = np.full((length, len(histories)), np.nan)
+        for column, bars in enumerate(histories.values()):
+            data[length - len(bars):, column] = [bar.get(field, np.nan) for bar in bars]
+        frames[field] = pd.DataFrame(data, columns=list(histories))
+    return frames
+
+
+def _finite(value):
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _number(value, digits=4):
+    value = _finite(value)
+    return round(value, digits) if value is not None else None
+
+
+def _pct(value, base):
+    """Percent change from `base` to `value`."""
+    value, base = _finite(value), _finite(base)
+    return _number(100 * (value / base - 1), 2) if value is not None and base else None
+
+
+def summarize(histories, volume_bins=20):
+    """
+    Computes the indicator summary of every symbol in {symbol: records}.
+    Returns {symbol: summary}; a symbol without bars gets {"error": ...}.
+    """
+    summaries = {symbol: {"error": "No price history."} for symbol, bars in histories.items() if not bars}
+    if len(summaries) == len(histories):
+        return summaries
+    frames = aligned_frames(histories)
+    high, low, close, volume = frames["High"], frames["Low"], frames["Close"], frames["Volume"]
+    macd_line, signal_line, histogram = macd(close)
+    upper, middle, lower = bollinger(close)
+    # The latest value of every indicator, one Series indexed by symbol each.
+    latest = {
+        "sma_20": sma(close, 20), "sma_50": sma(close, 50), "sma_200": sma(close, 200),
+        "ema_12": ema(close, 12), "ema_26": ema(close, 26),
+        "rsi_14": rsi(close), "atr_14": atr(high, low, close), "volume_avg_20": sma(volume, 20),
+        "macd": macd_line, "macd_signal": signal_line, "macd_histogram": histogram,
+        "bb_upper": upper, "bb_middle": middle, "bb_lower": lower,
+    }
+    latest = {name: frame.iloc[-1].to_dict() for name, frame in latest.items()}
+    # A MACD cross within the last 3 bars: the histogram changed sign.
+    recent_sign = np.sign(histogram.iloc[-4:])
+    crossed_up = ((recent_sign.shift(1) < 0) & (recent_sign > 0)).any().to_dict()
+    crossed_down = ((recent_sign.shift(1) > 0) & (recent_sign < 0)).any().to_dict()
+    arrays = {field: frame.to_numpy().T for field, frame in frames.items()}
+
+    for column, symbol in enumerate(close.columns):
+        bars = histories[symbol]
+        high_values, low_values, close_values, volume_values = (
+            arrays[field][column] for field in ("High", "Low", "Close", "Volume")
+        )
+        closes = close_values[len(close_values) - len(bars):]
+        value = {name: _finite(values[symbol]) for name, values in latest.items()}
+        last_close, last_volume = closes[-1], _finite(volume_values[-1])
+        middle_band, average_volume, average_range = value["bb_middle"], value["volume_avg_20"], value["atr_14"]
+        band_width = value["bb_upper"] - value["bb_lower"] if middle_band is not None else None
+        profile = volume_profile(high_values, low_values, close_values, volume_values, bins=volume_bins)
+        summary = {
+            "as_of": bars[-1].get("Datetime", bars[-1].get("Date")),
+            "bars": len(bars),
+            "last_close": _number(last_close),
+            "change_pct": {f"{n}_bars": _pct(last_close, closes[-1 - n]) if len(closes) > n else None for n in (1, 5, 20)},
+            "sma": {str(n): _number(value[f"sma_{n}"]) for n in (20, 50, 200)},
+            "price_vs_sma_pct": {str(n): _pct(last_close, value[f"sma_{n}"]) for n in (20, 50, 200)},
+            "ema": {str(n): _number(value[f"ema_{n}"]) for n in (12, 26)},
+            "rsi_14": _number(value["rsi_14"], 2),
+            "macd": {
+                "macd": _number(value["macd"]),
+                "signal": _number(value["macd_signal"]),
+                "histogram": _number(value["macd_histogram"]),
+                "cross": "bullish" if crossed_up[symbol] else "bearish" if crossed_down[symbol] else None,
+            },
+            "atr_14": _number(average_range),
+            "atr_pct": _number(100 * average_range / last_close, 2) if average_range is not None and last_close else None,
+            "bollinger": {
+                "upper": _number(value["bb_upper"]),
+                "middle": _number(middle_band),
+                "lower": _number(value["bb_lower"]),
+                "percent_b": _number((last_close - value["bb_lower"]) / band_width, 3) if band_width else None,
+                "bandwidth_pct": _number(100 * band_width / middle_band, 2) if band_width and middle_band else None,
+            },
+            "volume": {
+                "last": _number(last_volume, 0),
+                "avg_20": _number(average_volume, 0),
+                "ratio": _number(last_volume / average_volume, 2) if last_volume is not None and average_volume else None,
+            },
+            "volume_profile": {key: _number(v, 2) for key, v in profile.items()} if profile else None,
+        }
+        summary["signals"] = _signals(summary)
+        summaries[symbol] = summary
+    return {symbol: summaries[symbol] for symbol in histories}
+
+
+def _signals(summary):
+    """Short labels for the notable readings in a summary."""
+    signals = []
+    rsi_value = summary["rsi_14"]
+    if rsi_value is not None and rsi_value >= 70:
+        signals.append("rsi_overbought")
+    elif rsi_value is not None and rsi_value <= 30:
+        signals.append("rsi_oversold")
+    if summary["macd"]["cross"]:
+        signals.append(f"macd_{summary['macd']['cross']}_cross")
+    for window in ("50", "200"):
+        distance = summary["price_vs_sma_pct"][window]
+        if distance is not None:
+            signals.append(f"{'above' if distance >= 0 else 'below'}_sma_{window}")
+    sma_50, sma_200 = summary["sma"]["50"], summary["sma"]["200"]
+    if sma_50 is not None and sma_200 is not None:
+        signals.append("sma_50_above_200" if sma_50 >= sma_200 else "sma_50_below_200")
+    percent_b = summary["bollinger"]["percent_b"]
+    if percent_b is not None and percent_b > 1:
+        signals.append("above_upper_band")
+    elif percent_b is not None and percent_b < 0:
+        signals.append("below_lower_band")
+    ratio = summary["volume"]["ratio"]
+    if ratio is not None and ratio >= 2:
+        signals.append("volume_spike")
+    return signals
+
+
+def technical_indicators(tickers: str, period: str = "1y", interval: str = "1d"):
+    """
+    Computes technical indicators for one or many symbols from cached price history.
+    Args:
+        tickers (str): One symbol or a comma-separated list (e.g. "AAPL" or "AAPL,MSFT,BTC-USD").
+        period (str): History to compute over (e.g. "6mo", "1y"); SMA 200 needs about a year of daily bars.
+        interval (str): Bar interval (e.g. "1d", "1h").
+    Returns:
+        dict: {symbol: {"last_close", "change_pct", "sma", "price_vs_sma_pct", "ema", "rsi_14", "macd",
+        "atr_14", "atr_pct", "bollinger", "volume", "volume_profile", "signals"}}.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in tickers.split(",") if s.strip()))
+    if not symbols:
+        return {"error": "No ticker provided."}
+    try:
+        histories = _store.history_many(symbols, period=period, interval=interval)
+    except Exception as e:
+        return {"error": str(e)}
+    return summarize(histories)
@@ -0,0 +1,305 @@
+# ohlcv_store.py
+"""
+Local incremental OHLCV store behind YFinanceTool history.
+
+Bars are kept in one SQLite file per symbol and interval. The store remembers
+which range it already covers and when it last synced, so a repeated request
+is answered from disk and only the missing head or tail is downloaded from
+Yahoo Finance. If Yahoo is unreachable (or OHLCV_OFFLINE is set) whatever is
+on disk is served.
+
+Prices are split- and dividend-adjusted, as yfinance returns them by default.
+A dividend or split in newly downloaded bars changes the adjusted prices of
+every earlier bar, so the symbol's stored range is then downloaded again.
+"""
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.getenv(
+    "OHLCV_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ohlcv"),
+)
+# How long a synced tail is considered current before the next request re-fetches it.
+REFRESH_SECONDS = int(os.getenv("OHLCV_REFRESH_SECONDS", "300"))
+OFFLINE = os.getenv("OHLCV_OFFLINE", "").lower() in ("1", "on", "true", "yes")
+
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400, "1h": 3600,
+    "1d": 86400, "5d": 5 * 86400, "1wk": 7 * 86400, "1mo": 30 * 86400, "3mo": 90 * 86400,
+}
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def period_start(period: str, now=None):
+    """
+    Translates a yfinance period ("5d", "1mo", "ytd", "max", ...) into
+    (start_datetime, trading_days). trading_days is set for "Nd" periods, which
+    yfinance counts in trading days, so callers can trim to the last N sessions.
+    start_datetime is None for "max".
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if period == "max":
+        return None, None
+    if period == "ytd":
+        return datetime.datetime(now.year, 1, 1, tzinfo=datetime.timezone.utc), None
+    match = _PERIOD_RE.match(period or "")
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # Pad for weekends and holidays; the result is trimmed to `count` sessions.
+        return now - datetime.timedelta(days=count * 7 // 5 + 4), count
+    days = {"wk": 7, "mo": 31, "y": 366}[unit] * count
+    return now - datetime.timedelta(days=days), None
+
+
+class OhlcvStore:
+    """
+    SQLite-backed bar store, one database per (symbol, interval).
+    Thread-safe; every operation opens a short-lived connection.
+    """
+    def __init__(self, root=STORE_DIR, refresh_seconds=REFRESH_SECONDS, offline=OFFLINE):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self.offline = offline
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # --- Storage ---
+    def _path(self, symbol, interval):
+        safe_symbol = re.sub(r"[^A-Za-z0-9._=-]", "_", symbol.upper())
+        return os.path.join(self.root, f"{safe_symbol}_{interval}.sqlite")
+
+    def _lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _connect(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bars ("
+            " ts INTEGER PRIMARY KEY, label TEXT, open REAL, high REAL, low REAL,"
+            " close REAL, volume REAL, dividends REAL, splits REAL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        return conn
+
+    @staticmethod
+    def _meta(conn):
+        return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+    @staticmethod
+    def _set_meta(conn, **values):
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()])
+
+    @staticmethod
+    def _upsert(conn, rows):
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _new_actions(conn, rows, last_ts):
+        """True if `rows` hold a dividend or split from the last stored bar on that is not stored yet."""
+        stored = {ts for ts, in conn.execute(
+            "SELECT ts FROM bars WHERE ts >= ? AND (dividends != 0 OR splits != 0)", (last_ts,)
+        )}
+        return any(row[0] >= last_ts and (row[7] or row[8]) and row[0] not in stored for row in rows)
+
+    # --- Yahoo Finance ---
+    @staticmethod
+    def frame_to_rows(frame):
+        """Converts a yfinance history DataFrame into bar tuples for the bars table."""
+        frame = frame.reindex(columns=COLUMNS).dropna(subset=["Close"]).fillna(0.0)
+        return [
+            (int(index.timestamp()), index.isoformat(), *(float(v) for v in values))
+            for index, values in zip(frame.index, frame.itertuples(index=False))
+        ]
+
+    @staticmethod
+    def _download_many(symbols, interval, start=None):
+        """One batched yf.download for all symbols; returns {symbol: history DataFrame}."""
+        import yfinance as yf
+
+        kwargs = {"period": "max"} if start is None else {"start": start}
+        frame = yf.download(
+            tickers=list(symbols), interval=interval, group_by="ticker", auto_adjust=True,
+            actions=True, threads=True, progress=False, **kwargs,
+        )
+        if getattr(frame.columns, "nlevels", 1) == 1:
+            return {symbols[0]: frame}
+        present = set(frame.columns.get_level_values(0))
+        return {symbol: frame[symbol] for symbol in symbols if symbol in present}
+
+    @staticmethod
+    def _download(symbol, interval, start=None):
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is None:
+            return ticker.history(period="max", interval=interval, auto_adjust=True, actions=True)
+        return ticker.history(start=start, interval=interval, auto_adjust=True, actions=True)
+
+    # --- Public API ---
+    def _plan_fetch(self, meta, last_ts, start, interval, now):
+        """
+        Returns the start datetime to download from (None meaning "max"), or
+        False when the stored bars already cover the request.
+        """
+        refresh_seconds = min(self.refresh_seconds, INTERVAL_SECONDS.get(interval, self.refresh_seconds))
+        covered_from = meta.get("covered_from") if meta.get("prices") == "adjusted" else None
+        if covered_from is None:
+            return start
+        if covered_from != "max" and (start is None or start.timestamp() < float(covered_from)):
+            return start
+        if now.timestamp() - float(meta.get("fetched_at", 0)) > refresh_seconds:
+            # Re-fetch from the last stored bar: it may have been incomplete when stored.
+            return datetime.datetime.fromtimestamp(last_ts, datetime.timezone.utc) if last_ts else start
+        return False
+
+    def pending_fetch(self, symbol, period="5d", interval="1d"):
+        """Returns where a sync of `symbol` would download from (None meaning "max"), or False if it is current."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start, _ = period_start(period, now)
+        path = self._path(symbol, interval)
+        with self._lock(path):
+            conn = self._connect(path)
+            try:
+                last_ts = conn.execute("SELECT MAX(ts) FROM bars").fetchone()[0]
+                return self._plan_fetch(self._meta(conn), last_ts, start, interval, now)
+            finally:
+                conn.close()
+
+    def sync(self, symbol, period="5d", interval="1d", rows_fetcher=None):
+        """
+        Makes sure the store covers `period` for `symbol`, downloading only what is missing.
+        `rows_fetcher(symbol, interval, start)` may be passed to supply bars from a
+        different source (e.g. a batched download); it returns bar tuples.
+        Returns True if the store was updated.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        start, _ = period_start(period, now)
+        path = self._path(symbol, interval)
+        with self._lock(path):
+            conn = self._connect(path)
+            try:
+                meta = self._meta(conn)
+                last_ts = conn.execute("SELECT MAX(ts) FROM bars").fetchone()[0]
+                fetch_from = self._plan_fetch(meta, last_ts, start, interval, now)
+                if fetch_from is False or self.offline:
+                    return False
+                if rows_fetcher is not None:
+                    rows = rows_fetcher(symbol, interval, fetch_from)
+                else:
+                    rows = self.frame_to_rows(self._download(symbol, interval, fetch_from))
+                if meta.get("prices") != "adjusted":
+                    # Bars stored before prices were adjusted are replaced.
+                    conn.execute("DELETE FROM bars")
+                    meta.pop("covered_from", None)
+                elif last_ts is not None and self._new_actions(conn, rows, last_ts):
+                    # A new dividend or split re-adjusts every stored bar: download the whole range again.
+                    covered_from = meta.get("covered_from")
+                    if covered_from != "max" and fetch_from is not None:
+                        covered_start = datetime.datetime.fromtimestamp(float(covered_from), datetime.timezone.utc)
+                        fetch_from = min(fetch_from, covered_start)
+                    else:
+                        fetch_from = None
+                    logger.info(f"OHLCV: corporate action for {symbol} {interval}, re-downloading stored bars")
+                    rows = self.frame_to_rows(self._download(symbol, interval, fetch_from))
+                    conn.execute("DELETE FROM bars")
+                self._upsert(conn, rows)
+                covered_from = meta.get("covered_from")
+                if fetch_from is None:
+                    covered_from = "max"
+                elif covered_from is None or (covered_from != "max" and fetch_from.timestamp() < float(covered_from)):
+                    covered_from = fetch_from.timestamp()
+                self._set_meta(conn, covered_from=covered_from, fetched_at=time.time(), prices="adjusted")
+                conn.commit()
+                return True
+            finally:
+                conn.close()
+
+    def read(self, symbol, period="5d", interval="1d"):
+        """Returns the stored bars for `period` as yfinance-style records, without any network access."""
+        start, trading_days = period_start(period)
+        path = self._path(symbol, interval)
+        with self._lock(path):
+            conn = self._connect(path)
+            try:
+                rows = conn.execute(
+                    "SELECT ts, label, open, high, low, close, volume, dividends, splits FROM bars WHERE ts >= ? ORDER BY ts",
+                    (int(start.timestamp()) if start else 0,),
+                ).fetchall()
+            finally:
+                conn.close()
+        if trading_days:
+            sessions = sorted({label[:10] for _, label, *_ in rows})[-trading_days:]
+            rows = [row for row in rows if row[1][:10] >= sessions[0]] if sessions else []
+        time_key = "Datetime" if interval in INTRADAY_INTERVALS else "Date"
+        return [{time_key: label, **dict(zip(COLUMNS, values))} for _, label, *values in rows]
+
+    def history(self, symbol, period="5d", interval="1d"):
+        """
+        Returns bars for `period` as a list of records with the same keys as
+        yfinance's history().reset_index(). Falls back to the stored bars when
+        Yahoo Finance cannot be reached.
+        """
+        try:
+            self.sync(symbol, period=period, interval=interval)
+        except Exception as e:
+            records = self.read(symbol, period=period, interval=interval)
+            if not records:
+                raise
+            logger.warning(f"OHLCV sync failed for {symbol} {interval}, serving stored bars: {e}")
+            return records
+        return self.read(symbol, period=period, interval=interval)
+
+    def history_many(self, symbols, period="5d", interval="1d", as_frame=False):
+        """
+        Bulk variant of history(). Every symbol that needs new bars is fetched in
+        a single batched download starting at the earliest missing bar; current
+        symbols are read straight from disk.
+        Returns {symbol: records}, or with as_frame=True one DataFrame aligned on
+        time with (symbol, field) columns.
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+        if not self.offline:
+            pending = {}
+            for symbol in symbols:
+                fetch_from = self.pending_fetch(symbol, period=period, interval=interval)
+                if fetch_from is not False:
+                    pending[symbol] = fetch_from
+            if pending:
+                starts = list(pending.values())
+                start = None if None in starts else min(starts)
+                try:
+                    frames = self._download_many(list(pending), interval, start)
+                except Exception as e:
+                    logger.warning(f"Batched OHLCV download failed for {list(pending)}, serving stored bars: {e}")
+                    frames = {}
+                for symbol, frame in frames.items():
+                    rows = self.frame_to_rows(frame)
+                    self.sync(symbol, period=period, interval=interval, rows_fetcher=lambda *_, rows=rows: rows)
+
+        records = {symbol: self.read(symbol, period=period, interval=interval) for symbol in symbols}
+        if not as_frame:
+            return records
+
+        import pandas as pd
+
+        time_key = "Datetime" if interval in INTRADAY_INTERVALS else "Date"
+        frames = {
+            symbol: pd.DataFrame(rows).set_index(time_key)
+            for symbol, rows in records.items() if rows
+        }
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
@@ -0,0 +1,51 @@
+# yfinance_tool.py
+"""
+The `query_yfinance` function behind market_data_agent's tool.
+History for one or many symbols comes from the local OhlcvStore in a single
+batched download; the latest price and volume are taken from the last bar
+instead of a separate quote request.
+"""
+from .ohlcv_store import OhlcvStore
+
+_store = OhlcvStore()
+
+
+def query_yfinance(ticker_or_term: str, period: str = "5d", interval: str = "1d", num_articles: int = 5):
+    """
+    Fetches price, volume, history and news from Yahoo Finance.
+    Args:
+        ticker_or_term (str): One symbol or a comma-separated list (e.g. "CL=F" or "AAPL,MSFT,BTC-USD").
+        period (str): Period of historical data to fetch (e.g. "7d", "1mo").
+        interval (str): Interval between data points (e.g. "1d", "1h").
+        num_articles (int): Number of news headlines per symbol.
+    Returns:
+        dict: {symbol: {"price", "volume", "history", "news"}}.
+    """
+    import yfinance as yf
+
+    symbols = [s.strip().upper() for s in ticker_or_term.split(",") if s.strip()]
+    if not symbols:
+        return {"error": "No ticker provided."}
+    try:
+        histories = _store.history_many(symbols, period=period, interval=interval)
+    except Exception as e:
+        return {"error": str(e)}
+
+    result = {}
+    for symbol in symbols:
+        history = histories.get(symbol) or []
+        last_bar = history[-1] if history else {}
+        try:
+            news = [
+                {"title": item.get("title"), "link": item.get("link"), "publisher": item.get("publisher")}
+                for item in (yf.Ticker(symbol).news or [])[:num_articles]
+            ]
+        except Exception as e:
+            news = {"error": str(e)}
+        result[symbol] = {
+            "price": last_bar.get("Close"),
+            "volume": last_bar.get("Volume"),
+            "history": history,
+            "news": news,
+        }
+    return result
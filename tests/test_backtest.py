@@ -0,0 +1,64 @@
+"""Backtest simulation and statistics (financial_advisor/backtest.py) on synthetic prices."""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from financial_advisor import backtest  # noqa: E402
+
+
+def _frames(closes):
+    return {"Close": pd.DataFrame({"X": closes}, dtype=float)}
+
+
+def _positions(values):
+    return pd.DataFrame({"X": values}, dtype=float)
+
+
+def test_position_earns_the_next_bar_return():
+    frames = _frames([100, 110, 99, 99])
+    # Long decided on the close of bar 1 only: it earns bar 2 (-10%), not bar 1 (+10%).
+    returns = backtest.simulate(frames, _positions([0, 1, 0, 0]), cost_bps=0)["X"]
+    assert math.isnan(returns[0])
+    assert list(returns[1:]) == pytest.approx([0.0, -0.1, 0.0])
+
+
+def test_costs_are_charged_per_unit_of_turnover():
+    frames = _frames([100, 100, 100, 100])
+    returns = backtest.simulate(frames, _positions([1, 1, 0, 0]), cost_bps=10)["X"]
+    # Entry on bar 1 and exit on bar 3, 10 bps each.
+    assert list(returns[1:]) == pytest.approx([-0.001, 0.0, -0.001])
+
+
+def test_performance_of_a_steady_gain():
+    returns = pd.DataFrame({"X": [np.nan] + [0.01] * 10})
+    positions = _positions([1] * 11)
+    stats = backtest.performance(returns, positions, {"X": 2.0})["X"]
+    total = 1.01 ** 10
+    assert stats["total_return_pct"] == pytest.approx(100 * (total - 1), abs=0.01)
+    assert stats["cagr_pct"] == pytest.approx(100 * (total ** 0.5 - 1), abs=0.01)
+    assert stats["max_drawdown_pct"] == 0
+    assert stats["volatility_pct"] == 0
+    assert stats["exposure_pct"] == 100
+    assert stats["trades"] == 1
+
+
+def test_performance_drawdown_and_sharpe():
+    bar_returns = [0.1, -0.2, 0.05, 0.1]
+    returns = pd.DataFrame({"X": [np.nan] + bar_returns})
+    stats = backtest.performance(returns, _positions([1] * 5), {"X": 1.0})["X"]
+    # Equity 1.1, 0.88, 0.924, 1.0164: the trough is 20% below the peak.
+    assert stats["max_drawdown_pct"] == pytest.approx(-20.0)
+    sharpe = np.mean(bar_returns) / np.std(bar_returns, ddof=1) * math.sqrt(4)
+    assert stats["sharpe"] == pytest.approx(sharpe, abs=0.01)
+
+
+def test_parse_grid():
+    assert backtest.parse_grid("fast=10,20; slow=50") == [{"fast": 10, "slow": 50}, {"fast": 20, "slow": 50}]
+    assert backtest.parse_grid("") == [{}]
+    with pytest.raises(ValueError, match="No values given for 'slow'"):
+        backtest.parse_grid("fast=10; slow=")
+    with pytest.raises(ValueError):
+        backtest.parse_grid("fast=ten")
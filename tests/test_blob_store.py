@@ -0,0 +1,30 @@
+"""Blob writes, references and pruning of logs/blob_store.py."""
+import os
+
+from logs.blob_store import BlobStore, blob_ref, main, rehydrate_text
+
+
+def test_put_after_prune_rewrites_the_blob(tmp_path):
+    log_path = tmp_path / "agent.log"
+    store = BlobStore(str(tmp_path / "blobs"))
+    instruction = "You are a financial analyst. " * 40
+    # Written at process start; its only referencing segment is then gone.
+    digest = store.put(instruction)
+    log_path.write_text("")
+    assert main(["prune", str(log_path)]) == 0
+    assert not os.path.exists(store.path(digest))
+
+    record = blob_ref(instruction, store)
+    log_path.write_text(record + "\n")
+    assert os.path.exists(store.path(digest))
+    assert rehydrate_text(record, BlobStore(str(tmp_path / "blobs"))) == instruction
+
+
+def test_prune_keeps_referenced_blobs(tmp_path):
+    log_path = tmp_path / "agent.log"
+    store = BlobStore(str(tmp_path / "blobs"))
+    kept, dropped = store.put("kept"), store.put("dropped")
+    log_path.write_text(f"<blob sha256:{kept}>\n")
+    (tmp_path / "agent.log.1").write_text("")
+    assert main(["prune", str(log_path)]) == 0
+    assert store.digests() == {kept}
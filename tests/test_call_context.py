@@ -0,0 +1,28 @@
+"""Session attribution in MODELS/call_context.py."""
+from types import SimpleNamespace
+
+from MODELS.call_context import call_info, root_session_after_agent, root_session_before_agent
+
+
+def _context(invocation_id, session_id, agent_name="agent"):
+    invocation = SimpleNamespace(session=SimpleNamespace(id=session_id), user_id="user", agent=agent_name)
+    return SimpleNamespace(invocation_id=invocation_id, agent_name=agent_name, _invocation_context=invocation)
+
+
+def test_call_info_without_root_session():
+    info = call_info(_context("inv", "session"))
+    assert info == ("session", "session", "user", "agent")
+
+
+def test_sub_agent_calls_are_booked_to_the_root_session():
+    coordinator, sub_agent = _context("inv-1", "root", "coordinator"), _context("inv-2", "child", "analyst")
+    root_session_before_agent(callback_context=coordinator)
+    root_session_before_agent(callback_context=sub_agent)
+    info = call_info(sub_agent)
+    assert (info.session_id, info.root_session_id) == ("child", "root")
+
+    root_session_after_agent(callback_context=sub_agent)
+    assert call_info(sub_agent).root_session_id == "root"
+    root_session_after_agent(callback_context=coordinator)
+    # The next run in this task starts a root session of its own.
+    assert call_info(_context("inv-3", "next")).root_session_id == "next"
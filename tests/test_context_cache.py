@@ -0,0 +1,110 @@
+"""Cache handle lifecycle in MODELS/context_cache.py."""
+import threading
+
+import pytest
+
+from MODELS import context_cache
+from MODELS.context_cache import ContextCacheManager, InMemoryCacheBackend
+
+INSTRUCTION = "You are a careful financial analyst. " * 20
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(context_cache.time, "time", lambda: now[0])
+    return now
+
+
+def _manager(backend=None, **kwargs):
+    options = {"ttl_seconds": 600, "refresh_margin_seconds": 60, "min_tokens": 0, "min_uses": 1, **kwargs}
+    return ContextCacheManager(backend or InMemoryCacheBackend(), **options)
+
+
+def test_create_then_reuse(clock):
+    manager = _manager()
+    name = manager.handle_for("gemini-2.5-pro", INSTRUCTION)
+    assert name == "cachedContents/local-1"
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) == name
+    assert manager.backend.calls == [("create", name)]
+    assert manager.stats == {"hits": 1, "creates": 1, "refreshes": 0, "failures": 0}
+    # Another model or instruction gets a cache of its own.
+    assert manager.handle_for("gemini-2.5-flash", INSTRUCTION) != name
+
+
+def test_instruction_is_cached_after_min_uses():
+    manager = _manager(min_uses=2)
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) is None
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) is not None
+
+
+def test_short_instruction_is_sent_inline():
+    assert _manager(min_tokens=1024).handle_for("gemini-2.5-pro", "Be brief.") is None
+
+
+def test_refresh_before_expiry(clock):
+    manager = _manager()
+    name = manager.handle_for("gemini-2.5-pro", INSTRUCTION)
+    clock[0] += 570
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) == name
+    assert manager.backend.calls == [("create", name), ("refresh", name)]
+    # The TTL was extended, so the handle is still live past its first expiry.
+    clock[0] += 100
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) == name
+    assert manager.stats["refreshes"] == 1
+
+
+def test_expired_handle_is_recreated(clock):
+    manager = _manager()
+    first = manager.handle_for("gemini-2.5-pro", INSTRUCTION)
+    clock[0] += 601
+    second = manager.handle_for("gemini-2.5-pro", INSTRUCTION)
+    assert second != first
+    assert manager.stats["creates"] == 2
+
+
+def test_failed_refresh_falls_back_inline(clock):
+    manager = _manager()
+    name = manager.handle_for("gemini-2.5-pro", INSTRUCTION)
+    manager.backend.caches.clear()
+    clock[0] += 570
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) is None
+    assert manager.stats["failures"] == 1
+    # The broken handle is dropped and a new cache is created on the next call.
+    assert manager.handle_for("gemini-2.5-pro", INSTRUCTION) not in (None, name)
+
+
+class _SlowBackend(InMemoryCacheBackend):
+    """Holds uploads for one model until released."""
+    def __init__(self, slow_model):
+        super().__init__()
+        self.slow_model = slow_model
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def create(self, model, *args):
+        if model == self.slow_model:
+            self.started.set()
+            self.release.wait(5)
+        return super().create(model, *args)
+
+
+def test_concurrent_requests_share_one_upload():
+    backend = _SlowBackend("gemini-2.5-pro")
+    manager = _manager(backend)
+    names = []
+    threads = [
+        threading.Thread(target=lambda: names.append(manager.handle_for("gemini-2.5-pro", INSTRUCTION)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    assert backend.started.wait(5)
+    # The upload in flight does not hold up other instructions.
+    assert manager.handle_for("gemini-2.5-flash", INSTRUCTION) is not None
+    backend.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(names) == 4 and len(set(names)) == 1
+    creates = [call for call in backend.calls if call[0] == "create"]
+    assert len(creates) == 2 and ("create", names[0]) in creates
@@ -0,0 +1,104 @@
+"""Indicator engine (news_agent/tools/indicators.py) against hand-computed values."""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from news_agent.tools import indicators  # noqa: E402
+
+
+def assert_series(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        if e is None:
+            assert math.isnan(a)
+        else:
+            assert a == pytest.approx(e)
+
+
+def test_rsi_uses_wilder_smoothing():
+    # Gains 1, 1, 0, 1 and losses 0, 0, 1, 0 smoothed with alpha 1/2:
+    # avg gain 1, 1, 0.5, 0.75 and avg loss 0, 0, 0.5, 0.25.
+    close = pd.Series([1.0, 2.0, 3.0, 2.0, 3.0])
+    assert_series(indicators.rsi(close, window=2), [None, None, 100.0, 50.0, 75.0])
+
+
+def test_rsi_of_a_flat_series_is_50():
+    assert_series(indicators.rsi(pd.Series([5.0] * 5), window=2), [None, None, 50.0, 50.0, 50.0])
+
+
+def test_macd_line_signal_and_histogram():
+    # EMA(1) is the series itself; EMA(2) (alpha 2/3) of 0, 3, 6 is 0, 2, 14/3.
+    line, signal, histogram = indicators.macd(pd.Series([0.0, 3.0, 6.0]), fast=1, slow=2, signal=2)
+    assert_series(line, [None, 1.0, 4 / 3])
+    # Signal EMA(2) of 1, 4/3 is 1, 11/9; it needs two values.
+    assert_series(signal, [None, None, 11 / 9])
+    assert_series(histogram, [None, None, 4 / 3 - 11 / 9])
+
+
+def test_atr_uses_true_range_and_wilder_smoothing():
+    high, low, close = pd.Series([10.0, 12.0, 11.0]), pd.Series([8.0, 9.0, 7.0]), pd.Series([9.0, 11.0, 8.0])
+    # True ranges 2 (high - low), 3 (high - previous close), 4 (previous close - low).
+    assert_series(indicators.atr(high, low, close, window=2), [None, 2.5, 3.25])
+
+
+def test_bollinger_bands_use_population_deviation():
+    upper, middle, lower = indicators.bollinger(pd.Series([1.0, 2.0, 3.0, 4.0]), window=3, num_std=1.0)
+    deviation = math.sqrt(2 / 3)
+    assert_series(middle, [None, None, 2.0, 3.0])
+    assert_series(upper, [None, None, 2.0 + deviation, 3.0 + deviation])
+    assert_series(lower, [None, None, 2.0 - deviation, 3.0 - deviation])
+
+
+def test_volume_profile_point_of_control_and_value_area():
+    prices = np.array([1.0, 2.0, 3.0])
+    profile = indicators.volume_profile(prices, prices, prices, np.array([3.0, 4.0, 3.0]), bins=3)
+    # Bins [1, 5/3), [5/3, 7/3), [7/3, 3] hold 3, 4 and 3; the value area grows from the middle bin upwards.
+    assert profile["poc"] == pytest.approx(2.0)
+    assert profile["value_area_low"] == pytest.approx(5 / 3)
+    assert profile["value_area_high"] == pytest.approx(3.0)
+    assert profile["value_area_volume_pct"] == pytest.approx(70.0)
+
+
+def test_volume_profile_without_volume():
+    prices = np.array([1.0, 2.0])
+    assert indicators.volume_profile(prices, prices, prices, np.zeros(2)) is None
+
+
+def _bars(closes, volumes):
+    return [
+        {"Date": f"2025-01-{i + 1:02d}", "Open": c, "High": c + 1, "Low": c - 1, "Close": c, "Volume": v}
+        for i, (c, v) in enumerate(zip(closes, volumes))
+    ]
+
+
+def test_summarize_rising_series():
+    closes = [float(c) for c in range(1, 31)]
+    summary = indicators.summarize({"UP": _bars(closes, [100.0] * 29 + [300.0])})["UP"]
+    assert summary["bars"] == 30
+    assert summary["as_of"] == "2025-01-30"
+    assert summary["last_close"] == 30.0
+    assert summary["change_pct"] == {"1_bars": 3.45, "5_bars": 20.0, "20_bars": 200.0}
+    assert summary["sma"] == {"20": 20.5, "50": None, "200": None}
+    assert summary["price_vs_sma_pct"]["20"] == 46.34
+    assert summary["rsi_14"] == 100.0
+    # Every true range is 2 (high - low, or high - previous close).
+    assert summary["atr_14"] == 2.0
+    assert summary["atr_pct"] == 6.67
+    assert summary["bollinger"]["middle"] == 20.5
+    # Average volume over the last 20 bars: (19 * 100 + 300) / 20 = 110.
+    assert summary["volume"] == {"last": 300.0, "avg_20": 110.0, "ratio": 2.73}
+    assert {"rsi_overbought", "volume_spike"} <= set(summary["signals"])
+
+
+def test_summarize_batches_symbols_independently():
+    long_bars = _bars([float(c) for c in range(1, 31)], [100.0] * 30)
+    short_bars = _bars([5.0, 4.0, 6.0], [10.0] * 3)
+    batch = indicators.summarize({"LONG": long_bars, "SHORT": short_bars, "NONE": []})
+    assert batch["LONG"] == indicators.summarize({"LONG": long_bars})["LONG"]
+    assert batch["SHORT"]["last_close"] == 6.0
+    assert batch["SHORT"]["sma"]["20"] is None
+    assert batch["NONE"] == {"error": "No price history."}
+    assert list(batch) == ["LONG", "SHORT", "NONE"]
@@ -0,0 +1,89 @@
+"""LLM call events of logs/instrumentation.py through the MODELS/hooks.py callback chains."""
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from MODELS.hooks import agent_callbacks  # noqa: E402
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def emit(self, record):
+        self.events.append(json.loads(str(record.msg)))
+
+
+def _context():
+    invocation = SimpleNamespace(session=SimpleNamespace(id="session"), user_id="user", agent=None)
+    return SimpleNamespace(invocation_id="inv", agent_name="analyst", _invocation_context=invocation, state={})
+
+
+def _request():
+    return LlmRequest(model="gemini-2.5-pro", contents=[types.Content(role="user", parts=[types.Part(text="AAPL?")])])
+
+
+def _answer(text):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+@pytest.fixture
+def log():
+    logger = logging.getLogger("tests.instrumentation")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = _Records()
+    logger.addHandler(handler)
+    yield logger, handler.events
+    logger.removeHandler(handler)
+
+
+def test_call_answered_before_the_model_is_logged(log):
+    logger, events = log
+
+    def cached_answer(callback_context, llm_request):
+        return _answer("cached analysis")
+
+    callbacks = agent_callbacks(before_model=[cached_answer], log=logger)
+    result = asyncio.run(callbacks["before_model_callback"](callback_context=_context(), llm_request=_request()))
+    assert result.content.parts[0].text == "cached analysis"
+    (event,) = [e for e in events if e["event_type"] == "llm_call"]
+    assert event["answered_by"] == "cached_answer"
+    assert event["output"] == "cached analysis"
+    assert event["input_prompt"] == "AAPL?"
+    assert event["session_id"] == "session"
+
+
+def test_call_without_usage_logs_the_token_estimate(log):
+    logger, events = log
+    callbacks = agent_callbacks(log=logger)
+    context = _context()
+    asyncio.run(callbacks["before_model_callback"](callback_context=context, llm_request=_request()))
+    asyncio.run(callbacks["after_model_callback"](callback_context=context, llm_response=_answer("Buy.")))
+    (event,) = [e for e in events if e["event_type"] == "llm_call"]
+    assert event["estimated"] is True
+    assert event["token_input"] > 0 and event["token_output"] > 0
+
+
+def test_thinking_tokens_are_logged_as_output(log):
+    logger, events = log
+    callbacks = agent_callbacks(log=logger)
+    context = _context()
+    response = _answer("Buy.")
+    response.usage_metadata = types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=12, candidates_token_count=3, thoughts_token_count=40
+    )
+    asyncio.run(callbacks["before_model_callback"](callback_context=context, llm_request=_request()))
+    asyncio.run(callbacks["after_model_callback"](callback_context=context, llm_response=response))
+    (event,) = [e for e in events if e["event_type"] == "llm_call"]
+    assert (event["token_input"], event["token_output"]) == (12, 43)
+    assert "estimated" not in event
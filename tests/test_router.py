@@ -0,0 +1,21 @@
+"""Model routing decisions in MODELS/router.py."""
+from types import SimpleNamespace
+
+from MODELS.router import uses_google_search
+
+
+def _request(tools=None, tools_dict=None):
+    return SimpleNamespace(config=SimpleNamespace(tools=tools), tools_dict=tools_dict or {})
+
+
+def test_google_search_grounding_is_detected():
+    search = SimpleNamespace(google_search=object(), google_search_retrieval=None)
+    function = SimpleNamespace(google_search=None, google_search_retrieval=None)
+    assert uses_google_search(_request([function, search]))
+    assert uses_google_search(_request([SimpleNamespace(google_search=None, google_search_retrieval=object())]))
+    assert not uses_google_search(_request([function]))
+    assert not uses_google_search(_request())
+
+
+def test_google_search_in_tools_dict_is_detected():
+    assert uses_google_search(_request(tools_dict={"google_search": object()}))